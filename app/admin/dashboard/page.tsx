@@ -30,6 +30,13 @@ interface RecentOrder {
   shipping_address?: any
 }
 
+interface LowStockAlert {
+  product_id: string
+  name: string
+  stock: number
+  reorder_threshold: number
+}
+
 export default function AdminDashboard() {
   const [stats, setStats] = useState<DashboardStats>({
     total_users: 0,
@@ -38,6 +45,7 @@ export default function AdminDashboard() {
     total_revenue: 0
   })
   const [recentOrders, setRecentOrders] = useState<RecentOrder[]>([])
+  const [lowStockAlerts, setLowStockAlerts] = useState<LowStockAlert[]>([])
   const [loading, setLoading] = useState(true)
   const router = useRouter()
 
@@ -45,6 +53,89 @@ export default function AdminDashboard() {
     checkAdminAndFetchData()
   }, [])
 
+  // Live updates pushed by the backend instead of re-fetching the dashboard
+  useEffect(() => {
+    let events: EventSource | null = null
+    let retry: ReturnType<typeof setTimeout> | undefined
+    let closed = false
+
+    // The stream URL carries a short-lived token made for it, never the login token
+    const connect = async () => {
+      const token = localStorage.getItem('token')
+      if (!token) return
+
+      try {
+        const res = await fetch('http://localhost:8000/api/admin/events/token', {
+          method: 'POST',
+          headers: { 'Authorization': `Bearer ${token}` }
+        })
+        if (!res.ok) return
+        const data = await res.json()
+        if (closed) return
+        events = new EventSource(`http://localhost:8000/api/admin/events?token=${encodeURIComponent(data.token)}`)
+      } catch (error) {
+        console.error('Error opening live updates:', error)
+        retry = setTimeout(connect, 5000)
+        return
+      }
+
+      // Reconnecting with an expired token is refused; start over with a new one
+      events.onerror = () => {
+        if (events?.readyState === EventSource.CLOSED && !closed) {
+          retry = setTimeout(connect, 5000)
+        }
+      }
+
+      events.addEventListener('order_created', (e) => {
+        const data = JSON.parse((e as MessageEvent).data)
+        setStats(prev => ({
+          ...prev,
+          total_orders: prev.total_orders + 1,
+          total_revenue: prev.total_revenue + data.revenue_delta
+        }))
+        setRecentOrders(prev => [data.order, ...prev].slice(0, 10))
+      })
+
+      events.addEventListener('order_status_changed', (e) => {
+        const data = JSON.parse((e as MessageEvent).data)
+        setStats(prev => ({ ...prev, total_revenue: prev.total_revenue + data.revenue_delta }))
+        setRecentOrders(prev => prev.map(order =>
+          order.order_id === data.order_id ? { ...order, order_status: data.order_status } : order
+        ))
+      })
+
+      events.addEventListener('product_created', () => {
+        setStats(prev => ({ ...prev, total_products: prev.total_products + 1 }))
+      })
+
+      events.addEventListener('product_deleted', () => {
+        setStats(prev => ({ ...prev, total_products: prev.total_products - 1 }))
+      })
+
+      events.addEventListener('user_registered', () => {
+        setStats(prev => ({ ...prev, total_users: prev.total_users + 1 }))
+      })
+
+      events.addEventListener('low_stock', (e) => {
+        const data = JSON.parse((e as MessageEvent).data)
+        setLowStockAlerts(prev => [data, ...prev.filter(p => p.product_id !== data.product_id)].slice(0, 5))
+      })
+
+      events.addEventListener('stock_restored', (e) => {
+        const data = JSON.parse((e as MessageEvent).data)
+        setLowStockAlerts(prev => prev.filter(p => p.product_id !== data.product_id))
+      })
+    }
+
+    connect()
+
+    return () => {
+      closed = true
+      clearTimeout(retry)
+      events?.close()
+    }
+  }, [])
+
   const checkAdminAndFetchData = async () => {
     const token = localStorage.getItem('token')
     if (!token) {
@@ -144,6 +235,21 @@ export default function AdminDashboard() {
           </div>
         </div>
 
+        {/* Low Stock Alerts */}
+        {lowStockAlerts.length > 0 && (
+          <div style={{ backgroundColor: '#2a2d47', borderRadius: '0.75rem', padding: '1.5rem', marginBottom: '2rem', border: '1px solid #EF4444' }}>
+            <h2 style={{ fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '1rem', color: 'white' }}>
+              Low Stock Alerts
+            </h2>
+            {lowStockAlerts.map((alert) => (
+              <div key={alert.product_id} style={{ display: 'flex', justifyContent: 'space-between', padding: '0.5rem 0', borderBottom: '1px solid #374151' }}>
+                <span style={{ color: 'white' }}>{alert.name}</span>
+                <span style={{ color: '#EF4444' }}>{alert.stock} left</span>
+              </div>
+            ))}
+          </div>
+        )}
+
         {/* Quick Actions */}
         <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(200px, 1fr))', gap: '1rem', marginBottom: '2rem' }}>
           <Link href="/admin/products" style={{ textDecoration: 'none' }}>
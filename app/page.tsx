@@ -1,15 +1,50 @@
+'use client'
+
+import { useState, useEffect } from 'react'
 import HeroSlider from '@/components/home/HeroSlider'
 import CategorySection from '@/components/home/CategorySection'
 import ProductSection from '@/components/home/ProductSection'
 import BrandSection from '@/components/home/BrandSection'
+import { api } from '@/lib/api'
+import { fallbackHome } from '@/lib/constants/home'
 
 export default function HomePage() {
+  const [deviceType, setDeviceType] = useState<'desktop' | 'mobile' | null>(null)
+  const [home, setHome] = useState<any>(null)
+
+  useEffect(() => {
+    // Check device type
+    const checkDevice = () => {
+      setDeviceType(window.innerWidth < 768 ? 'mobile' : 'desktop')
+    }
+    checkDevice()
+    window.addEventListener('resize', checkDevice)
+
+    return () => window.removeEventListener('resize', checkDevice)
+  }, [])
+
+  useEffect(() => {
+    if (deviceType) {
+      fetchHome(deviceType)
+    }
+  }, [deviceType])
+
+  // Sliders, brands and featured products come from one cached request
+  const fetchHome = async (device: 'desktop' | 'mobile') => {
+    try {
+      setHome(await api.getHome(device))
+    } catch (error) {
+      console.error('Error fetching home page:', error)
+      setHome(fallbackHome)
+    }
+  }
+
   return (
     <>
-      <HeroSlider />
+      <HeroSlider sliders={home?.sliders} />
       <CategorySection />
-      <ProductSection />
-      <BrandSection />
+      <ProductSection products={home?.featured_products} />
+      <BrandSection brands={home?.brands} />
       {/* Add more sections here later */}
     </>
   )
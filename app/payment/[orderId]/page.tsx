@@ -6,6 +6,10 @@ import { useRouter } from 'next/navigation'
 import Image from 'next/image'
 import { Loader2, CheckCircle, XCircle, AlertCircle, CreditCard } from 'lucide-react'
 
+// Long-poll settings for confirming a payment after the gateway redirect
+const STATUS_WAIT_SECONDS = 25
+const STATUS_MAX_ATTEMPTS = 5
+
 interface PaymentPageProps {
   params: {
     orderId: string
@@ -99,14 +103,26 @@ export default function PaymentPage({ params }: PaymentPageProps) {
     const paymentId = urlParams.get('payment_id')
 
     if (status && paymentId) {
+      setPaymentStatus('processing')
+
       try {
-        const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/payment/status/${paymentId}`, {
-          headers: {
-            'Authorization': `Bearer ${localStorage.getItem('token')}`
+        // The server holds each request until the payment settles or `wait`
+        // seconds pass, so this loop normally makes a single request
+        for (let attempt = 0; attempt < STATUS_MAX_ATTEMPTS; attempt++) {
+          const response = await fetch(
+            `${process.env.NEXT_PUBLIC_API_URL}/api/payment/status/${paymentId}?wait=${STATUS_WAIT_SECONDS}`,
+            {
+              headers: {
+                'Authorization': `Bearer ${localStorage.getItem('token')}`
+              }
+            }
+          )
+
+          if (!response.ok) {
+            setError('Failed to verify payment status')
+            return
           }
-        })
 
-        if (response.ok) {
           const data = await response.json()
 
           if (data.payment.status === 'completed') {
@@ -114,10 +130,16 @@ export default function PaymentPage({ params }: PaymentPageProps) {
             setTimeout(() => {
               router.push(`/order-success/${params.orderId}`)
             }, 2000)
-          } else {
+            return
+          }
+
+          if (data.payment.status === 'failed') {
             setPaymentStatus('failed')
+            return
           }
         }
+
+        setError('Payment is still being confirmed. Please check your orders in a few minutes.')
       } catch (err) {
         setError('Failed to verify payment status')
       }
@@ -1,5 +1,5 @@
 # backend/api/payment.py
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import httpx
@@ -9,15 +9,20 @@ import json
 import uuid
 from datetime import datetime, timedelta
 import base64
-from motor.motor_asyncio import AsyncIOMotorClient
+import time
+import asyncio
+import logging
+from collections import deque
+from pymongo import ReturnDocument
 import os
 
-router = APIRouter()
+from app.core.events import event_bus
+from app.core.metrics import InstrumentedTransport
+from app.db import stock_holds
+from app.db.database import get_database
 
-# MongoDB Connection
-MONGODB_URL = os.getenv("MONGODB_URL")
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client.ecommerce
+router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Payment Gateway Configurations
 BKASH_CONFIG = {
@@ -29,6 +34,12 @@ BKASH_CONFIG = {
     "callback_url": os.getenv("BKASH_CALLBACK_URL")
 }
 
+# Renew the bKash token this many seconds before it expires
+BKASH_TOKEN_RENEW_MARGIN = int(os.getenv("BKASH_TOKEN_RENEW_MARGIN", 300))
+
+# Share the bKash token between workers through Redis
+BKASH_SHARED_TOKEN = os.getenv("BKASH_SHARED_TOKEN", "false").lower() == "true"
+
 NAGAD_CONFIG = {
     "merchant_id": os.getenv("NAGAD_MERCHANT_ID"),
     "merchant_public_key": os.getenv("NAGAD_PUBLIC_KEY"),
@@ -64,97 +75,369 @@ class PaymentCallback(BaseModel):
     payment_method: str
 
 
+# Shared gateway HTTP clients
+#
+# One AsyncClient per gateway lives for the whole app lifetime so payment
+# steps reuse keep-alive connections instead of paying DNS, TCP and TLS
+# setup on every call. Closed by close_gateway_clients() on shutdown.
+GATEWAY_TIMEOUT = httpx.Timeout(
+    connect=float(os.getenv("PAYMENT_CONNECT_TIMEOUT", 5)),
+    read=float(os.getenv("PAYMENT_READ_TIMEOUT", 30)),
+    write=10.0,
+    pool=5.0
+)
+
+GATEWAY_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("PAYMENT_MAX_CONNECTIONS", 50)),
+    max_keepalive_connections=int(os.getenv("PAYMENT_MAX_KEEPALIVE", 20)),
+    keepalive_expiry=60.0
+)
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    GATEWAY_HTTP2 = True
+except ImportError:
+    GATEWAY_HTTP2 = False
+
+_gateway_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_gateway_client(gateway: str) -> httpx.AsyncClient:
+    """Return the shared client for a gateway, creating it on first use"""
+    client = _gateway_clients.get(gateway)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            transport=InstrumentedTransport(gateway, http2=GATEWAY_HTTP2, limits=GATEWAY_LIMITS),
+            timeout=GATEWAY_TIMEOUT
+        )
+        _gateway_clients[gateway] = client
+    return client
+
+
+async def close_gateway_clients():
+    """Close every shared gateway client (app shutdown)"""
+    for client in _gateway_clients.values():
+        await client.aclose()
+    _gateway_clients.clear()
+
+
+
+
+class GatewayLatency:
+    """Rolling per-call latency samples for each gateway endpoint"""
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, key: str, seconds: float, failed: bool = False):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.max_samples)
+        samples.append(seconds)
+        if failed:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        report = {}
+        for key, samples in self._samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            report[key] = {
+                "count": count,
+                "errors": self._errors.get(key, 0),
+                "avg_ms": round(sum(ordered) / count * 1000, 2),
+                "p50_ms": round(ordered[int(count * 0.50)] * 1000, 2),
+                "p95_ms": round(ordered[min(int(count * 0.95), count - 1)] * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2)
+            }
+        return report
+
+
+gateway_latency = GatewayLatency()
+
+
+async def gateway_request(gateway: str, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+    """Send a request on the gateway's shared client and record its latency"""
+    client = get_gateway_client(gateway)
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = await client.request(method, url, **kwargs)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        gateway_latency.record(f"{gateway}.{endpoint}", time.perf_counter() - started, failed)
+
+
+# bKash token management
+class BkashTokenManager:
+    """Process-wide bKash token cache.
+
+    Concurrent callers share one in-flight grant/refresh (single-flight), the
+    token is renewed in the background BKASH_TOKEN_RENEW_MARGIN seconds before
+    it expires, and renewals use the refresh token instead of a full grant.
+    With BKASH_SHARED_TOKEN enabled the token is kept in Redis so every worker
+    uses the same one and only one worker renews it at a time.
+    """
+
+    REDIS_KEY = "bkash:token"
+    REDIS_LOCK_KEY = "bkash:token:lock"
+    # Never hand out a token closer than this to its expiry
+    MIN_VALIDITY = 30
+
+    def __init__(self, config: dict, renew_margin: int = BKASH_TOKEN_RENEW_MARGIN, redis=None):
+        self.config = config
+        self.renew_margin = renew_margin
+        self.redis = redis
+        self._token = None
+        self._refresh_token = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._renewal_task = None
+        self.grant_calls = 0
+        self.refresh_calls = 0
+
+    def _usable(self) -> bool:
+        return bool(self._token) and time.time() < self._expires_at - self.MIN_VALIDITY
+
+    async def get_token(self) -> str:
+        """Return a valid token, fetching one only if nobody else already is"""
+        if self._usable():
+            return self._token
+
+        async with self._lock:
+            # Another caller may have renewed it while we waited for the lock
+            if self._usable():
+                return self._token
+            await self._renew()
+            return self._token
+
+    async def _renew(self):
+        if await self._load_shared():
+            return
+
+        lock_acquired = True
+        if self.redis is not None:
+            try:
+                lock_acquired = await self.redis.set(self.REDIS_LOCK_KEY, "1", nx=True, ex=15)
+            except Exception as e:
+                logger.warning("bKash token lock unavailable: %s", e)
+
+            if not lock_acquired:
+                # Another worker is renewing - wait for it to publish the token
+                for _ in range(50):
+                    await asyncio.sleep(0.1)
+                    if await self._load_shared():
+                        return
+
+        try:
+            data = None
+            if self._refresh_token:
+                data = await self._request_token("refresh")
+            if data is None:
+                data = await self._request_token("grant")
+            if data is None:
+                raise HTTPException(status_code=500, detail="Failed to get bKash token")
+
+            self._token = data["id_token"]
+            self._refresh_token = data.get("refresh_token", self._refresh_token)
+            self._expires_at = time.time() + int(data["expires_in"])
+            await self._store_shared()
+            self._schedule_renewal()
+        finally:
+            if self.redis is not None and lock_acquired:
+                try:
+                    await self.redis.delete(self.REDIS_LOCK_KEY)
+                except Exception:
+                    pass
+
+    async def _request_token(self, kind: str) -> Optional[dict]:
+        body = {
+            "app_key": self.config['app_key'],
+            "app_secret": self.config['app_secret']
+        }
+        if kind == "refresh":
+            body["refresh_token"] = self._refresh_token
+            self.refresh_calls += 1
+        else:
+            self.grant_calls += 1
+
+        response = await gateway_request(
+            "bkash", "POST",
+            f"{self.config['base_url']}/tokenized/checkout/token/{kind}",
+            f"token_{kind}",
+            json=body,
+            headers={
+                "username": self.config['username'],
+                "password": self.config['password']
+            }
+        )
+
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        return data if data.get("id_token") else None
+
+    async def _load_shared(self) -> bool:
+        """Adopt a token another worker stored in Redis"""
+        if self.redis is None:
+            return False
+        try:
+            cached = await self.redis.get(self.REDIS_KEY)
+        except Exception as e:
+            logger.warning("bKash shared token unavailable: %s", e)
+            return False
+        if not cached:
+            return False
+
+        data = json.loads(cached)
+        if time.time() >= data["expires_at"] - self.MIN_VALIDITY:
+            return False
+
+        self._token = data["id_token"]
+        self._refresh_token = data.get("refresh_token")
+        self._expires_at = data["expires_at"]
+        self._schedule_renewal()
+        return True
+
+    async def _store_shared(self):
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(
+                self.REDIS_KEY,
+                json.dumps({
+                    "id_token": self._token,
+                    "refresh_token": self._refresh_token,
+                    "expires_at": self._expires_at
+                }),
+                ex=max(int(self._expires_at - time.time()), 1)
+            )
+        except Exception as e:
+            logger.warning("Could not share bKash token: %s", e)
+
+    def _schedule_renewal(self):
+        """Renew ahead of expiry so requests never wait on the token endpoint"""
+        current = self._renewal_task
+        # Called from inside the renewal task itself, which must not cancel its own cleanup
+        if current is not None and not current.done() and current is not asyncio.current_task():
+            current.cancel()
+        delay = max(self._expires_at - self.renew_margin - time.time(), 0)
+        self._renewal_task = asyncio.create_task(self._renew_after(delay))
+
+    async def _renew_after(self, delay: float):
+        await asyncio.sleep(delay)
+        async with self._lock:
+            # Skip if a newer token arrived while we slept
+            if time.time() < self._expires_at - self.renew_margin:
+                return
+            try:
+                await self._renew()
+            except Exception as e:
+                logger.warning("Proactive bKash token renewal failed: %s", e)
+
+    async def close(self):
+        if self._renewal_task is not None:
+            self._renewal_task.cancel()
+            self._renewal_task = None
+
+
+def _bkash_token_redis():
+    if not BKASH_SHARED_TOKEN:
+        return None
+    import redis.asyncio as aioredis
+    return aioredis.Redis(
+        host=os.getenv("REDIS_HOST"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        password=os.getenv("REDIS_PASSWORD"),
+        decode_responses=True
+    )
+
+
+bkash_tokens = BkashTokenManager(BKASH_CONFIG, redis=_bkash_token_redis())
+
+
 # bKash Integration
 class BkashGateway:
-    def __init__(self):
+    def __init__(self, tokens: BkashTokenManager = bkash_tokens):
         self.config = BKASH_CONFIG
-        self.token = None
-        self.token_expiry = None
+        self.tokens = tokens
 
     async def get_token(self):
         """Get bKash access token"""
-        if self.token and self.token_expiry and datetime.utcnow() < self.token_expiry:
-            return self.token
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.config['base_url']}/tokenized/checkout/token/grant",
-                json={
-                    "app_key": self.config['app_key'],
-                    "app_secret": self.config['app_secret']
-                },
-                headers={
-                    "username": self.config['username'],
-                    "password": self.config['password']
-                }
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                self.token = data['id_token']
-                self.token_expiry = datetime.utcnow() + timedelta(seconds=data['expires_in'])
-                return self.token
-            else:
-                raise HTTPException(status_code=500, detail="Failed to get bKash token")
+        return await self.tokens.get_token()
 
     async def create_payment(self, order_id: str, amount: float, reference: str):
         """Create bKash payment"""
         token = await self.get_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.config['base_url']}/tokenized/checkout/create",
-                json={
-                    "mode": "0011",
-                    "payerReference": reference,
-                    "callbackURL": f"{self.config['callback_url']}/{order_id}",
-                    "amount": str(amount),
-                    "currency": "BDT",
-                    "intent": "sale",
-                    "merchantInvoiceNumber": order_id
-                },
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "X-APP-Key": self.config['app_key']
-                }
-            )
+        response = await gateway_request(
+            "bkash", "POST",
+            f"{self.config['base_url']}/tokenized/checkout/create",
+            "create",
+            json={
+                "mode": "0011",
+                "payerReference": reference,
+                "callbackURL": f"{self.config['callback_url']}/{order_id}",
+                "amount": str(amount),
+                "currency": "BDT",
+                "intent": "sale",
+                "merchantInvoiceNumber": order_id
+            },
+            headers={
+                "Authorization": f"Bearer {token}",
+                "X-APP-Key": self.config['app_key']
+            }
+        )
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=500, detail="Failed to create bKash payment")
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=500, detail="Failed to create bKash payment")
 
     async def execute_payment(self, payment_id: str):
         """Execute bKash payment after user approval"""
         token = await self.get_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.config['base_url']}/tokenized/checkout/execute",
-                json={"paymentID": payment_id},
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "X-APP-Key": self.config['app_key']
-                }
-            )
+        response = await gateway_request(
+            "bkash", "POST",
+            f"{self.config['base_url']}/tokenized/checkout/execute",
+            "execute",
+            json={"paymentID": payment_id},
+            headers={
+                "Authorization": f"Bearer {token}",
+                "X-APP-Key": self.config['app_key']
+            }
+        )
 
-            return response.json()
+        # Gateway-side failures are worth retrying; anything else is an answer
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+        return response.json()
 
     async def query_payment(self, payment_id: str):
         """Query bKash payment status"""
         token = await self.get_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.config['base_url']}/tokenized/checkout/payment/status",
-                params={"paymentID": payment_id},
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "X-APP-Key": self.config['app_key']
-                }
-            )
+        response = await gateway_request(
+            "bkash", "GET",
+            f"{self.config['base_url']}/tokenized/checkout/payment/status",
+            "query",
+            params={"paymentID": payment_id},
+            headers={
+                "Authorization": f"Bearer {token}",
+                "X-APP-Key": self.config['app_key']
+            }
+        )
 
-            return response.json()
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+        return response.json()
 
 
 # Nagad Integration
@@ -188,26 +471,31 @@ class NagadGateway:
         signature = self.generate_signature(payment_data)
         payment_data['signature'] = signature
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.config['base_url']}/payment/create",
-                json=payment_data
-            )
+        response = await gateway_request(
+            "nagad", "POST",
+            f"{self.config['base_url']}/payment/create",
+            "create",
+            json=payment_data
+        )
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=500, detail="Failed to create Nagad payment")
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=500, detail="Failed to create Nagad payment")
 
     async def verify_payment(self, payment_ref: str):
         """Verify Nagad payment"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.config['base_url']}/payment/verify/{payment_ref}",
-                params={"merchantId": self.config['merchant_id']}
-            )
+        response = await gateway_request(
+            "nagad", "GET",
+            f"{self.config['base_url']}/payment/verify/{payment_ref}",
+            "verify",
+            params={"merchantId": self.config['merchant_id']}
+        )
 
-            return response.json()
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+        return response.json()
 
 
 # Upay Integration
@@ -239,16 +527,17 @@ class UpayGateway:
         hash_string = f"{payment_data['merchant_id']}{payment_data['order_id']}{payment_data['amount']}"
         payment_data['hash'] = self.generate_hash(hash_string)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.config['base_url']}/payment/init",
-                json=payment_data
-            )
+        response = await gateway_request(
+            "upay", "POST",
+            f"{self.config['base_url']}/payment/init",
+            "create",
+            json=payment_data
+        )
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=500, detail="Failed to create Upay payment")
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=500, detail="Failed to create Upay payment")
 
     async def verify_payment(self, transaction_id: str):
         """Verify Upay payment"""
@@ -260,19 +549,332 @@ class UpayGateway:
         hash_string = f"{verify_data['merchant_id']}{verify_data['transaction_id']}"
         verify_data['hash'] = self.generate_hash(hash_string)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.config['base_url']}/payment/verify",
-                json=verify_data
+        response = await gateway_request(
+            "upay", "POST",
+            f"{self.config['base_url']}/payment/verify",
+            "verify",
+            json=verify_data
+        )
+
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+        return response.json()
+
+
+# Gateways are stateless apart from the shared clients and token cache
+bkash_gateway = BkashGateway()
+nagad_gateway = NagadGateway()
+upay_gateway = UpayGateway()
+
+
+# Payment callback processing
+#
+# Callbacks are written to payment_callbacks and processed by a pool of
+# background workers, so slow gateway APIs never hold a request worker and
+# failed attempts are retried instead of lost.
+CALLBACK_COLLECTION = "payment_callbacks"
+CALLBACK_GATEWAYS = ("bkash", "nagad", "upay")
+# Gateway calls in flight per gateway, in each app process. The pool has a
+# share of workers for every gateway, so a burst on one gateway is held by
+# its semaphore while the other gateways' callbacks still find workers.
+CALLBACK_GATEWAY_CONCURRENCY = int(os.getenv("PAYMENT_GATEWAY_CONCURRENCY", 4))
+CALLBACK_WORKERS = int(os.getenv("PAYMENT_CALLBACK_WORKERS", CALLBACK_GATEWAY_CONCURRENCY * len(CALLBACK_GATEWAYS)))
+CALLBACK_MAX_ATTEMPTS = int(os.getenv("PAYMENT_CALLBACK_MAX_ATTEMPTS", 5))
+CALLBACK_LEASE_SECONDS = 60
+CALLBACK_POLL_SECONDS = 2
+
+# Payment states that are never left once reached
+FINAL_PAYMENT_STATUSES = ["completed", "failed"]
+# A payment whose callback failed every attempt; reconciliation asks the gateway
+NEEDS_RECONCILE_STATUS = "needs_reconcile"
+
+# Longest a status request may be held open waiting for a change
+PAYMENT_STATUS_MAX_WAIT = int(os.getenv("PAYMENT_STATUS_MAX_WAIT", 30))
+# Waiting status requests are woken by notify_payment_status, which reaches
+# every worker through the event relay (app/db/event_relay.py). They also
+# re-read the payment this often as a fallback, for changes made by
+# processes that run no relay (the reconciliation CLI) or a dropped event.
+PAYMENT_STATUS_RECHECK_SECONDS = float(os.getenv("PAYMENT_STATUS_RECHECK_SECONDS", 10))
+
+
+def payment_channel(payment_id: str) -> str:
+    return f"payment:{payment_id}"
+
+
+def notify_payment_status(payment_id: str, status: str):
+    """Wake status requests waiting on this payment, in every worker"""
+    event_bus.publish(payment_channel(payment_id), "payment_status", {"payment_id": payment_id, "status": status})
+
+
+class RetryableCallbackError(Exception):
+    """Gateway could not give a definitive answer; try the callback again later"""
+
+
+async def enqueue_payment_callback(payment: dict, callback_data: dict):
+    """Persist a gateway callback for the worker pool"""
+    db = get_database()
+    now = datetime.utcnow()
+    await db[CALLBACK_COLLECTION].insert_one({
+        "payment_id": payment["payment_id"],
+        "order_id": payment["order_id"],
+        "payment_method": payment["payment_method"],
+        "payload": callback_data,
+        "status": "queued",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now
+    })
+
+    await db.payments.update_one(
+        {"payment_id": payment["payment_id"], "status": {"$nin": FINAL_PAYMENT_STATUSES}},
+        {"$set": {"status": "processing", "callback_status": "queued", "updated_at": now}}
+    )
+
+    callback_workers.wake()
+
+
+async def take_paid_order_stock(db, payment: dict) -> bool:
+    """Convert the stock hold of a newly completed payment's order.
+
+    A payment can complete after its order was cancelled, which already
+    settled the order's stock; the payment is then flagged for a refund
+    instead. Returns False in that case.
+    """
+    order = await db.orders.find_one({"order_id": payment["order_id"]}, {"order_status": 1})
+    if order is not None and order.get("order_status") == "cancelled":
+        await db.payments.update_one(
+            {"payment_id": payment["payment_id"]},
+            {"$set": {"needs_refund": True, "refund_reason": "order_cancelled", "updated_at": datetime.utcnow()}}
+        )
+        logger.warning("Payment completed for a cancelled order; flagged for refund", extra={
+            "payment_id": payment["payment_id"], "order_id": payment["order_id"]
+        })
+        return False
+
+    await stock_holds.convert_hold(db, payment["order_id"])
+    return True
+
+
+async def apply_payment_result(payment: dict, success: bool, transaction_id: Optional[str] = None) -> bool:
+    """Move a payment (and its order) to its final state.
+
+    Only the first transition out of a non-final state takes effect, so
+    duplicate callbacks, retries and reconciliation can all call this
+    safely. Returns True if this call made the transition.
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    update = {"status": "completed" if success else "failed", "updated_at": now}
+    if success:
+        update["transaction_id"] = transaction_id
+        update["completed_at"] = now
+    else:
+        update["failed_at"] = now
+
+    result = await db.payments.update_one(
+        {"payment_id": payment["payment_id"], "status": {"$nin": FINAL_PAYMENT_STATUSES}},
+        {"$set": update}
+    )
+    if result.modified_count == 0:
+        return False
+
+    notify_payment_status(payment["payment_id"], update["status"])
+
+    if success:
+        await db.orders.update_one(
+            {"order_id": payment["order_id"]},
+            {"$set": {
+                "payment_status": "paid",
+                "updated_at": now
+            }}
+        )
+        if await take_paid_order_stock(db, payment):
+            asyncio.create_task(track_purchase_completion(payment["order_id"]))
+    else:
+        await stock_holds.release_hold(db, payment["order_id"], "payment_failed")
+
+    return True
+
+
+async def process_payment_callback(job: dict) -> dict:
+    """Execute or verify a callback with its gateway and apply the outcome"""
+    payload = job["payload"]
+    method = job["payment_method"]
+    success = False
+    transaction_id = None
+
+    try:
+        if method == "bkash":
+            if payload.get("status") == "success":
+                gateway_payment_id = payload.get("paymentID")
+                result = await bkash_gateway.execute_payment(gateway_payment_id)
+                if result.get("statusCode") == "0000":
+                    success, transaction_id = True, result.get("trxID")
+                else:
+                    # Execute is not repeatable - after a retry ask for the current state instead
+                    status = await bkash_gateway.query_payment(gateway_payment_id)
+                    if status.get("transactionStatus") == "Completed":
+                        success, transaction_id = True, status.get("trxID")
+
+        elif method == "nagad":
+            if payload.get("status") == "Success":
+                verification = await nagad_gateway.verify_payment(payload.get("payment_ref"))
+                if verification.get("status") == "Success":
+                    success, transaction_id = True, verification.get("issuerPaymentRefNo")
+
+        elif method == "upay":
+            if payload.get("status") == "SUCCESS":
+                verification = await upay_gateway.verify_payment(payload.get("transaction_id"))
+                if verification.get("status") == "SUCCESS":
+                    success, transaction_id = True, verification.get("transaction_id")
+
+    except (httpx.HTTPError, ValueError, HTTPException) as e:
+        raise RetryableCallbackError(str(e))
+
+    payment = {"payment_id": job["payment_id"], "order_id": job["order_id"]}
+    applied = await apply_payment_result(payment, success, transaction_id)
+    return {"success": success, "transaction_id": transaction_id, "applied": applied}
+
+
+class CallbackWorkerPool:
+    """Background workers that drain the payment_callbacks queue.
+
+    Jobs are claimed with a lease so that, across several app processes,
+    each callback is processed by one worker at a time; an expired lease
+    (crashed worker) makes the job claimable again. Gateway calls are
+    capped per gateway by a semaphore.
+    """
+
+    def __init__(self, workers: int = CALLBACK_WORKERS, gateway_concurrency: int = CALLBACK_GATEWAY_CONCURRENCY):
+        self.workers = workers
+        self.gateway_concurrency = gateway_concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks = []
+        self._wakeup = None
+
+    def _semaphore(self, gateway: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(gateway)
+        if semaphore is None:
+            semaphore = self._semaphores[gateway] = asyncio.Semaphore(self.gateway_concurrency)
+        return semaphore
+
+    def wake(self):
+        """Signal idle workers that a new callback was queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if self.workers <= self.gateway_concurrency:
+            logger.warning("Payment callback workers do not exceed the per-gateway limit, so it never applies",
+                           extra={"workers": self.workers, "gateway_concurrency": self.gateway_concurrency})
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await get_database()[CALLBACK_COLLECTION].find_one_and_update(
+            {"$or": [
+                {"status": "queued", "next_attempt_at": {"$lte": now}},
+                {"status": "processing", "locked_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": "processing",
+                    "locked_until": now + timedelta(seconds=CALLBACK_LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Error claiming payment callback")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=CALLBACK_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._handle(job)
+
+    async def _handle(self, job: dict):
+        db = get_database()
+        now = datetime.utcnow()
+        try:
+            async with self._semaphore(job["payment_method"]):
+                result = await process_payment_callback(job)
+
+            await db[CALLBACK_COLLECTION].update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "done", "result": result, "updated_at": now}}
+            )
+            await db.payments.update_one(
+                {"payment_id": job["payment_id"]},
+                {"$set": {"callback_status": "done", "callback_attempts": job["attempts"]}}
             )
 
-            return response.json()
+        except Exception as e:
+            retryable = isinstance(e, RetryableCallbackError) and job["attempts"] < CALLBACK_MAX_ATTEMPTS
+            job_status = "queued" if retryable else "failed"
+            # Exponential backoff: 2, 4, 8, 16... seconds
+            next_attempt_at = now + timedelta(seconds=2 ** job["attempts"])
+
+            await db[CALLBACK_COLLECTION].update_one(
+                {"_id": job["_id"]},
+                {"$set": {
+                    "status": job_status,
+                    "next_attempt_at": next_attempt_at,
+                    "last_error": str(e),
+                    "updated_at": now
+                }}
+            )
+            await db.payments.update_one(
+                {"payment_id": job["payment_id"]},
+                {"$set": {
+                    "callback_status": "retrying" if retryable else "failed",
+                    "callback_attempts": job["attempts"],
+                    "callback_error": str(e)
+                }}
+            )
+            if not retryable:
+                # Left to reconciliation rather than sitting in "processing"
+                await db.payments.update_one(
+                    {"payment_id": job["payment_id"], "status": {"$nin": FINAL_PAYMENT_STATUSES}},
+                    {"$set": {"status": NEEDS_RECONCILE_STATUS, "updated_at": now}}
+                )
+                logger.error(
+                    "Payment callback failed after %d attempts, payment needs reconciliation: %s", job["attempts"], e,
+                    extra={"order_id": job["order_id"], "payment_id": job["payment_id"]}
+                )
+                notify_payment_status(job["payment_id"], NEEDS_RECONCILE_STATUS)
+
+
+callback_workers = CallbackWorkerPool()
 
 
 # API Endpoints
 @router.post("/api/payment/initiate")
 async def initiate_payment(payment_data: PaymentInitiate):
     """Initiate payment with selected gateway"""
+    db = get_database()
     try:
         # Save payment initiation in database
         payment_doc = {
@@ -291,7 +893,7 @@ async def initiate_payment(payment_data: PaymentInitiate):
 
         # Process based on payment method
         if payment_data.payment_method == "bkash":
-            gateway = BkashGateway()
+            gateway = bkash_gateway
             result = await gateway.create_payment(
                 payment_data.order_id,
                 payment_data.amount,
@@ -316,7 +918,7 @@ async def initiate_payment(payment_data: PaymentInitiate):
             }
 
         elif payment_data.payment_method == "nagad":
-            gateway = NagadGateway()
+            gateway = nagad_gateway
             result = await gateway.create_payment(
                 payment_data.order_id,
                 payment_data.amount,
@@ -340,7 +942,7 @@ async def initiate_payment(payment_data: PaymentInitiate):
             }
 
         elif payment_data.payment_method == "upay":
-            gateway = UpayGateway()
+            gateway = upay_gateway
             result = await gateway.create_payment(
                 payment_data.order_id,
                 payment_data.amount,
@@ -375,115 +977,121 @@ async def initiate_payment(payment_data: PaymentInitiate):
 
 
 @router.post("/api/payment/callback/{order_id}")
-async def payment_callback(order_id: str, request: Request, background_tasks: BackgroundTasks):
-    """Handle payment gateway callbacks"""
+async def payment_callback(order_id: str, request: Request):
+    """Handle payment gateway callbacks
+
+    The callback is persisted and acknowledged straight away; gateway
+    execution/verification runs in the callback worker pool. Follow the
+    outcome through /api/payment/status/{payment_id}.
+    """
+    db = get_database()
     try:
         # Get request data
         callback_data = await request.json()
 
-        # Find payment record
-        payment = await db.payments.find_one({"order_id": order_id})
+        # Find the latest payment record for the order
+        payment = await db.payments.find_one({"order_id": order_id}, sort=[("created_at", -1)])
         if not payment:
             raise HTTPException(status_code=404, detail="Payment not found")
 
-        # Process based on payment method
-        if payment["payment_method"] == "bkash":
-            gateway = BkashGateway()
-
-            if callback_data.get("status") == "success":
-                # Execute payment
-                execution_result = await gateway.execute_payment(callback_data.get("paymentID"))
-
-                if execution_result.get("statusCode") == "0000":
-                    # Payment successful
-                    await db.payments.update_one(
-                        {"order_id": order_id},
-                        {"$set": {
-                            "status": "completed",
-                            "transaction_id": execution_result.get("trxID"),
-                            "completed_at": datetime.utcnow()
-                        }}
-                    )
-
-                    # Update order status
-                    await db.orders.update_one(
-                        {"order_id": order_id},
-                        {"$set": {
-                            "payment_status": "paid",
-                            "updated_at": datetime.utcnow()
-                        }}
-                    )
-
-                    background_tasks.add_task(track_purchase_completion, order_id)
-
-                    return {"success": True, "message": "Payment completed successfully"}
-
-        elif payment["payment_method"] == "upay":
-            gateway = UpayGateway()
-
-            if callback_data.get("status") == "SUCCESS":
-                # Verify payment
-                verification = await gateway.verify_payment(callback_data.get("transaction_id"))
-
-                if verification.get("status") == "SUCCESS":
-                    await db.payments.update_one(
-                        {"order_id": order_id},
-                        {"$set": {
-                            "status": "completed",
-                            "transaction_id": verification.get("transaction_id"),
-                            "completed_at": datetime.utcnow()
-                        }}
-                    )
-
-                    await db.orders.update_one(
-                        {"order_id": order_id},
-                        {"$set": {
-                            "payment_status": "paid",
-                            "updated_at": datetime.utcnow()
-                        }}
-                    )
-
-                    background_tasks.add_task(track_purchase_completion, order_id)
-
-                    return {"success": True, "message": "Payment completed successfully"}
-
-        # Payment failed or cancelled
-        await db.payments.update_one(
-            {"order_id": order_id},
-            {"$set": {
-                "status": "failed",
-                "failed_at": datetime.utcnow()
-            }}
-        )
+        await enqueue_payment_callback(payment, callback_data)
 
-        return {"success": False, "message": "Payment failed"}
+        return {
+            "success": True,
+            "queued": True,
+            "payment_id": payment["payment_id"],
+            "message": "Payment is being processed"
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/api/payment/status/{payment_id}")
-async def get_payment_status(payment_id: str):
-    """Get payment status"""
+async def get_payment_status(payment_id: str, wait: int = Query(0, ge=0, le=PAYMENT_STATUS_MAX_WAIT)):
+    """Get payment status.
+
+    With wait=N, a payment that is not final yet is held for up to N seconds
+    until callback processing or reconciliation moves it, then returned.
+    The payment is re-read when notify_payment_status reports a change,
+    from any worker, and otherwise only every PAYMENT_STATUS_RECHECK_SECONDS.
+    """
+    db = get_database()
+    channel = payment_channel(payment_id)
+    # Subscribe before reading so a change between the read and the wait is not missed
+    queue = event_bus.subscribe(channel) if wait else None
+
     try:
         payment = await db.payments.find_one({"payment_id": payment_id})
 
         if not payment:
             raise HTTPException(status_code=404, detail="Payment not found")
 
+        if queue is not None and payment["status"] not in FINAL_PAYMENT_STATUSES:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + wait
+            initial_status = payment["status"]
+            while payment["status"] == initial_status and loop.time() < deadline:
+                try:
+                    await asyncio.wait_for(
+                        queue.get(), timeout=min(PAYMENT_STATUS_RECHECK_SECONDS, deadline - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                payment = await db.payments.find_one({"payment_id": payment_id})
+
         payment["_id"] = str(payment["_id"])
 
         return {
             "success": True,
+            "final": payment["status"] in FINAL_PAYMENT_STATUSES,
             "payment": payment
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if queue is not None:
+            event_bus.unsubscribe(channel, queue)
+
+
+def payment_metrics() -> dict:
+    """Per-endpoint gateway call latency and bKash token state, served at /api/admin/payment/metrics"""
+    return {
+        "http2": GATEWAY_HTTP2,
+        "bkash_token": {
+            "grant_calls": bkash_tokens.grant_calls,
+            "refresh_calls": bkash_tokens.refresh_calls,
+            "shared": bkash_tokens.redis is not None
+        },
+        "gateways": gateway_latency.summary()
+    }
+
+
+async def start_payments():
+    """Start the callback worker pool (app startup)"""
+    await callback_workers.start()
+
+
+async def shutdown_payments():
+    """Stop workers and token renewal, close gateway clients (app shutdown)"""
+    await callback_workers.stop()
+    await bkash_tokens.close()
+    await close_gateway_clients()
+
+
+# Run on startup/shutdown of whichever app includes this router
+router.add_event_handler("startup", start_payments)
+router.add_event_handler("shutdown", shutdown_payments)
 
 
 async def track_purchase_completion(order_id: str):
     """Background task to track purchase completion"""
+    db = get_database()
     try:
         # Get order details
         order = await db.orders.find_one({"order_id": order_id})
@@ -493,39 +1101,5 @@ async def track_purchase_completion(order_id: str):
             # Implementation depends on your tracking setup
             pass
 
-    except Exception as e:
-        print(f"Error tracking purchase: {e}")
-        status
-        ": "
-        paid
-        ",
-        "updated_at": datetime.utcnow()
-    }}
-    )
-
-    # Track purchase event
-    background_tasks.add_task(track_purchase_completion, order_id)
-
-    return {"success": True, "message": "Payment completed successfully"}
-
-    elif payment["payment_method"] == "nagad":
-    gateway = NagadGateway()
-
-    if callback_data.get("status") == "Success":
-        # Verify payment
-        verification = await gateway.verify_payment(callback_data.get("payment_ref"))
-
-        if verification.get("status") == "Success":
-            await db.payments.update_one(
-                {"order_id": order_id},
-                {"$set": {
-                    "status": "completed",
-                    "transaction_id": verification.get("issuerPaymentRefNo"),
-                    "completed_at": datetime.utcnow()
-                }}
-            )
-
-            await db.orders.update_one(
-                {"order_id": order_id},
-                {"$set": {
-                    "payment_
\ No newline at end of file
+    except Exception:
+        logger.exception("Error tracking purchase")
@@ -0,0 +1,295 @@
+# backend/api/reconciliation.py
+"""Reconcile payments stuck in a non-final state against their gateway.
+
+A payment only leaves initiated/pending/processing when a callback arrives.
+This job re-verifies old, unresolved payments with bKash query_payment,
+Nagad verify_payment and Upay verify_payment, concurrently with bounded
+per-gateway parallelism, and applies the outcomes with bulk writes.
+
+Runs on a schedule when the router is included in an app, or once from
+the command line:
+
+    python -m api.reconciliation
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import httpx
+from bson import ObjectId
+from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# Run from the command line nothing has loaded .env yet, and api.payment
+# reads the gateway credentials at import
+load_dotenv()
+
+from api.payment import (
+    FINAL_PAYMENT_STATUSES, NEEDS_RECONCILE_STATUS, bkash_gateway, nagad_gateway, upay_gateway, notify_payment_status,
+    shutdown_payments, take_paid_order_stock
+)
+from app.db import database, stock_holds
+from app.db.database import get_database
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("PAYMENT_RECONCILE_INTERVAL", 300))
+# Leave payments alone while the customer may still be on the gateway page
+RECONCILE_MIN_AGE_SECONDS = int(os.getenv("PAYMENT_RECONCILE_MIN_AGE", 120))
+# Payments never registered with a gateway are failed after this long
+RECONCILE_ABANDON_HOURS = int(os.getenv("PAYMENT_RECONCILE_ABANDON_HOURS", 24))
+RECONCILE_CONCURRENCY = int(os.getenv("PAYMENT_RECONCILE_CONCURRENCY", 10))
+RECONCILE_BATCH_SIZE = 500
+
+RUNS_COLLECTION = "payment_reconcile_runs"
+LOCKS_COLLECTION = "job_locks"
+LOCK_ID = "payment_reconcile"
+
+UNRESOLVED_STATUSES = ["initiated", "pending", "processing", NEEDS_RECONCILE_STATUS]
+
+# Gateway states that mean the customer will not complete this payment
+BKASH_FAILED = {"Cancelled", "Failed", "Expired", "Declined"}
+NAGAD_FAILED = {"Aborted", "Cancelled", "Failed", "Expired"}
+UPAY_FAILED = {"FAILED", "CANCELLED", "EXPIRED"}
+
+Outcome = Optional[Tuple[str, Optional[str]]]
+
+
+async def verify_with_gateway(doc: dict) -> Outcome:
+    """Ask the payment's gateway for its state.
+
+    Returns ("completed", transaction_id), ("failed", None), or None when the
+    payment is still open on the gateway side.
+    """
+    method = doc.get("payment_method")
+
+    if method == "bkash" and doc.get("gateway_payment_id"):
+        result = await bkash_gateway.query_payment(doc["gateway_payment_id"])
+        status = result.get("transactionStatus")
+        if status == "Completed":
+            return "completed", result.get("trxID")
+        if status in BKASH_FAILED:
+            return "failed", None
+        return None
+
+    if method == "nagad" and doc.get("gateway_payment_ref"):
+        result = await nagad_gateway.verify_payment(doc["gateway_payment_ref"])
+        status = result.get("status")
+        if status == "Success":
+            return "completed", result.get("issuerPaymentRefNo")
+        if status in NAGAD_FAILED:
+            return "failed", None
+        return None
+
+    if method == "upay" and doc.get("gateway_transaction_id"):
+        result = await upay_gateway.verify_payment(doc["gateway_transaction_id"])
+        status = result.get("status")
+        if status == "SUCCESS":
+            return "completed", result.get("transaction_id")
+        if status in UPAY_FAILED:
+            return "failed", None
+        return None
+
+    # Never got as far as the gateway
+    if doc["created_at"] < datetime.utcnow() - timedelta(hours=RECONCILE_ABANDON_HOURS):
+        return "failed", None
+    return None
+
+
+class PaymentReconciler:
+    """One reconciliation pass over unresolved payments"""
+
+    def __init__(self, concurrency: int = RECONCILE_CONCURRENCY, batch_size: int = RECONCILE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._semaphores: Dict[str, asyncio.Semaphore] = {
+            gateway: asyncio.Semaphore(concurrency) for gateway in ("bkash", "nagad", "upay")
+        }
+        self._default_semaphore = asyncio.Semaphore(concurrency)
+        self.report = {
+            "scanned": 0, "completed": 0, "failed": 0, "still_pending": 0, "already_final": 0, "errors": 0
+        }
+
+    async def _verify(self, doc: dict) -> Outcome:
+        semaphore = self._semaphores.get(doc.get("payment_method"), self._default_semaphore)
+        async with semaphore:
+            try:
+                return await verify_with_gateway(doc)
+            except (httpx.HTTPError, ValueError, HTTPException) as e:
+                self.report["errors"] += 1
+                logger.warning("Could not verify payment: %s", e, extra={"payment_id": doc["payment_id"]})
+                return None
+
+    async def _apply(self, batch: list, outcomes: list):
+        db = get_database()
+        now = datetime.utcnow()
+        # Tags the payments this call moves, so only those get their side effects
+        marker = ObjectId()
+        payment_ops = []
+        resolved = {}
+
+        for doc, outcome in zip(batch, outcomes):
+            if outcome is None:
+                self.report["still_pending"] += 1
+                continue
+
+            state, transaction_id = outcome
+            update = {"status": state, "reconciled_at": now, "reconcile_marker": marker, "updated_at": now}
+            if state == "completed":
+                update["transaction_id"] = transaction_id
+                update["completed_at"] = now
+            else:
+                update["failed_at"] = now
+            resolved[doc["payment_id"]] = (doc, state)
+
+            # Same guard as apply_payment_result: never leave a final state
+            payment_ops.append(UpdateOne(
+                {"payment_id": doc["payment_id"], "status": {"$nin": FINAL_PAYMENT_STATUSES}},
+                {"$set": update}
+            ))
+
+        if not payment_ops:
+            return
+        await db.payments.bulk_write(payment_ops, ordered=False)
+
+        # A callback may have finalized some of them since they were read; those
+        # updates matched nothing and their orders and stock are already settled
+        moved = []
+        async for row in db.payments.find(
+            {"payment_id": {"$in": list(resolved)}, "reconcile_marker": marker}, {"payment_id": 1}
+        ):
+            moved.append(resolved[row["payment_id"]])
+        self.report["already_final"] += len(resolved) - len(moved)
+
+        order_ops = [
+            UpdateOne({"order_id": doc["order_id"]}, {"$set": {"payment_status": "paid", "updated_at": now}})
+            for doc, state in moved if state == "completed"
+        ]
+        if order_ops:
+            await db.orders.bulk_write(order_ops, ordered=False)
+
+        for doc, state in moved:
+            self.report[state] += 1
+            if state == "completed":
+                await take_paid_order_stock(db, doc)
+            else:
+                await stock_holds.release_hold(db, doc["order_id"], "payment_failed")
+            notify_payment_status(doc["payment_id"], state)
+
+    async def run(self, limit: Optional[int] = None) -> dict:
+        started = time.perf_counter()
+        cutoff = datetime.utcnow() - timedelta(seconds=RECONCILE_MIN_AGE_SECONDS)
+
+        # Oldest first, streamed in batches rather than loaded at once
+        cursor = get_database().payments.find(
+            {"status": {"$in": UNRESOLVED_STATUSES}, "created_at": {"$lte": cutoff}},
+            {
+                "payment_id": 1, "order_id": 1, "payment_method": 1, "created_at": 1,
+                "gateway_payment_id": 1, "gateway_payment_ref": 1, "gateway_transaction_id": 1
+            },
+            batch_size=self.batch_size
+        ).sort("created_at", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                await self._process(batch)
+                batch = []
+        if batch:
+            await self._process(batch)
+
+        seconds = time.perf_counter() - started
+        self.report["seconds"] = round(seconds, 3)
+        self.report["per_second"] = round(self.report["scanned"] / seconds, 1) if seconds else 0
+        return self.report
+
+    async def _process(self, batch: list):
+        self.report["scanned"] += len(batch)
+        outcomes = await asyncio.gather(*(self._verify(doc) for doc in batch))
+        await self._apply(batch, outcomes)
+
+
+async def _acquire_lock(holder: str, seconds: int) -> bool:
+    """Lease so that only one app process reconciles at a time"""
+    now = datetime.utcnow()
+    try:
+        await get_database()[LOCKS_COLLECTION].find_one_and_update(
+            {"_id": LOCK_ID, "locked_until": {"$lt": now}},
+            {"$set": {"holder": holder, "locked_until": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Lock document exists and is still held by someone else
+        return False
+
+
+async def reconcile_pending_payments(limit: Optional[int] = None) -> dict:
+    """Run one reconciliation pass and record its report"""
+    report = await PaymentReconciler().run(limit)
+    await get_database()[RUNS_COLLECTION].insert_one({**report, "finished_at": datetime.utcnow()})
+    logger.info("Payment reconciliation finished", extra=report)
+    return report
+
+
+async def reconcile_periodically(interval_seconds: int = RECONCILE_INTERVAL_SECONDS):
+    holder = f"{os.uname().nodename}:{os.getpid()}"
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            if await _acquire_lock(holder, interval_seconds):
+                await reconcile_pending_payments()
+        except Exception:
+            logger.exception("Error reconciling payments")
+
+
+_reconcile_task = None
+
+
+async def start_reconciliation():
+    global _reconcile_task
+    _reconcile_task = asyncio.create_task(reconcile_periodically())
+
+
+async def stop_reconciliation():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        _reconcile_task = None
+
+
+router.add_event_handler("startup", start_reconciliation)
+router.add_event_handler("shutdown", stop_reconciliation)
+
+
+async def last_reconciliation() -> dict:
+    """Report from the most recent reconciliation pass, served at /api/admin/payment/reconcile/last"""
+    run = await get_database()[RUNS_COLLECTION].find_one(sort=[("finished_at", -1)])
+    if not run:
+        return {"run": None}
+    run["_id"] = str(run["_id"])
+    return {"run": run}
+
+
+if __name__ == "__main__":
+    # The app's MongoDB URL and database; importing main also configures logging
+    from main import DATABASE_NAME, MONGODB_URL
+
+    async def _main():
+        await database.connect(MONGODB_URL, DATABASE_NAME)
+        try:
+            await reconcile_pending_payments()
+        finally:
+            await shutdown_payments()
+            await database.close()
+
+    asyncio.run(_main())
@@ -4,19 +4,18 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import hashlib
 import hmac
-import requests
+import httpx
 import json
 from datetime import datetime
 import redis
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import logging
 
-router = APIRouter()
+from app.core.metrics import InstrumentedTransport
+from app.db.database import get_database
 
-# MongoDB Connection
-MONGODB_URL = os.getenv("MONGODB_URL")
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client.ecommerce
+router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Redis Connection for caching
 redis_client = redis.Redis(
@@ -35,6 +34,26 @@ FB_API_VERSION = "v18.0"
 GA_MEASUREMENT_ID = os.getenv("GA_MEASUREMENT_ID")
 GA_API_SECRET = os.getenv("GA_API_SECRET")
 
+# Shared async clients; the old blocking requests calls stalled the event loop
+_tracking_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_tracking_client(service: str) -> httpx.AsyncClient:
+    client = _tracking_clients.get(service)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(transport=InstrumentedTransport(service), timeout=10.0)
+        _tracking_clients[service] = client
+    return client
+
+
+async def close_tracking_clients():
+    for client in _tracking_clients.values():
+        await client.aclose()
+    _tracking_clients.clear()
+
+
+router.add_event_handler("shutdown", close_tracking_clients)
+
 
 # Pydantic Models
 class FacebookEventData(BaseModel):
@@ -80,6 +99,7 @@ def generate_event_id() -> str:
 @router.post("/api/tracking/facebook")
 async def facebook_capi(request: Request, event_data: FacebookEventData):
     """Send events to Facebook Conversions API"""
+    db = get_database()
     try:
         # Get IP address from request
         client_ip = request.client.host
@@ -106,7 +126,7 @@ async def facebook_capi(request: Request, event_data: FacebookEventData):
         url = f"https://graph.facebook.com/{FB_API_VERSION}/{FB_PIXEL_ID}/events"
         params = {"access_token": FB_ACCESS_TOKEN}
 
-        response = requests.post(url, json=payload, params=params)
+        response = await get_tracking_client("facebook").post(url, json=payload, params=params)
         response_data = response.json()
 
         # Log event in MongoDB for analytics
@@ -125,6 +145,7 @@ async def facebook_capi(request: Request, event_data: FacebookEventData):
         }
 
     except Exception as e:
+        logger.exception("Tracking request failed", extra={"endpoint": "facebook_capi"})
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -132,6 +153,7 @@ async def facebook_capi(request: Request, event_data: FacebookEventData):
 @router.post("/api/tracking/google")
 async def google_mp(event_data: GoogleEventData):
     """Send events to Google Analytics 4 Measurement Protocol"""
+    db = get_database()
     try:
         # Prepare payload for GA4
         payload = {
@@ -153,7 +175,7 @@ async def google_mp(event_data: GoogleEventData):
             "api_secret": GA_API_SECRET
         }
 
-        response = requests.post(url, json=payload, params=params)
+        response = await get_tracking_client("google").post(url, json=payload, params=params)
 
         # Log event in MongoDB
         await db.tracking_events.insert_one({
@@ -170,6 +192,7 @@ async def google_mp(event_data: GoogleEventData):
         }
 
     except Exception as e:
+        logger.exception("Tracking request failed", extra={"endpoint": "google_mp"})
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -177,6 +200,7 @@ async def google_mp(event_data: GoogleEventData):
 @router.post("/api/orders")
 async def create_order(request: Request, order_data: OrderCreate):
     """Create new order with tracking"""
+    db = get_database()
     try:
         # Get user from token (assuming you have auth middleware)
         user_id = request.state.user_id if hasattr(request.state, 'user_id') else None
@@ -227,6 +251,7 @@ async def create_order(request: Request, order_data: OrderCreate):
         }
 
     except Exception as e:
+        logger.exception("Tracking request failed", extra={"endpoint": "create_order"})
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -287,6 +312,7 @@ async def trigger_purchase_tracking(request: Request, order: dict):
 @router.get("/api/orders/{order_id}")
 async def get_order(order_id: str):
     """Get order details"""
+    db = get_database()
     try:
         # Try to get from cache first
         cached_order = redis_client.get(f"order:{order_id}")
@@ -310,6 +336,7 @@ async def get_order(order_id: str):
         return order
 
     except Exception as e:
+        logger.exception("Tracking request failed", extra={"endpoint": "get_order"})
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -321,6 +348,7 @@ async def update_order_status(
         payment_status: Optional[str] = None
 ):
     """Update order status (Admin only)"""
+    db = get_database()
     try:
         update_data = {
             "order_status": status,
@@ -344,6 +372,7 @@ async def update_order_status(
         return {"success": True, "message": "Order status updated"}
 
     except Exception as e:
+        logger.exception("Tracking request failed", extra={"endpoint": "update_order_status"})
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -351,6 +380,7 @@ async def update_order_status(
 @router.get("/api/analytics/overview")
 async def get_analytics_overview(date_from: str, date_to: str):
     """Get analytics overview for dashboard"""
+    db = get_database()
     try:
         from_date = datetime.strptime(date_from, "%Y-%m-%d")
         to_date = datetime.strptime(date_to, "%Y-%m-%d")
@@ -386,4 +416,5 @@ async def get_analytics_overview(date_from: str, date_to: str):
         return result[0]
 
     except Exception as e:
+        logger.exception("Tracking request failed", extra={"endpoint": "get_analytics_overview"})
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
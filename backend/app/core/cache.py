@@ -0,0 +1,274 @@
+# backend/app/core/cache.py
+"""Response cache for public read endpoints.
+
+    @app.get("/api/brands")
+    @cached("brands", ttl=300, stale_ttl=900)
+    async def get_brands(is_active: Optional[bool] = None):
+        ...
+
+Results are cached under the namespace, the endpoint's name and its
+arguments (its query parameters). An entry is fresh for ttl seconds and may then be
+served stale for stale_ttl more while one background task reloads it,
+so a hot key never falls through to the database for everyone at once.
+Concurrent misses on the same key share a single load (single-flight).
+
+Writes call invalidate("brands", ...) to drop a namespace. With the Redis
+backend that drops it for every worker; a load already in flight in
+another worker can still store its result, which then lives until its ttl.
+
+CACHE_BACKEND selects "memory" (default, per process) or "redis"
+(shared, using REDIS_HOST / REDIS_PORT / REDIS_PASSWORD). Any backend
+error is logged and the endpoint runs uncached.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+# Set CACHE_DISABLED=true to bypass the cache, e.g. when load testing the database
+CACHE_DISABLED = os.getenv("CACHE_DISABLED", "false").lower() == "true"
+
+RESULTS = ("hit", "stale", "miss", "coalesced", "error")
+
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "Cache lookups by namespace and result", ("namespace", "result")))
+
+
+class MemoryBackend:
+    """LRU dict of key -> (value, fresh_until, expires_at)"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fresh_until, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, fresh_until
+
+    async def set(self, namespace: str, key: str, value, fresh_until: float, expires_at: float):
+        self._entries[key] = (value, fresh_until, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete_namespace(self, namespace: str):
+        prefix = f"{namespace}:"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Entries shared by all workers; each namespace keeps a set of its keys"""
+
+    PREFIX = "cache:"
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis.asyncio as aioredis
+            client = aioredis.Redis(
+                host=os.getenv("REDIS_HOST"),
+                port=int(os.getenv("REDIS_PORT", 6379)),
+                password=os.getenv("REDIS_PASSWORD"),
+                decode_responses=True
+            )
+        self.redis = client
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        raw = await self.redis.get(self.PREFIX + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["value"], entry["fresh_until"]
+
+    async def set(self, namespace: str, key: str, value, fresh_until: float, expires_at: float):
+        ttl = max(int(expires_at - time.time()), 1)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self.PREFIX + key, json.dumps({"value": value, "fresh_until": fresh_until}), ex=ttl)
+            pipe.sadd(f"{self.PREFIX}keys:{namespace}", key)
+            await pipe.execute()
+
+    async def delete_namespace(self, namespace: str):
+        members_key = f"{self.PREFIX}keys:{namespace}"
+        keys = await self.redis.smembers(members_key)
+        await self.redis.delete(members_key, *(self.PREFIX + key for key in keys))
+
+    async def close(self):
+        await self.redis.close()
+
+
+class Cache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Bumped by invalidate(), so loads that started before it are not stored
+        self._generations: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, result: str):
+        stats = self._stats.setdefault(namespace, dict.fromkeys(RESULTS, 0))
+        stats[result] += 1
+        cache_requests.inc(namespace, result)
+
+    async def get_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]],
+                          ttl: float, stale_ttl: float = 0):
+        """Cached value for key, loading it with loader() on a miss"""
+        full_key = f"{namespace}:{key}"
+        try:
+            entry = await self.backend.get(full_key)
+        except Exception as e:
+            logger.warning("Cache read failed for %s: %s", full_key, e)
+            self._count(namespace, "error")
+            return jsonable_encoder(await loader())
+
+        if entry is not None:
+            value, fresh_until = entry
+            if time.time() < fresh_until:
+                self._count(namespace, "hit")
+                return value
+            self._count(namespace, "stale")
+            if full_key not in self._inflight:
+                self._start_load(namespace, full_key, loader, ttl, stale_ttl).add_done_callback(
+                    functools.partial(self._log_refresh_error, full_key)
+                )
+            return value
+
+        task = self._inflight.get(full_key)
+        if task is not None:
+            self._count(namespace, "coalesced")
+        else:
+            self._count(namespace, "miss")
+            task = self._start_load(namespace, full_key, loader, ttl, stale_ttl)
+        # A caller that disconnects must not cancel the load others are waiting on
+        return await asyncio.shield(task)
+
+    def _start_load(self, namespace: str, full_key: str, loader, ttl: float, stale_ttl: float) -> asyncio.Task:
+        task = asyncio.create_task(self._load(namespace, full_key, loader, ttl, stale_ttl))
+        self._inflight[full_key] = task
+
+        def done(finished: asyncio.Task):
+            if self._inflight.get(full_key) is finished:
+                del self._inflight[full_key]
+
+        task.add_done_callback(done)
+        return task
+
+    @staticmethod
+    def _log_refresh_error(full_key: str, task: asyncio.Task):
+        # Nobody awaits a background refresh; the stale value keeps being served
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Cache refresh failed for %s: %s", full_key, task.exception())
+
+    async def _load(self, namespace: str, full_key: str, loader, ttl: float, stale_ttl: float):
+        generation = self._generations.get(namespace, 0)
+        value = jsonable_encoder(await loader())
+        if self._generations.get(namespace, 0) == generation:
+            now = time.time()
+            try:
+                await self.backend.set(namespace, full_key, value, now + ttl, now + ttl + stale_ttl)
+            except Exception as e:
+                logger.warning("Cache write failed for %s: %s", full_key, e)
+        return value
+
+    async def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            prefix = f"{namespace}:"
+            for key in [key for key in self._inflight if key.startswith(prefix)]:
+                del self._inflight[key]
+            try:
+                await self.backend.delete_namespace(namespace)
+            except Exception as e:
+                logger.warning("Cache invalidation failed for %s: %s", namespace, e)
+
+    def stats(self) -> dict:
+        report = {}
+        for namespace, counts in self._stats.items():
+            lookups = sum(counts[result] for result in ("hit", "stale", "miss", "coalesced"))
+            served = counts["hit"] + counts["stale"] + counts["coalesced"]
+            report[namespace] = {**counts, "hit_ratio": round(served / lookups, 4) if lookups else None}
+        return {"backend": type(self.backend).__name__, "namespaces": report}
+
+    async def close(self):
+        await self.backend.close()
+
+
+def _create_cache() -> Cache:
+    if CACHE_BACKEND == "redis":
+        return Cache(RedisBackend())
+    if CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}")
+    return Cache(MemoryBackend())
+
+
+cache = _create_cache()
+
+
+def _hit_ratio_exposition() -> list:
+    lines = ["# TYPE cache_hit_ratio gauge"]
+    for namespace, row in cache.stats()["namespaces"].items():
+        if row["hit_ratio"] is not None:
+            lines.append(f'cache_hit_ratio{{namespace="{namespace}"}} {row["hit_ratio"]}')
+    return lines
+
+
+registry.add_collector(_hit_ratio_exposition)
+
+
+def default_key(kwargs: dict) -> str:
+    """Stable key from the endpoint's arguments"""
+    raw = json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def cached(namespace: str, ttl: float, stale_ttl: float = 0, key: Optional[Callable[..., str]] = None):
+    """Cache an async endpoint's result; key(**kwargs) overrides the default key"""
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if CACHE_DISABLED:
+                return await func(*args, **kwargs)
+            # Keyed on every argument, defaults included, so direct calls such as
+            # get_products(is_featured=True) share the entry of the HTTP request
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = key(**bound.arguments) if key else default_key(bound.arguments)
+            # Endpoints sharing a namespace must not share entries for equal arguments
+            cache_key = f"{func.__qualname__}:{cache_key}"
+            return await cache.get_or_load(
+                namespace, cache_key, lambda: func(*args, **kwargs), ttl, stale_ttl
+            )
+        return wrapper
+    return decorate
+
+
+async def invalidate(*namespaces: str):
+    await cache.invalidate(*namespaces)
@@ -0,0 +1,122 @@
+# backend/app/core/events.py
+import asyncio
+import itertools
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from fastapi import Request
+
+# Channel the admin dashboard subscribes to
+ADMIN_CHANNEL = "admin"
+
+HEARTBEAT_SECONDS = 15
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Encode a single Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=_json_default)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventBus:
+    """In-process pub/sub that fans write-path events out to live subscribers.
+
+    Each published event is serialized once and the same encoded message is
+    handed to every subscriber queue, so N open dashboards cost one fan-out
+    and no per-client database work.
+
+    Forwarders see every published event as well, so it can be passed on to
+    the other worker processes (app/db/event_relay.py), which hand it to
+    their own subscribers with publish_local().
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._ids = itertools.count(1)
+        self._forwarders: List[Callable[[str, str, dict], None]] = []
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        """Register a new subscriber queue on a channel"""
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        """Remove a subscriber queue from a channel"""
+        subscribers = self._subscribers.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    def add_forwarder(self, forwarder: Callable[[str, str, dict], None]):
+        """Register a non-blocking callable that receives every published event"""
+        self._forwarders.append(forwarder)
+
+    def remove_forwarder(self, forwarder: Callable[[str, str, dict], None]):
+        if forwarder in self._forwarders:
+            self._forwarders.remove(forwarder)
+
+    def publish(self, channel: str, event: str, data: dict) -> int:
+        """Publish an event to every subscriber of a channel, in every worker"""
+        for forwarder in self._forwarders:
+            forwarder(channel, event, data)
+        return self.publish_local(channel, event, data)
+
+    def publish_local(self, channel: str, event: str, data: dict) -> int:
+        """Publish an event to this process's subscribers of a channel.
+
+        Never blocks the caller: a subscriber that has fallen behind loses its
+        oldest pending message instead of stalling the write path.
+        """
+        subscribers = self._subscribers.get(channel)
+        if not subscribers:
+            return 0
+
+        message = format_sse(event, data, next(self._ids))
+        for queue in subscribers:
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+        return len(subscribers)
+
+    async def stream(self, channel: str, request: Request) -> AsyncIterator[str]:
+        """Yield encoded SSE messages for a channel until the client disconnects"""
+        queue = self.subscribe(channel)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield message
+        finally:
+            self.unsubscribe(channel, queue)
+
+
+event_bus = EventBus()
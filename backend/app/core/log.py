@@ -0,0 +1,202 @@
+# backend/app/core/log.py
+"""Structured JSON logging that never blocks the event loop.
+
+Log calls only build the record and put it on a bounded queue; a
+background thread formats it as one JSON line and writes it out. If the
+queue is full the record is dropped and counted rather than waited on.
+
+- Request correlation: RequestIdMiddleware takes X-Request-ID (or makes
+  one), echoes it on the response and every record logged while serving
+  the request carries it as "request_id"
+- Levels: LOG_LEVEL for everything, LOG_LEVELS for single modules, e.g.
+  LOG_LEVELS="api.payment=DEBUG,main=WARNING"
+- Sampling: only LOG_DEBUG_SAMPLE (0..1) of DEBUG records are kept, so
+  per-request debug lines can stay on in production
+
+Modules log through the standard library:
+
+    logger = logging.getLogger(__name__)
+    logger.info("Order created", extra={"order_id": order_id})
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import traceback
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.core.metrics import Counter, registry
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", 0.01))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# httpx logs every outbound call at INFO; those are counted in app.core.metrics
+DEFAULT_LEVELS = "httpx=WARNING,httpcore=WARNING"
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+log_records_dropped = registry.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full", ("level",)))
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """"api.payment=DEBUG,main=WARNING" -> {"api.payment": 10, "main": 30}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not name.strip() or not isinstance(value, int):
+            raise ValueError(f"Invalid log level setting: {item!r}")
+        levels[name.strip()] = value
+    return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; runs on the listener thread"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key != "request_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the current request ID and thin out DEBUG records"""
+
+    def __init__(self, debug_sample: float = LOG_DEBUG_SAMPLE):
+        super().__init__()
+        self.debug_sample = debug_sample
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.INFO and random.random() >= self.debug_sample:
+            return False
+        record.request_id = request_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the message and traceback in the caller;
+    here only the %-args are merged so the record no longer refers to
+    objects the caller may change afterwards.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc(record.levelname)
+
+
+def configure_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, debug_sample: float = LOG_DEBUG_SAMPLE,
+                      stream=None) -> logging.handlers.QueueListener:
+    """Route the root logger through the queue; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter(debug_sample))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+    for name, module_level in {**parse_levels(DEFAULT_LEVELS), **parse_levels(levels)}.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Write out everything still queued and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """A forked worker (gunicorn --preload) inherits the queue but not the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=False)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class RequestIdMiddleware:
+    """Give every HTTP request an ID for log correlation (pure ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER.encode())
+        current = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex
+        token = request_id.set(current)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode(), current.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,282 @@
+# backend/app/core/metrics.py
+"""Process metrics in the Prometheus text format.
+
+- MetricsMiddleware: per-route request counts, latency histogram and
+  in-flight gauge, plus the MongoDB work done while serving each request
+- MongoCommandMetrics: pymongo CommandListener timing every command and
+  attributing it to the current request through a context variable
+- InstrumentedTransport: httpx transport wrapper timing outbound calls
+
+Everything is kept in memory and rendered on demand by render_metrics().
+Recording is a dict lookup, a bisect and a few increments under a lock.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(row)) for labels, row in self._values.items()]
+        lines = self.header()
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {row[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {row[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {row[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Register a function returning extra exposition lines at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                logger.exception("Metrics collector failed")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being served"))
+http_db_commands = registry.register(Histogram(
+    "http_request_db_commands", "MongoDB commands per HTTP request", ("route",), COUNT_BUCKETS))
+http_db_seconds = registry.register(Histogram(
+    "http_request_db_seconds", "MongoDB time per HTTP request", ("route",)))
+
+mongo_commands = registry.register(Counter(
+    "mongo_commands_total", "MongoDB commands by name and outcome", ("command", "outcome")))
+mongo_latency = registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command",)))
+
+outbound_requests = registry.register(Counter(
+    "outbound_http_requests_total", "Outbound HTTP calls", ("service", "method", "status")))
+outbound_latency = registry.register(Histogram(
+    "outbound_http_request_duration_seconds", "Outbound HTTP call latency", ("service",)))
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+class RequestStats:
+    """MongoDB work done on behalf of one request"""
+
+    __slots__ = ("scope", "db_commands", "db_seconds")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.db_commands = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Path template of the matched route, once routing has happened"""
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None) or "unmatched"
+
+
+# Motor copies the caller's context into its executor threads, so listener
+# callbacks see the stats object of the request that issued the command
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "current_request", default=None)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def _record(self, event, outcome: str):
+        seconds = event.duration_micros / 1_000_000
+        mongo_commands.inc(event.command_name, outcome)
+        mongo_latency.observe(seconds, event.command_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_commands += 1
+            stats.db_seconds += seconds
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics.
+
+    Routes are labelled with their path template (/api/orders/{order_id}),
+    never the raw path, so label cardinality stays bounded. A Server-Timing
+    header reports the request's MongoDB time to the browser dev tools.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    ('db;dur=%.1f;desc="%d commands"' % (stats.db_seconds * 1000, stats.db_commands)).encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_in_flight.dec()
+            current_request.reset(token)
+
+            route = stats.route
+            method = scope["method"]
+            http_requests.inc(method, route, str(status_code))
+            http_latency.observe(time.perf_counter() - started, method, route)
+            http_db_commands.observe(stats.db_commands, route)
+            http_db_seconds.observe(stats.db_seconds, route)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Wrap an httpx transport and time every request through it"""
+
+    def __init__(self, service: str, transport: Optional[httpx.AsyncBaseTransport] = None, **transport_options):
+        self.service = service
+        self.transport = transport or httpx.AsyncHTTPTransport(**transport_options)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            outbound_requests.inc(self.service, request.method, status)
+            outbound_latency.observe(time.perf_counter() - started, self.service)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,661 @@
+# backend/app/db/catalog.py
+"""Product catalog shared by the workers through a memory-mapped snapshot.
+
+The active products, with the indexes built from them (a trigram index for
+search and the brand counts), are written to one snapshot file. Every
+worker memory-maps it read-only, so all workers on a host share one copy
+in the page cache: adding workers adds no catalog memory. A worker only
+decodes the products it returns.
+
+    CatalogIndex   read-only view of a snapshot (bytes or a mapped file)
+    Catalog        a worker's CatalogIndex plus the products changed since
+                   the snapshot was built (its overlay)
+
+- load(): map the snapshot and catch up with the products updated after
+  its watermark, the newest updated_at it has seen, dropping deleted or
+  hidden ones. The first worker to start without a usable snapshot builds
+  it from MongoDB under a file lock while the others wait for it.
+- apply_changes(): the change feed subscriber; refreshes the changed
+  products, or catches up when it only knows the collection changed
+- sync_periodically(): background job. One worker at a time publishes a
+  rebuilt snapshot when its overlay has changes; os.replace() swaps the
+  file atomically and every worker maps the new one, keeping only the
+  overlay entries the new snapshot doesn't already have. The old file
+  stays readable until the last worker drops its mapping.
+
+Stock moves with every order without touching updated_at, so callers read
+live stock from MongoDB for the products they return.
+
+The snapshot records a hash of the database it was built from (load()'s
+source), and a snapshot from another database is never mapped. By default
+it lives in the temp directory under a name that includes that hash, so
+instances on one host pointing at different databases (a dev server next
+to staging) keep separate files; CATALOG_SNAPSHOT_PATH overrides it.
+"""
+import asyncio
+import fcntl
+import functools
+import gc
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import msgpack
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+# How often workers look for a newer snapshot, and publish their own changes
+CATALOG_CHECK_SECONDS = int(os.getenv("CATALOG_CHECK_SECONDS", 10))
+CATALOG_SNAPSHOT_SECONDS = int(os.getenv("CATALOG_SNAPSHOT_SECONDS", 300))
+# Publish straight after load() when catching up changed more products than this
+CATALOG_REBUILD_CHANGES = int(os.getenv("CATALOG_REBUILD_CHANGES", 500))
+
+# Bump when the snapshot layout changes; older snapshots are rebuilt
+SNAPSHOT_FORMAT = 2
+MAGIC = b"TCATALOG"
+HEADER = struct.Struct("<II")  # format, length of the msgpack meta block
+
+SEARCH_FIELDS = ("name", "brand", "description", "category")
+# Separates the fields of a product's search text; never part of a search term
+FIELD_SEPARATOR = "\x00"
+OBJECT_ID_SIZE = 12
+GRAM_SIZE = 12  # three characters of UTF-8, NUL padded
+# Postings this many times longer than the shortest are left to the text check
+INTERSECT_RATIO = 8
+GRAM_CACHE_SIZE = 4096
+
+_EXT_OBJECT_ID = 1
+_EXT_DATETIME = 2
+_EPOCH = datetime(1970, 1, 1)
+
+
+def product_matches(product: dict, search_term: str) -> bool:
+    """Whether a lower-cased search term appears in a product's name, brand, description or category"""
+    return any(
+        search_term in (product.get(field) or "").lower()
+        for field in SEARCH_FIELDS
+    )
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# -------------------- Snapshot encoding --------------------
+
+def _pack_default(value):
+    if isinstance(value, ObjectId):
+        return msgpack.ExtType(_EXT_OBJECT_ID, value.binary)
+    if isinstance(value, datetime):
+        micros = (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+        return msgpack.ExtType(_EXT_DATETIME, struct.pack(">q", micros))
+    raise TypeError(f"Cannot snapshot {type(value).__name__}")
+
+
+def _unpack_ext(code: int, data: bytes):
+    if code == _EXT_OBJECT_ID:
+        return ObjectId(data)
+    if code == _EXT_DATETIME:
+        return _EPOCH + timedelta(microseconds=struct.unpack(">q", data)[0])
+    return msgpack.ExtType(code, data)
+
+
+def _pack(value) -> bytes:
+    return msgpack.packb(value, default=_pack_default, use_bin_type=True)
+
+
+def _unpack(data):
+    return msgpack.unpackb(data, ext_hook=_unpack_ext, raw=False)
+
+
+def _gram_key(gram: str) -> bytes:
+    return gram.encode().ljust(GRAM_SIZE, b"\0")
+
+
+def source_id(source: str) -> str:
+    """Short hash naming the database a snapshot is built from; URLs carry passwords"""
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def default_snapshot_path(source: str) -> str:
+    return CATALOG_SNAPSHOT_PATH or os.path.join(tempfile.gettempdir(), f"timora-catalog-{source}.snapshot")
+
+
+def build_index(products: Iterable[dict], source: Optional[str] = None) -> bytes:
+    """Snapshot bytes for the active products; slots are positions in _id order.
+
+    Layout: MAGIC, HEADER, msgpack meta (source, watermark, brand counts,
+    section offsets), then 8-byte aligned sections:
+
+        ids        12-byte ObjectIds by slot, for lookups by ID
+        records    msgpack product documents, record_offsets by slot
+        texts      lower-cased search fields, text_offsets by slot
+        grams      sorted NUL-padded trigrams, gram_offsets into postings
+        postings   uint32 slots per trigram, ascending
+    """
+    products = sorted((product for product in products if product.get("is_active")),
+                      key=lambda product: product["_id"])
+    watermark = None
+    brand_counts: Dict[str, int] = {}
+    ids = bytearray()
+    records, record_offsets = bytearray(), array("Q", [0])
+    texts, text_offsets = bytearray(), array("Q", [0])
+    postings_by_gram: Dict[bytes, List[int]] = {}
+
+    for slot, product in enumerate(products):
+        ids += product["_id"].binary
+        records += _pack(product)
+        record_offsets.append(len(records))
+        fields = [(product.get(field) or "").lower() for field in SEARCH_FIELDS]
+        texts += FIELD_SEPARATOR.join(fields).encode()
+        text_offsets.append(len(texts))
+        for gram in set().union(*map(trigrams, fields)):
+            postings_by_gram.setdefault(_gram_key(gram), []).append(slot)
+        if product.get("brand"):
+            brand_counts[product["brand"]] = brand_counts.get(product["brand"], 0) + 1
+        updated_at = product.get("updated_at")
+        if updated_at and (watermark is None or updated_at > watermark):
+            watermark = updated_at
+
+    grams = sorted(postings_by_gram)
+    postings, gram_offsets = array("I"), array("Q", [0])
+    for gram in grams:
+        postings.extend(postings_by_gram[gram])
+        gram_offsets.append(len(postings))
+
+    sections = {
+        "ids": bytes(ids),
+        "records": bytes(records),
+        "record_offsets": record_offsets.tobytes(),
+        "texts": bytes(texts),
+        "text_offsets": text_offsets.tobytes(),
+        "grams": b"".join(grams),
+        "gram_offsets": gram_offsets.tobytes(),
+        "postings": postings.tobytes()
+    }
+    layout, position = {}, 0
+    for name, data in sections.items():
+        layout[name] = (position, len(data))
+        position += len(data) + (-len(data) % 8)
+
+    meta = _pack({
+        "byteorder": sys.byteorder,
+        "source": source,
+        "built_at": datetime.utcnow(),
+        "watermark": watermark,
+        "count": len(products),
+        "gram_count": len(grams),
+        "brand_counts": brand_counts,
+        "sections": layout
+    })
+    out = bytearray(MAGIC + HEADER.pack(SNAPSHOT_FORMAT, len(meta)) + meta)
+    out += b"\0" * (-len(out) % 8)
+    for data in sections.values():
+        out += data + b"\0" * (-len(data) % 8)
+    return bytes(out)
+
+
+class CatalogIndex:
+    """Read-only snapshot written by build_index(), over bytes or a mapped file"""
+
+    def __init__(self, buffer, identity=None):
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a catalog snapshot")
+        snapshot_format, meta_length = HEADER.unpack_from(buffer, len(MAGIC))
+        if snapshot_format != SNAPSHOT_FORMAT:
+            raise ValueError(f"Catalog snapshot format {snapshot_format}, expected {SNAPSHOT_FORMAT}")
+        meta_start = len(MAGIC) + HEADER.size
+        meta = _unpack(buffer[meta_start:meta_start + meta_length])
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError("Catalog snapshot written with the other byte order")
+
+        # Identifies the mapped file, to notice when a newer one replaces it
+        self.identity = identity
+        self.source: Optional[str] = meta.get("source")
+        self.count: int = meta["count"]
+        self.watermark: Optional[datetime] = meta["watermark"]
+        self.built_at: datetime = meta["built_at"]
+        self.brand_counts: Dict[str, int] = meta["brand_counts"]
+        self._gram_count: int = meta["gram_count"]
+
+        # Views into the buffer: nothing below is copied per worker
+        self._buffer = buffer
+        view = memoryview(buffer)
+        data_start = meta_start + meta_length
+        data_start += -data_start % 8
+
+        def section(name: str):
+            offset, length = meta["sections"][name]
+            start = data_start + offset
+            return start, view[start:start + length]
+
+        _, self._ids = section("ids")
+        _, self._records = section("records")
+        self._record_offsets = section("record_offsets")[1].cast("Q")
+        self._texts_start, _ = section("texts")
+        self._text_offsets = section("text_offsets")[1].cast("Q")
+        _, self._grams = section("grams")
+        self._gram_offsets = section("gram_offsets")[1].cast("Q")
+        self._postings = section("postings")[1].cast("I")
+        # Searches typed a letter at a time look up the same trigrams over and over
+        self._gram_positions = functools.lru_cache(maxsize=GRAM_CACHE_SIZE)(self._find_gram)
+
+    @classmethod
+    def from_products(cls, products: Iterable[dict]) -> "CatalogIndex":
+        return cls(build_index(products))
+
+    def id_at(self, slot: int) -> bytes:
+        return bytes(self._ids[slot * OBJECT_ID_SIZE:(slot + 1) * OBJECT_ID_SIZE])
+
+    def ids(self) -> Iterator[str]:
+        for slot in range(self.count):
+            yield self.id_at(slot).hex()
+
+    def slot(self, product_id: str) -> Optional[int]:
+        """Slot of a product, by binary search over the sorted IDs"""
+        try:
+            key = bytes.fromhex(product_id)
+        except ValueError:
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.id_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self.id_at(low) == key else None
+
+    def product_at(self, slot: int) -> dict:
+        return _unpack(self._records[self._record_offsets[slot]:self._record_offsets[slot + 1]])
+
+    def get(self, product_id: str) -> Optional[dict]:
+        slot = self.slot(product_id)
+        return None if slot is None else self.product_at(slot)
+
+    def text_contains(self, slot: int, needle: bytes) -> bool:
+        # find() on the buffer itself, so the text is not copied out of the mapping
+        start = self._texts_start + self._text_offsets[slot]
+        end = self._texts_start + self._text_offsets[slot + 1]
+        return self._buffer.find(needle, start, end) != -1
+
+    def _find_gram(self, gram: str) -> Optional[int]:
+        key = _gram_key(gram)
+        low, high = 0, self._gram_count
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._grams[middle * GRAM_SIZE:(middle + 1) * GRAM_SIZE]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._gram_count or bytes(self._grams[low * GRAM_SIZE:(low + 1) * GRAM_SIZE]) != key:
+            return None
+        return low
+
+    def postings(self, gram: str):
+        position = self._gram_positions(gram)
+        if position is None:
+            return ()
+        return self._postings[self._gram_offsets[position]:self._gram_offsets[position + 1]]
+
+    def candidates(self, search_term: str):
+        """Ascending slots that may contain search_term; confirm with text_contains()"""
+        grams = trigrams(search_term)
+        if not grams:
+            # Two-letter terms have no trigram; check every product
+            return range(self.count)
+        postings = sorted((self.postings(gram) for gram in grams), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for slots in postings[1:]:
+            if len(slots) > len(postings[0]) * INTERSECT_RATIO:
+                break
+            candidates.intersection_update(slots)
+        return sorted(candidates)
+
+
+class Catalog:
+    """A worker's catalog: the shared CatalogIndex plus its changes since"""
+
+    def __init__(self, index: CatalogIndex):
+        self.index = index
+        self.watermark: Optional[datetime] = index.watermark
+        # product ID -> current product, None once deleted or hidden
+        self._changed: Dict[str, Optional[dict]] = {}
+        self._brand_counts: Dict[str, int] = dict(index.brand_counts)
+
+    @classmethod
+    def from_products(cls, products: Iterable[dict]) -> "Catalog":
+        return cls(CatalogIndex.from_products(products))
+
+    @property
+    def brands(self) -> List[str]:
+        return sorted(brand for brand, count in self._brand_counts.items() if count > 0)
+
+    @property
+    def overlay_size(self) -> int:
+        return len(self._changed)
+
+    def ids(self) -> Iterator[str]:
+        for product_id in self.index.ids():
+            if self._changed.get(product_id, True) is not None:
+                yield product_id
+        for product_id, product in self._changed.items():
+            if product is not None and self.index.slot(product_id) is None:
+                yield product_id
+
+    def get(self, product_id: str) -> Optional[dict]:
+        if product_id in self._changed:
+            return self._changed[product_id]
+        return self.index.get(product_id)
+
+    def _count_brand(self, product: Optional[dict], delta: int):
+        if product is not None and product.get("brand"):
+            self._brand_counts[product["brand"]] = self._brand_counts.get(product["brand"], 0) + delta
+
+    def _set(self, product_id: str, product: Optional[dict]):
+        previous = self.get(product_id)
+        if previous is None and product is None:
+            return
+        self._count_brand(previous, -1)
+        self._count_brand(product, 1)
+        self._changed[product_id] = product
+
+    def upsert(self, product: dict):
+        """Add or replace a product; inactive products are removed"""
+        updated_at = product.get("updated_at")
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+        self._set(str(product["_id"]), product if product.get("is_active") else None)
+
+    def remove(self, product_id: str):
+        self._set(product_id, None)
+
+    def search(self, search_term: str, limit: int = 10) -> List[dict]:
+        """Products matching like product_matches, in _id (creation) order"""
+        search_term = search_term.lower()
+        if FIELD_SEPARATOR in search_term:
+            return []
+        needle = search_term.encode()
+
+        matches = []
+        for slot in self.index.candidates(search_term):
+            product_id = self.index.id_at(slot).hex()
+            if product_id not in self._changed and self.index.text_contains(slot, needle):
+                matches.append((product_id, slot))
+                if len(matches) == limit:
+                    break
+        for product_id, product in self._changed.items():
+            if product is not None and product_matches(product, search_term):
+                matches.append((product_id, product))
+
+        # ObjectId hex strings sort in ObjectId order
+        matches.sort(key=lambda match: match[0])
+        return [
+            self.index.product_at(found) if isinstance(found, int) else found
+            for _, found in matches[:limit]
+        ]
+
+    def rebase(self, index: CatalogIndex):
+        """Switch to a newer snapshot, keeping only the changes it doesn't include"""
+        remaining = {
+            product_id: product for product_id, product in self._changed.items()
+            if product != index.get(product_id)
+        }
+        self.index = index
+        self._changed = {}
+        self._brand_counts = dict(index.brand_counts)
+        for product_id, product in remaining.items():
+            self._set(product_id, product)
+        if index.watermark and (self.watermark is None or index.watermark > self.watermark):
+            self.watermark = index.watermark
+
+    def copy(self) -> "Catalog":
+        catalog = Catalog(self.index)
+        catalog.watermark = self.watermark
+        catalog._changed = dict(self._changed)
+        catalog._brand_counts = dict(self._brand_counts)
+        return catalog
+
+    def products(self) -> Iterator[dict]:
+        """Every current product, decoding the whole snapshot"""
+        for slot in range(self.index.count):
+            if self.index.id_at(slot).hex() not in self._changed:
+                yield self.index.product_at(slot)
+        for product in self._changed.values():
+            if product is not None:
+                yield product
+
+    async def catch_up(self, db) -> int:
+        """Apply products updated after the watermark and drop removed ones"""
+        changed = 0
+        query = {"updated_at": {"$gt": self.watermark}} if self.watermark else {}
+        async for product in db.products.find(query):
+            self.upsert(product)
+            changed += 1
+
+        # Deletes and inserts without updated_at don't move the watermark
+        active_ids = set()
+        async for row in db.products.find({"is_active": True}, {"_id": 1}):
+            active_ids.add(str(row["_id"]))
+        current_ids = set(self.ids())
+        for product_id in current_ids - active_ids:
+            self.remove(product_id)
+            changed += 1
+        missing = [ObjectId(product_id) for product_id in active_ids - current_ids]
+        if missing:
+            async for product in db.products.find({"_id": {"$in": missing}}):
+                self.upsert(product)
+                changed += 1
+        return changed
+
+    async def refresh(self, db, product_ids: Iterable[str]):
+        """Reload the given products; those no longer found are removed"""
+        product_ids = set(product_ids)
+        found = set()
+        object_ids = [ObjectId(product_id) for product_id in product_ids if ObjectId.is_valid(product_id)]
+        async for product in db.products.find({"_id": {"$in": object_ids}}):
+            found.add(str(product["_id"]))
+            self.upsert(product)
+        for product_id in product_ids - found:
+            self.remove(product_id)
+
+
+# -------------------- Snapshot file --------------------
+
+def open_index(path: str, source: Optional[str] = None) -> Optional[CatalogIndex]:
+    """Map the snapshot file, or None if there is no usable one built from source"""
+    try:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # The mapping stays valid after the file is closed or replaced
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+    try:
+        index = CatalogIndex(mapped, identity=(stat.st_dev, stat.st_ino))
+    except Exception as e:
+        logger.warning("Unusable catalog snapshot %s: %s", path, e)
+        return None
+    if source is not None and index.source != source:
+        logger.warning("Catalog snapshot %s was built from another database", path,
+                       extra={"source": index.source, "expected": source})
+        return None
+    return index
+
+
+def snapshot_identity(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def write_snapshot(products: Iterable[dict], path: str, source: Optional[str] = None):
+    """Build the snapshot and swap it in with os.replace(), so readers never see half of one"""
+    # Packing every product allocates a container per field, which would set
+    # off the cyclic GC many times over objects that all stay alive
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        data = build_index(products, source)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".catalog-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp() creates the file private to this user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def lock_snapshot(path: str, blocking: bool = True):
+    """Take the lock the workers on a host share; the lock file, or None if it is held"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lock_file = open(path + ".lock", "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def unlock_snapshot(lock_file):
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+
+# -------------------- Worker catalog --------------------
+
+_catalog: Optional[Catalog] = None
+# Set by load(): the worker's snapshot file and the source_id() it must carry
+_snapshot_path: Optional[str] = None
+_source: Optional[str] = None
+
+
+def get_catalog() -> Optional[Catalog]:
+    """The worker's catalog, or None until load() has finished"""
+    return _catalog
+
+
+async def load(db, source: Optional[str] = None, path: Optional[str] = None) -> Catalog:
+    """Map the snapshot (building it if needed), catch up and make it the worker's catalog.
+
+    source identifies the database, e.g. its URL and name; db.name by default.
+    """
+    global _catalog, _snapshot_path, _source
+    started = time.perf_counter()
+    _source = source_id(source or db.name)
+    _snapshot_path = path = path or default_snapshot_path(_source)
+
+    # Waits while another worker builds the snapshot, then maps what it wrote
+    lock_file = await asyncio.to_thread(lock_snapshot, path)
+    try:
+        index = await asyncio.to_thread(open_index, path, _source)
+        if index is None:
+            logger.info("Building the catalog snapshot from MongoDB", extra={"path": path})
+            products = [product async for product in db.products.find({"is_active": True})]
+            await asyncio.to_thread(write_snapshot, products, path, _source)
+            index = await asyncio.to_thread(open_index, path, _source)
+            if index is None:
+                raise RuntimeError(f"Catalog snapshot {path} unreadable right after writing it")
+    finally:
+        unlock_snapshot(lock_file)
+
+    catalog = Catalog(index)
+    changed = await catalog.catch_up(db)
+    _catalog = catalog
+    if changed > CATALOG_REBUILD_CHANGES:
+        await publish(path)
+    logger.info("Catalog loaded", extra={
+        "products": _catalog.index.count, "changed": changed, "overlay": _catalog.overlay_size,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
+    return catalog
+
+
+async def remap(path: Optional[str] = None) -> bool:
+    """Switch to a snapshot another worker published; True if there was one"""
+    if _catalog is None:
+        return False
+    path = path or _snapshot_path
+    identity = await asyncio.to_thread(snapshot_identity, path)
+    if identity is None or identity == _catalog.index.identity:
+        return False
+    index = await asyncio.to_thread(open_index, path, _source)
+    if index is None:
+        return False
+    _catalog.rebase(index)
+    return True
+
+
+async def publish(path: Optional[str] = None) -> bool:
+    """Write a snapshot with this worker's changes, unless another worker is at it"""
+    if _catalog is None:
+        return False
+    path = path or _snapshot_path
+    lock_file = lock_snapshot(path, blocking=False)
+    if lock_file is None:
+        return False
+    try:
+        # Another worker may have just published the same changes
+        await remap(path)
+        if not _catalog.overlay_size:
+            return False
+        # The index is read-only and the copy is this worker's alone, so the
+        # whole build can run off the event loop
+        current = _catalog.copy()
+        await asyncio.to_thread(write_snapshot, current.products(), path, _source)
+    finally:
+        unlock_snapshot(lock_file)
+
+    await remap(path)
+    logger.info("Catalog snapshot published", extra={"products": _catalog.index.count})
+    return True
+
+
+async def apply_changes(db, product_ids: Optional[Set[str]]):
+    """Change feed subscriber for the products collection"""
+    if _catalog is None:
+        return
+    if product_ids is None:
+        await _catalog.catch_up(db)
+    else:
+        await _catalog.refresh(db, product_ids)
+
+
+async def sync_periodically(path: Optional[str] = None):
+    """Background job: map snapshots other workers publish and publish this one's changes"""
+    published_at = time.monotonic()
+    while True:
+        await asyncio.sleep(CATALOG_CHECK_SECONDS)
+        if _catalog is None:
+            continue
+        try:
+            await remap(path)
+            if _catalog.overlay_size and time.monotonic() - published_at >= CATALOG_SNAPSHOT_SECONDS:
+                published_at = time.monotonic()
+                await publish(path)
+        except Exception as e:
+            logger.warning("Error syncing the catalog snapshot: %s", e)
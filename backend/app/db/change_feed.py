@@ -0,0 +1,242 @@
+# backend/app/db/change_feed.py
+"""Change feed that tells every worker which collections were written.
+
+Each worker follows the database's writes itself, so a write made through
+one process (or a script, or another host) reaches the caches of all the
+others without a message broker:
+
+- Change streams (replica sets, Atlas): one db.watch() over the watched
+  collections, resumed from the last token after a dropped connection
+- Polling fallback (standalone / local mongod, where $changeStream is not
+  supported): every CHANGE_FEED_POLL_SECONDS documents with a newer
+  updated_at are read, and the document count is compared to catch
+  deletes and inserts that set no updated_at. Writes that leave
+  updated_at alone (stock $inc from orders) are only seen by change
+  streams; cache TTLs still bound those.
+
+Changes are batched for CHANGE_FEED_BATCH_SECONDS and handed to every
+subscriber once per collection, with the changed document IDs, or None
+when the whole collection has to be treated as changed:
+
+    async def on_change(collection: str, document_ids: Optional[Set[str]]):
+        ...
+
+    change_feed = ChangeFeed(["products", "brands"])
+    change_feed.subscribe(on_change)
+    background_jobs.append(asyncio.create_task(change_feed.run(db)))
+
+Updates that only touch a collection's ignore_fields (counters such as
+stock and reserved, written on every checkout) are not reported, so they
+don't flush caches that already bound those fields with a short TTL:
+
+    ChangeFeed(["products"], ignore_fields={"products": ["stock", "reserved"]})
+
+CHANGE_FEED_MODE is "auto" (change streams, polling if unsupported),
+"poll" or "off".
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.metrics import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_MODE = os.getenv("CHANGE_FEED_MODE", "auto")
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", 2))
+CHANGE_FEED_BATCH_SECONDS = float(os.getenv("CHANGE_FEED_BATCH_SECONDS", 0.5))
+RETRY_SECONDS = 5
+POLL_BATCH_SIZE = 1000
+
+# $changeStream on a standalone mongod (40573) or a server too old to know it (40324)
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+# The resume token fell off the oplog, so changes may have been missed
+CHANGE_STREAM_HISTORY_LOST = 286
+
+Subscriber = Callable[[str, Optional[Set[str]]], Awaitable[None]]
+
+change_feed_changes = registry.register(Counter(
+    "change_feed_changes_total", "Collection changes passed to change feed subscribers", ("collection", "source")))
+
+
+class ChangeFeed:
+    def __init__(self, collections: Iterable[str], mode: str = CHANGE_FEED_MODE,
+                 poll_seconds: float = CHANGE_FEED_POLL_SECONDS, batch_seconds: float = CHANGE_FEED_BATCH_SECONDS,
+                 ignore_fields: Optional[Dict[str, Iterable[str]]] = None):
+        if mode not in ("auto", "poll", "off"):
+            raise ValueError(f"Unknown CHANGE_FEED_MODE {mode!r}")
+        self.collections = list(collections)
+        self.mode = mode
+        self.poll_seconds = poll_seconds
+        self.batch_seconds = batch_seconds
+        # collection -> top-level fields whose updates alone are not reported
+        self.ignore_fields = {name: set(fields) for name, fields in (ignore_fields or {}).items()}
+        # "change_stream" or "poll" once run() has started following changes
+        self.active_mode: Optional[str] = None
+        self.last_change_at: Optional[datetime] = None
+        self._subscribers: List[Subscriber] = []
+        # collection -> changed document IDs, None for the whole collection
+        self._pending: Dict[str, Optional[Set[str]]] = {}
+        self._resume_token = None
+
+    def subscribe(self, callback: Subscriber):
+        self._subscribers.append(callback)
+
+    def status(self) -> dict:
+        return {
+            "mode": self.active_mode or self.mode,
+            "collections": self.collections,
+            "last_change_at": self.last_change_at.isoformat() if self.last_change_at else None
+        }
+
+    def _add(self, collection: str, document_id=None):
+        if collection in self._pending and self._pending[collection] is None:
+            return
+        if document_id is None:
+            self._pending[collection] = None
+        else:
+            self._pending.setdefault(collection, set()).add(str(document_id))
+
+    async def _dispatch(self, source: str):
+        pending, self._pending = self._pending, {}
+        for collection, document_ids in pending.items():
+            change_feed_changes.inc(collection, source)
+            for callback in self._subscribers:
+                try:
+                    await callback(collection, document_ids)
+                except Exception:
+                    logger.exception("Change feed subscriber failed", extra={"collection": collection})
+        if pending:
+            self.last_change_at = datetime.utcnow()
+
+    async def run(self, db):
+        """Background job: follow changes until cancelled"""
+        if self.mode == "off":
+            return
+        if self.mode == "auto" and await self._watch(db):
+            return
+        await self._poll(db)
+
+    # -------------------- Change streams --------------------
+
+    def _only_ignored_fields(self, collection: str, change: dict) -> bool:
+        ignored = self.ignore_fields.get(collection)
+        if not ignored:
+            return False
+        description = change.get("updateDescription") or {}
+        fields = [*description.get("updatedFields", {}), *description.get("removedFields", [])]
+        fields += [array["field"] for array in description.get("truncatedArrays", [])]
+        return bool(fields) and all(field.split(".", 1)[0] in ignored for field in fields)
+
+    def _add_change(self, change: dict):
+        operation = change["operationType"]
+        collection = change.get("ns", {}).get("coll")
+        if operation == "update" and self._only_ignored_fields(collection, change):
+            return
+        if operation in ("insert", "update", "replace", "delete"):
+            self._add(collection, change["documentKey"]["_id"])
+        elif operation in ("drop", "rename") and collection in self.collections:
+            self._add(collection)
+        elif operation in ("dropDatabase", "invalidate"):
+            for name in self.collections:
+                self._add(name)
+
+    async def _watch(self, db) -> bool:
+        """Follow a change stream; False if the server does not support them"""
+        pipeline = [{"$match": {"ns.coll": {"$in": self.collections}}}]
+        while True:
+            try:
+                async with db.watch(pipeline, resume_after=self._resume_token,
+                                    max_await_time_ms=int(self.batch_seconds * 1000)) as stream:
+                    batch_started = None
+                    while stream.alive:
+                        # The server only rejects $changeStream once the first batch is read
+                        change = await stream.try_next()
+                        if self.active_mode is None:
+                            logger.info("Following changes with a change stream",
+                                        extra={"collections": self.collections})
+                        self.active_mode = "change_stream"
+                        self._resume_token = stream.resume_token
+                        if change is not None:
+                            self._add_change(change)
+                            if change["operationType"] == "invalidate":
+                                # An invalidated stream can't be resumed; open a fresh one
+                                self._resume_token = None
+                            batch_started = batch_started or time.monotonic()
+                        if self._pending and (change is None or time.monotonic() - batch_started >= self.batch_seconds):
+                            await self._dispatch("change_stream")
+                            batch_started = None
+                    await self._dispatch("change_stream")
+                    continue
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams not supported by this server; polling for changes instead")
+                    return False
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning("Change stream history lost; treating all watched collections as changed")
+                    self._resume_token = None
+                    for name in self.collections:
+                        self._add(name)
+                    await self._dispatch("change_stream")
+                    continue
+                logger.warning("Change stream failed: %s", e)
+            except PyMongoError as e:
+                logger.warning("Change stream interrupted: %s", e)
+            await asyncio.sleep(RETRY_SECONDS)
+
+    # -------------------- Polling fallback --------------------
+
+    async def _poll(self, db):
+        watermarks: Dict[str, Optional[datetime]] = {}
+        counts: Dict[str, int] = {}
+        while not watermarks:
+            try:
+                for name in self.collections:
+                    await db[name].create_index([("updated_at", ASCENDING)])
+                    latest = await db[name].find_one(
+                        {"updated_at": {"$ne": None}}, {"updated_at": 1}, sort=[("updated_at", -1)]
+                    )
+                    watermarks[name] = latest["updated_at"] if latest else None
+                    counts[name] = await db[name].estimated_document_count()
+            except PyMongoError as e:
+                logger.warning("Change feed polling setup failed: %s", e)
+                watermarks.clear()
+                await asyncio.sleep(RETRY_SECONDS)
+
+        self.active_mode = "poll"
+        logger.info("Polling for changes", extra={"collections": self.collections, "interval": self.poll_seconds})
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                for name in self.collections:
+                    watermarks[name] = await self._poll_updates(db[name], watermarks[name])
+                    count = await db[name].estimated_document_count()
+                    if count != counts[name]:
+                        self._add(name)
+                        counts[name] = count
+                await self._dispatch("poll")
+            except PyMongoError as e:
+                logger.warning("Change feed poll failed: %s", e)
+
+    async def _poll_updates(self, collection, watermark: Optional[datetime]) -> Optional[datetime]:
+        """Queue documents updated after watermark; returns the new watermark"""
+        query = {"updated_at": {"$gt": watermark}} if watermark else {"updated_at": {"$ne": None}}
+        cursor = collection.find(query, {"updated_at": 1}).sort("updated_at", ASCENDING).limit(POLL_BATCH_SIZE)
+        seen = 0
+        async for doc in cursor:
+            self._add(collection.name, doc["_id"])
+            watermark = doc["updated_at"]
+            seen += 1
+        if seen == POLL_BATCH_SIZE:
+            # Documents sharing the last timestamp may be cut off; take the whole
+            # collection and move the watermark past everything written so far
+            self._add(collection.name)
+            latest = await collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+            watermark = latest["updated_at"]
+        return watermark
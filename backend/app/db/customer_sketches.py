@@ -0,0 +1,195 @@
+# backend/app/db/customer_sketches.py
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from bson import Binary
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from app.core.hll import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+# One document per bucket: "all", "day:YYYY-MM-DD" and "month:YYYY-MM"
+SKETCH_COLLECTION = "customer_sketches"
+ALL_BUCKET = "all"
+MAX_WRITE_RETRIES = 5
+
+# {_id: "meta", rebuilt_at, synced_until}: the sketches count every order
+# created before synced_until. Absent until the first rebuild.
+META_ID = "meta"
+# Each sync re-reads orders this far before synced_until, so an order
+# inserted a little after its created_at is not missed; adding a buyer
+# a second time changes nothing
+SYNC_OVERLAP = timedelta(minutes=2)
+
+
+def day_bucket(ts: datetime) -> str:
+    return f"day:{ts:%Y-%m-%d}"
+
+
+def month_bucket(ts: datetime) -> str:
+    return f"month:{ts:%Y-%m}"
+
+
+def buckets_for(ts: datetime) -> List[str]:
+    """Sketch buckets a buyer active at ts belongs to"""
+    return [ALL_BUCKET, day_bucket(ts), month_bucket(ts)]
+
+
+def day_buckets_between(start: datetime, end: datetime) -> List[str]:
+    days = (end.date() - start.date()).days
+    return [day_bucket(start + timedelta(days=offset)) for offset in range(days + 1)]
+
+
+def month_buckets_between(start: datetime, end: datetime) -> List[str]:
+    keys = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        keys.append(f"month:{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return keys
+
+
+def _sketch_doc(sketch: HyperLogLog) -> dict:
+    return {
+        "registers": Binary(sketch.to_bytes()),
+        "estimate": sketch.count(),
+        "error_rate": sketch.error_rate,
+        "updated_at": datetime.utcnow()
+    }
+
+
+async def ensure_indexes(db):
+    await db.orders.create_index([("created_at", ASCENDING)])
+
+
+async def _merge_into_bucket(db, key: str, sketch: HyperLogLog):
+    """Fold a sketch into one stored bucket with an optimistic compare-and-swap on version"""
+    collection = db[SKETCH_COLLECTION]
+
+    for _ in range(MAX_WRITE_RETRIES):
+        doc = await collection.find_one({"_id": key})
+
+        if doc is None:
+            try:
+                await collection.insert_one({"_id": key, "version": 1, **_sketch_doc(sketch)})
+                return
+            except DuplicateKeyError:
+                continue
+
+        stored = HyperLogLog.from_bytes(doc["registers"])
+        if not stored.merge(sketch):
+            # Buyers already counted cost no write at all
+            return
+
+        result = await collection.update_one(
+            {"_id": key, "version": doc["version"]},
+            {"$set": _sketch_doc(stored), "$inc": {"version": 1}}
+        )
+        if result.modified_count:
+            return
+
+    raise RuntimeError(f"Could not update customer sketch {key} after {MAX_WRITE_RETRIES} attempts")
+
+
+def _add_order(sketches: Dict[str, HyperLogLog], order: dict):
+    created_at = order.get("created_at")
+    for key in buckets_for(created_at) if created_at else [ALL_BUCKET]:
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = HyperLogLog()
+        sketch.add(order["user_id"])
+
+
+async def sketches_ready(db) -> bool:
+    """Whether the sketches were built from the orders, so they count every buyer"""
+    meta = await db[SKETCH_COLLECTION].find_one({"_id": META_ID}, {"rebuilt_at": 1})
+    return bool(meta and meta.get("rebuilt_at"))
+
+
+async def sync_customer_sketches(db) -> int:
+    """Add the buyers of orders created since the last sync to the sketches.
+
+    Orders are read in one pass and merged into each bucket they touch
+    with a single write, rather than one write per order. synced_until
+    only moves once every bucket is written, so a failed sync is simply
+    repeated by the next one. Does nothing before the first rebuild.
+    Returns the number of buckets merged.
+    """
+    collection = db[SKETCH_COLLECTION]
+    meta = await collection.find_one({"_id": META_ID})
+    if not meta or not meta.get("synced_until"):
+        return 0
+
+    until = datetime.utcnow()
+    sketches = {}
+    cursor = db.orders.find(
+        {"created_at": {"$gte": meta["synced_until"] - SYNC_OVERLAP, "$lt": until}, "user_id": {"$ne": None}},
+        {"user_id": 1, "created_at": 1}
+    )
+    async for order in cursor:
+        _add_order(sketches, order)
+
+    for key, sketch in sketches.items():
+        await _merge_into_bucket(db, key, sketch)
+
+    await collection.update_one(
+        {"_id": META_ID, "synced_until": {"$lt": until}},
+        {"$set": {"synced_until": until}}
+    )
+    return len(sketches)
+
+
+async def sync_periodically(db, interval_seconds: int):
+    """Background job: sync the sketches every interval_seconds"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await sync_customer_sketches(db)
+        except Exception:
+            logger.exception("Error syncing customer sketches")
+
+
+async def get_customer_count(db, key: str = ALL_BUCKET) -> Optional[dict]:
+    """Distinct buyers for one bucket, read from the stored estimate"""
+    doc = await db[SKETCH_COLLECTION].find_one({"_id": key}, {"estimate": 1, "error_rate": 1})
+    if doc is None:
+        return None
+    return {"estimate": doc["estimate"], "error_rate": doc["error_rate"]}
+
+
+async def get_customer_count_union(db, keys: Iterable[str]) -> dict:
+    """Distinct buyers across several buckets, merging their sketches"""
+    merged = HyperLogLog()
+    async for doc in db[SKETCH_COLLECTION].find({"_id": {"$in": list(keys)}}, {"registers": 1}):
+        merged.merge(HyperLogLog.from_bytes(doc["registers"]))
+    return {"estimate": merged.count(), "error_rate": merged.error_rate}
+
+
+async def rebuild_customer_sketches(db) -> int:
+    """Recompute every bucket from the orders collection in a single pass"""
+    started = datetime.utcnow()
+    sketches = {}
+    cursor = db.orders.find({"user_id": {"$ne": None}}, {"user_id": 1, "created_at": 1})
+
+    async for order in cursor:
+        _add_order(sketches, order)
+
+    collection = db[SKETCH_COLLECTION]
+    for key, sketch in sketches.items():
+        await collection.update_one(
+            {"_id": key},
+            {"$set": _sketch_doc(sketch), "$inc": {"version": 1}},
+            upsert=True
+        )
+
+    # Syncs carry on from the start of the scan; orders placed during it are read again
+    await collection.update_one(
+        {"_id": META_ID},
+        {"$set": {"rebuilt_at": datetime.utcnow(), "synced_until": started}},
+        upsert=True
+    )
+    return len(sketches)
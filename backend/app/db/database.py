@@ -0,0 +1,228 @@
+# backend/app/db/database.py
+"""Process-wide MongoDB client.
+
+The app opens one AsyncIOMotorClient at startup with connect() and every
+module reads the database through get_database(), so all routers share a
+single connection pool. Pool options come from the environment:
+
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_COMPRESSORS (comma separated, e.g. "zstd,snappy,zlib")
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+from app.core.metrics import mongo_command_metrics, registry
+from app.db.slow_queries import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_NAME = "timora_db"
+
+_client: Optional[AsyncIOMotorClient] = None
+_database: Optional[AsyncIOMotorDatabase] = None
+_options: dict = {}
+
+
+def _available_compressors(requested: str) -> List[str]:
+    """Requested wire compressors whose Python libraries are installed"""
+    available = []
+    for name in filter(None, (c.strip() for c in requested.split(","))):
+        try:
+            if name == "zstd":
+                import zstandard  # noqa: F401
+            elif name == "snappy":
+                import snappy  # noqa: F401
+        except ImportError:
+            logger.warning("MongoDB compressor unavailable, skipping", extra={"compressor": name})
+            continue
+        available.append(name)
+    return available
+
+
+def pool_options() -> dict:
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", 5)),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000)),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    }
+    wait_queue_timeout = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    if wait_queue_timeout:
+        options["waitQueueTimeoutMS"] = int(wait_queue_timeout)
+    compressors = _available_compressors(os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib"))
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool usage per server, for sizing pools per worker.
+
+    Motor checks connections out on its executor threads, so the start and
+    end of a checkout happen on the same thread and the wait is timed with
+    a thread local.
+    """
+
+    def __init__(self, samples: int = 1000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pools: Dict[str, dict] = {}
+        self._samples = samples
+
+    def _pool(self, address) -> dict:
+        key = f"{address[0]}:{address[1]}"
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = {
+                "open": 0,
+                "in_use": 0,
+                "waiting": 0,
+                "max_waiting": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "cleared": 0,
+                "waits": deque(maxlen=self._samples)
+            }
+        return pool
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address)["cleared"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address)["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event.address)["open"] -= 1
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["waiting"] += 1
+            pool["max_waiting"] = max(pool["max_waiting"], pool["waiting"])
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["waiting"] -= 1
+            pool["checkout_failures"] += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["waiting"] -= 1
+            pool["in_use"] += 1
+            pool["checkouts"] += 1
+            if started is not None:
+                pool["waits"].append(time.perf_counter() - started)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event.address)["in_use"] -= 1
+
+    def summary(self) -> dict:
+        report = {}
+        with self._lock:
+            for address, pool in self._pools.items():
+                waits = sorted(pool["waits"])
+                count = len(waits)
+                report[address] = {
+                    **{k: v for k, v in pool.items() if k != "waits"},
+                    "wait_avg_ms": round(sum(waits) / count * 1000, 3) if count else 0.0,
+                    "wait_p95_ms": round(waits[min(int(count * 0.95), count - 1)] * 1000, 3) if count else 0.0,
+                    "wait_max_ms": round(waits[-1] * 1000, 3) if count else 0.0
+                }
+        return report
+
+
+pool_metrics = PoolMetrics()
+
+POOL_GAUGES = ("open", "in_use", "waiting", "max_waiting", "checkouts", "checkout_failures", "wait_p95_ms")
+
+
+def _pool_exposition() -> list:
+    """Pool usage as Prometheus gauges, rendered at scrape time"""
+    pools = pool_metrics.summary()
+    lines = []
+    for field in POOL_GAUGES:
+        name = f"mongo_pool_{field}"
+        lines.append(f"# TYPE {name} gauge")
+        for address, pool in pools.items():
+            lines.append(f'{name}{{address="{address}"}} {pool[field]}')
+    return lines
+
+
+registry.add_collector(_pool_exposition)
+
+
+async def connect(url: Optional[str] = None, database_name: Optional[str] = None) -> AsyncIOMotorDatabase:
+    """Open the shared client (app startup) and return the database"""
+    global _client, _database, _options
+    if _database is not None:
+        return _database
+
+    url = url or os.getenv("MONGODB_URL_OVERRIDE")
+    database_name = database_name or os.getenv("DATABASE_NAME", DEFAULT_DATABASE_NAME)
+
+    _options = pool_options()
+    _client = AsyncIOMotorClient(url, event_listeners=[pool_metrics, mongo_command_metrics, slow_query_log], **_options)
+    _database = _client[database_name]
+    return _database
+
+
+async def warm_pool(connections: Optional[int] = None):
+    """Open connections up front so the first requests don't pay for the handshakes"""
+    count = connections or _options.get("minPoolSize") or 1
+    # Concurrent commands each check out a connection of their own
+    await asyncio.gather(*(get_client().admin.command("ping") for _ in range(count)))
+
+
+def get_client() -> AsyncIOMotorClient:
+    if _client is None:
+        raise RuntimeError("Database is not connected; call connect() at startup")
+    return _client
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    if _database is None:
+        raise RuntimeError("Database is not connected; call connect() at startup")
+    return _database
+
+
+async def close():
+    """Close the shared client (app shutdown)"""
+    global _client, _database
+    if _client is not None:
+        _client.close()
+    _client = None
+    _database = None
+
+
+def get_pool_stats() -> dict:
+    return {"options": _options, "pools": pool_metrics.summary()}
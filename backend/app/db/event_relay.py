@@ -0,0 +1,140 @@
+# backend/app/db/event_relay.py
+"""Relay that carries event_bus events between worker processes.
+
+event_bus only reaches subscribers in the process that published, but under
+gunicorn the request that writes (an order, a payment callback) and the
+admin dashboards or payment status long-polls waiting for it are usually in
+different workers. Every worker therefore appends the events it publishes
+to a small capped collection and follows it with a tailable cursor,
+re-publishing the other workers' events to its own subscribers:
+
+    relay = EventRelay(event_bus)
+    background_jobs.append(asyncio.create_task(relay.run(db)))
+
+Capped collections and tailable cursors work on standalone servers, replica
+sets and Atlas alike, so no message broker is needed. Events are best
+effort, like the in-process bus: a worker that falls more than the
+collection's size behind skips ahead instead of replaying old events.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from bson.errors import InvalidDocument
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+
+from app.core.events import EventBus
+
+logger = logging.getLogger(__name__)
+
+EVENT_RELAY_COLLECTION = "event_relay"
+EVENT_RELAY_SIZE_BYTES = int(os.getenv("EVENT_RELAY_SIZE_BYTES", 1024 * 1024))
+EVENT_RELAY_QUEUE_SIZE = 10000
+SEND_BATCH_SIZE = 500
+# How long an idle tailable cursor waits on the server before returning empty
+AWAIT_MS = 1000
+RETRY_SECONDS = 1
+
+# Another worker created the collection first
+NAMESPACE_EXISTS = 48
+
+
+class EventRelay:
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self.origin: Optional[str] = None
+        self.dropped = 0
+        self._outbox: Optional[asyncio.Queue] = None
+
+    def forward(self, channel: str, event: str, data: dict):
+        """event_bus forwarder: queue an event for the other workers, never blocking"""
+        try:
+            self._outbox.put_nowait({
+                "origin": self.origin,
+                "channel": channel,
+                "event": event,
+                "data": data,
+                "created_at": datetime.utcnow()
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning("Event relay outbox full; dropping events", extra={"dropped": self.dropped})
+
+    async def run(self, db):
+        """Background job: relay events until cancelled"""
+        # Set here rather than at import: workers are forked from a preloaded master
+        self.origin = f"{os.uname().nodename}:{os.getpid()}"
+        self._outbox = asyncio.Queue(maxsize=EVENT_RELAY_QUEUE_SIZE)
+        collection = await self._ensure_collection(db)
+        self.bus.add_forwarder(self.forward)
+        try:
+            await asyncio.gather(self._send(collection), self._receive(collection))
+        finally:
+            self.bus.remove_forwarder(self.forward)
+
+    async def _ensure_collection(self, db):
+        while True:
+            try:
+                await db.create_collection(EVENT_RELAY_COLLECTION, capped=True, size=EVENT_RELAY_SIZE_BYTES)
+            except CollectionInvalid:
+                pass
+            except OperationFailure as e:
+                if e.code != NAMESPACE_EXISTS:
+                    logger.warning("Event relay setup failed: %s", e)
+                    await asyncio.sleep(RETRY_SECONDS)
+                    continue
+            except PyMongoError as e:
+                logger.warning("Event relay setup failed: %s", e)
+                await asyncio.sleep(RETRY_SECONDS)
+                continue
+            return db[EVENT_RELAY_COLLECTION]
+
+    async def _send(self, collection):
+        while True:
+            batch = [await self._outbox.get()]
+            while len(batch) < SEND_BATCH_SIZE and not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                await collection.insert_many(batch, ordered=False)
+            except (PyMongoError, InvalidDocument) as e:
+                logger.warning("Event relay failed to send %d events: %s", len(batch), e)
+
+    @staticmethod
+    async def _last_id(collection):
+        last = await collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        return last["_id"] if last else None
+
+    async def _receive(self, collection):
+        last_id = None
+        started = False
+        while True:
+            try:
+                if not started:
+                    # Only events published from now on
+                    last_id = await self._last_id(collection)
+                    started = True
+                elif last_id is not None and not await collection.find_one({"_id": last_id}, {"_id": 1}):
+                    logger.warning("Event relay fell behind the capped collection; skipping to the latest event")
+                    last_id = await self._last_id(collection)
+
+                # Capped collections keep insertion order, which ObjectIds from
+                # different processes don't, so the cursor is read from the start
+                # and everything up to the last event already seen is skipped
+                cursor = collection.find(cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(AWAIT_MS)
+                skipping = last_id is not None
+                while cursor.alive:
+                    async for doc in cursor:
+                        if skipping:
+                            skipping = doc["_id"] != last_id
+                            continue
+                        last_id = doc["_id"]
+                        if doc.get("origin") != self.origin:
+                            self.bus.publish_local(doc["channel"], doc["event"], doc.get("data") or {})
+            except PyMongoError as e:
+                logger.warning("Event relay interrupted: %s", e)
+            # The cursor dies straight away on an empty collection
+            await asyncio.sleep(RETRY_SECONDS)
@@ -0,0 +1,71 @@
+# backend/app/db/order_counters.py
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Single document: {_id: "orders", total, by_status: {<order_status>: count}}
+COUNTERS_COLLECTION = "order_counters"
+COUNTERS_ID = "orders"
+
+
+async def count_order_created(db, order_status: str):
+    """Count a newly inserted order"""
+    await db[COUNTERS_COLLECTION].update_one(
+        {"_id": COUNTERS_ID},
+        {"$inc": {"total": 1, f"by_status.{order_status}": 1}},
+        upsert=True
+    )
+
+
+async def count_status_change(db, previous_status: str, order_status: str):
+    """Move one order between status counters in a single atomic update"""
+    if previous_status == order_status:
+        return
+    await db[COUNTERS_COLLECTION].update_one(
+        {"_id": COUNTERS_ID},
+        {"$inc": {f"by_status.{previous_status}": -1, f"by_status.{order_status}": 1}},
+        upsert=True
+    )
+
+
+async def get_order_count(db, order_status: Optional[str] = None) -> Optional[int]:
+    """Maintained order total, optionally for one status; None until counters exist"""
+    doc = await db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID})
+    if doc is None:
+        return None
+    if order_status is None:
+        return doc.get("total", 0)
+    return doc.get("by_status", {}).get(order_status, 0)
+
+
+async def reconcile_order_counters(db) -> dict:
+    """Recount orders per status and overwrite the counters.
+
+    Increments that land while the recount runs can be lost or doubled; the
+    next reconcile corrects them.
+    """
+    by_status = {}
+    async for row in db.orders.aggregate([{"$group": {"_id": "$order_status", "count": {"$sum": 1}}}]):
+        if row["_id"] is not None:
+            by_status[row["_id"]] = row["count"]
+
+    counters = {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "reconciled_at": datetime.utcnow()
+    }
+    await db[COUNTERS_COLLECTION].update_one({"_id": COUNTERS_ID}, {"$set": counters}, upsert=True)
+    return counters
+
+
+async def reconcile_periodically(db, interval_seconds: int):
+    """Background job: reconcile on start, then every interval_seconds"""
+    while True:
+        try:
+            await reconcile_order_counters(db)
+        except Exception:
+            logger.exception("Error reconciling order counters")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,193 @@
+# backend/app/db/product_sales.py
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+# Per product per day rollups: {_id: "<product_id>:<YYYY-MM-DD>", product_id, day, units, revenue, orders}
+DAILY_COLLECTION = "product_sales_daily"
+
+# Running totals are kept on each product under "sales"
+SALES_METRICS = ("units", "revenue", "orders")
+
+
+def _order_day(order: dict) -> datetime:
+    created_at = order.get("created_at") or datetime.utcnow()
+    return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _order_lines(order: dict) -> dict:
+    """Units and revenue per product for one order"""
+    lines = {}
+    for item in order.get("items", []):
+        product_id = item.get("product_id")
+        if not product_id or not ObjectId.is_valid(product_id):
+            continue
+        quantity = int(item.get("quantity", 0))
+        line = lines.setdefault(product_id, {"units": 0, "revenue": 0.0})
+        line["units"] += quantity
+        line["revenue"] += float(item.get("price", 0)) * quantity
+    return lines
+
+
+async def ensure_indexes(db):
+    await db.products.create_index([("is_active", ASCENDING), ("sales.units", DESCENDING)])
+    await db[DAILY_COLLECTION].create_index([("day", ASCENDING), ("product_id", ASCENDING)])
+    await db[DAILY_COLLECTION].create_index([("product_id", ASCENDING), ("day", ASCENDING)])
+
+
+async def record_order_sales(db, order: dict, sign: int = 1):
+    """Apply an order to the sales rollups.
+
+    Use sign=-1 when an order is cancelled; the same day bucket the order
+    was counted in is decremented, so rollups stay consistent with orders.
+    """
+    lines = _order_lines(order)
+    if not lines:
+        return
+
+    day = _order_day(order)
+    product_ops = []
+    daily_ops = []
+
+    for product_id, line in lines.items():
+        inc = {
+            "units": sign * line["units"],
+            "revenue": sign * line["revenue"],
+            "orders": sign
+        }
+        product_ops.append(UpdateOne(
+            {"_id": ObjectId(product_id)},
+            {"$inc": {f"sales.{metric}": value for metric, value in inc.items()}}
+        ))
+        daily_ops.append(UpdateOne(
+            {"_id": f"{product_id}:{day:%Y-%m-%d}"},
+            {"$inc": inc, "$setOnInsert": {"product_id": product_id, "day": day}},
+            upsert=True
+        ))
+
+    await db.products.bulk_write(product_ops, ordered=False)
+    await db[DAILY_COLLECTION].bulk_write(daily_ops, ordered=False)
+
+
+async def rebuild(db) -> int:
+    """Recompute the daily rollups and every product's totals from the orders.
+
+    Brings orders placed before the rollups existed (or bulk loaded) into
+    the reports. Run it when few orders are coming in: an order placed
+    while the rebuild runs can be counted twice or not at all.
+    Returns the number of daily rollups.
+    """
+    await db[DAILY_COLLECTION].delete_many({})
+    await db.orders.aggregate([
+        {"$match": {"order_status": {"$ne": "cancelled"}, "created_at": {"$type": "date"}}},
+        {"$unwind": "$items"},
+        # Same lines _order_lines() counts
+        {"$match": {"items.product_id": {"$regex": "^[0-9a-f]{24}$"}, "items.quantity": {"$gt": 0}}},
+        {"$group": {
+            "_id": {"product_id": "$items.product_id",
+                    "day": {"$dateTrunc": {"date": "$created_at", "unit": "day"}},
+                    "order": "$_id"},
+            "units": {"$sum": "$items.quantity"},
+            "revenue": {"$sum": {"$multiply": [{"$toDouble": "$items.price"}, "$items.quantity"]}}
+        }},
+        {"$group": {
+            "_id": {"product_id": "$_id.product_id", "day": "$_id.day"},
+            "units": {"$sum": "$units"},
+            "revenue": {"$sum": "$revenue"},
+            "orders": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": {"$concat": ["$_id.product_id", ":",
+                                {"$dateToString": {"date": "$_id.day", "format": "%Y-%m-%d"}}]},
+            "product_id": "$_id.product_id",
+            "day": "$_id.day",
+            "units": 1, "revenue": 1, "orders": 1
+        }},
+        {"$merge": {"into": DAILY_COLLECTION, "whenMatched": "replace"}}
+    ], allowDiskUse=True).to_list(None)
+
+    await db.products.update_many({"sales": {"$exists": True}}, {"$unset": {"sales": ""}})
+    await db[DAILY_COLLECTION].aggregate([
+        {"$group": {"_id": "$product_id", **{m: {"$sum": f"${m}"} for m in SALES_METRICS}}},
+        {"$project": {"_id": {"$toObjectId": "$_id"}, "sales": {m: f"${m}" for m in SALES_METRICS}}},
+        {"$merge": {"into": "products", "whenMatched": "merge", "whenNotMatched": "discard"}}
+    ], allowDiskUse=True).to_list(None)
+
+    return await db[DAILY_COLLECTION].count_documents({})
+
+
+async def get_top_products(db, days: Optional[int] = None, metric: str = "units", limit: int = 10) -> list:
+    """Best selling products overall or over the last N days"""
+    if metric not in SALES_METRICS:
+        raise ValueError(f"metric must be one of {', '.join(SALES_METRICS)}")
+
+    if days is None:
+        ranked = []
+        cursor = db.products.find(
+            {f"sales.{metric}": {"$gt": 0}},
+            {"name": 1, "brand": 1, "price": 1, "images": 1, "stock": 1, "sales": 1}
+        ).sort(f"sales.{metric}", -1).limit(limit)
+
+        async for product in cursor:
+            sales = product.get("sales", {})
+            ranked.append({
+                "product_id": str(product["_id"]),
+                "name": product.get("name"),
+                "brand": product.get("brand"),
+                "image": (product.get("images") or [None])[0],
+                "stock": product.get("stock", 0),
+                **{m: sales.get(m, 0) for m in SALES_METRICS}
+            })
+        return ranked
+
+    since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    pipeline = [
+        {"$match": {"day": {"$gte": since}}},
+        {"$group": {
+            "_id": "$product_id",
+            **{m: {"$sum": f"${m}"} for m in SALES_METRICS}
+        }},
+        {"$match": {metric: {"$gt": 0}}},
+        {"$sort": {metric: -1}},
+        {"$limit": limit}
+    ]
+    totals = await db[DAILY_COLLECTION].aggregate(pipeline).to_list(limit)
+
+    products = {}
+    cursor = db.products.find(
+        {"_id": {"$in": [ObjectId(t["_id"]) for t in totals]}},
+        {"name": 1, "brand": 1, "images": 1, "stock": 1}
+    )
+    async for product in cursor:
+        products[str(product["_id"])] = product
+
+    ranked = []
+    for total in totals:
+        product = products.get(total["_id"], {})
+        ranked.append({
+            "product_id": total["_id"],
+            "name": product.get("name"),
+            "brand": product.get("brand"),
+            "image": (product.get("images") or [None])[0],
+            "stock": product.get("stock", 0),
+            **{m: total[m] for m in SALES_METRICS}
+        })
+    return ranked
+
+
+async def get_product_daily_sales(db, product_id: str, days: int = 30) -> list:
+    """Day by day sales for one product"""
+    since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    rows = []
+    cursor = db[DAILY_COLLECTION].find(
+        {"product_id": product_id, "day": {"$gte": since}}
+    ).sort("day", 1)
+
+    async for row in cursor:
+        rows.append({
+            "day": row["day"].strftime("%Y-%m-%d"),
+            **{m: row.get(m, 0) for m in SALES_METRICS}
+        })
+    return rows
@@ -0,0 +1,253 @@
+# backend/app/db/slow_queries.py
+"""Slow MongoDB operation log.
+
+A CommandListener notes every query-like command and, when one takes
+longer than SLOW_QUERY_MS, records it under a fingerprint of its command,
+collection and filter shape (values replaced with "?"). A background
+flush folds the records into the slow_queries collection and runs a
+sampled explain("executionStats") for each fingerprint, flagging plans
+that scan the whole collection.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import DESCENDING, UpdateOne, monitoring
+
+from app.core.metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES_COLLECTION = "slow_queries"
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+# Share of slow executions that get an explain, and how often per fingerprint at most
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", 0.2))
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", 600))
+
+# Commands explain can run, and where their filter lives
+EXPLAINABLE = {
+    "find": lambda cmd: {"filter": cmd.get("filter"), "sort": cmd.get("sort")},
+    "aggregate": lambda cmd: {"pipeline": cmd.get("pipeline")},
+    "count": lambda cmd: {"query": cmd.get("query")},
+    "distinct": lambda cmd: {"key": cmd.get("key"), "query": cmd.get("query")},
+    "findAndModify": lambda cmd: {"query": cmd.get("query"), "sort": cmd.get("sort")},
+    "update": lambda cmd: {"q": (cmd.get("updates") or [{}])[0].get("q")},
+    "delete": lambda cmd: {"q": (cmd.get("deletes") or [{}])[0].get("q")},
+}
+
+# Session and cluster bookkeeping the driver adds; explain rejects it
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+
+def query_shape(value):
+    """Replace literal values with "?" keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return None if value is None else "?"
+
+
+def _find_stage(plan, stage: str) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_find_stage(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_find_stage(item, stage) for item in plan)
+    return False
+
+
+def _find_key(doc, key: str):
+    if isinstance(doc, dict):
+        if key in doc:
+            return doc[key]
+        for value in doc.values():
+            found = _find_key(value, key)
+            if found is not None:
+                return found
+    elif isinstance(doc, list):
+        for item in doc:
+            found = _find_key(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+def summarize_explain(explain: dict) -> dict:
+    stats = _find_key(explain, "executionStats") or {}
+    return {
+        "collscan": _find_stage(explain, "COLLSCAN"),
+        "index_used": _find_stage(explain, "IXSCAN"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "explained_at": datetime.utcnow()
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain_sample: float = SLOW_QUERY_EXPLAIN_SAMPLE,
+                 explain_interval: int = SLOW_QUERY_EXPLAIN_INTERVAL):
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.explain_interval = explain_interval
+        self._lock = threading.Lock()
+        self._started: Dict[tuple, tuple] = {}
+        self._pending: Dict[str, dict] = {}
+        self._to_explain: Dict[str, dict] = {}
+        self._last_explained: Dict[str, float] = {}
+
+    def started(self, event):
+        shape_of = EXPLAINABLE.get(event.command_name)
+        if shape_of is None or event.command.get(event.command_name) == SLOW_QUERIES_COLLECTION:
+            return
+        stats = current_request.get()
+        route = stats.route if stats is not None else "background"
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (event.command, event.database_name, route)
+
+    def failed(self, event):
+        with self._lock:
+            self._started.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        self.record(event.command_name, *started, duration_ms)
+
+    def record(self, command_name: str, command: dict, database_name: str, route: str, duration_ms: float):
+        collection = command.get(command_name)
+        shape = query_shape(EXPLAINABLE[command_name](command))
+        key = json.dumps([command_name, collection, shape], sort_keys=True, default=str)
+        fingerprint = hashlib.md5(key.encode()).hexdigest()[:16]
+
+        logger.warning("Slow query", extra={
+            "duration_ms": round(duration_ms, 1), "command": command_name, "collection": collection,
+            "route": route, "fingerprint": fingerprint, "shape": json.dumps(shape, default=str)
+        })
+
+        now = time.time()
+        with self._lock:
+            entry = self._pending.get(fingerprint)
+            if entry is None:
+                entry = self._pending[fingerprint] = {
+                    "command": command_name,
+                    "collection": collection,
+                    "database": database_name,
+                    "shape": shape,
+                    "routes": set(),
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0
+                }
+            entry["routes"].add(route)
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+
+            recently = now - self._last_explained.get(fingerprint, 0) < self.explain_interval
+            if not recently and random.random() < self.explain_sample and self._explainable(command_name, command):
+                self._last_explained[fingerprint] = now
+                self._to_explain[fingerprint] = {
+                    "database": database_name,
+                    "command": {k: v for k, v in command.items() if not k.startswith("$") and k not in _DRIVER_FIELDS}
+                }
+
+    @staticmethod
+    def _explainable(command_name: str, command: dict) -> bool:
+        # Explaining $out/$merge with executionStats would write
+        if command_name == "aggregate":
+            return not any("$out" in stage or "$merge" in stage for stage in command.get("pipeline", []))
+        return True
+
+    async def flush(self, client) -> int:
+        """Persist pending slow queries and run their sampled explains"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            to_explain, self._to_explain = self._to_explain, {}
+        if not pending:
+            return 0
+
+        now = datetime.utcnow()
+        by_database: Dict[str, list] = {}
+        for fingerprint, entry in pending.items():
+            by_database.setdefault(entry["database"], []).append(UpdateOne(
+                {"_id": fingerprint},
+                {
+                    "$inc": {"count": entry["count"], "total_ms": entry["total_ms"]},
+                    "$max": {"max_ms": entry["max_ms"]},
+                    "$addToSet": {"routes": {"$each": sorted(entry["routes"])}},
+                    "$set": {"last_seen": now},
+                    "$setOnInsert": {
+                        "command": entry["command"],
+                        "collection": entry["collection"],
+                        # Stored as text: shapes carry "$" operator keys
+                        "shape": json.dumps(entry["shape"], sort_keys=True, default=str),
+                        "first_seen": now
+                    }
+                },
+                upsert=True
+            ))
+        for database_name, ops in by_database.items():
+            await client[database_name][SLOW_QUERIES_COLLECTION].bulk_write(ops, ordered=False)
+
+        for fingerprint, sample in to_explain.items():
+            database = client[sample["database"]]
+            try:
+                explain = await database.command({"explain": sample["command"], "verbosity": "executionStats"})
+            except Exception as e:
+                logger.warning("Could not explain slow query %s: %s", fingerprint, e, extra={"fingerprint": fingerprint})
+                continue
+            summary = summarize_explain(explain)
+            if summary["collscan"]:
+                logger.warning("Slow query is a COLLSCAN", extra={
+                    "fingerprint": fingerprint, "collection": pending[fingerprint]["collection"]
+                })
+            await database[SLOW_QUERIES_COLLECTION].update_one({"_id": fingerprint}, {"$set": {"explain": summary}})
+
+        return len(pending)
+
+
+slow_query_log = SlowQueryLog()
+
+
+async def ensure_indexes(db):
+    await db[SLOW_QUERIES_COLLECTION].create_index([("total_ms", DESCENDING)])
+
+
+async def flush_periodically(client, interval_seconds: int = 5):
+    """Background job: persist slow queries every interval_seconds"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await slow_query_log.flush(client)
+        except Exception:
+            logger.exception("Error flushing slow queries")
+
+
+async def get_top_slow_queries(db, limit: int = 20, sort: str = "total_ms", collscan_only: bool = False) -> list:
+    """Slow query fingerprints ranked by total, max or count"""
+    if sort not in ("total_ms", "max_ms", "count"):
+        raise ValueError("sort must be one of total_ms, max_ms, count")
+    query = {"explain.collscan": True} if collscan_only else {}
+    rows = []
+    async for row in db[SLOW_QUERIES_COLLECTION].find(query).sort(sort, -1).limit(limit):
+        row["fingerprint"] = row.pop("_id")
+        row["avg_ms"] = round(row["total_ms"] / row["count"], 1) if row.get("count") else None
+        rows.append(row)
+    return rows
@@ -0,0 +1,147 @@
+# backend/app/db/stock_alerts.py
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.events import event_bus, ADMIN_CHANNEL
+
+# Used for products that do not set their own reorder_threshold
+DEFAULT_REORDER_THRESHOLD = int(os.getenv("DEFAULT_REORDER_THRESHOLD", 10))
+
+ALERTS_COLLECTION = "stock_alerts"
+
+# Workers starting together refresh the flags once per lease
+LOCKS_COLLECTION = "job_locks"
+REFRESH_LOCK_ID = "low_stock_refresh"
+REFRESH_LEASE_MINUTES = 10
+
+_STOCK_FIELDS = {"name": 1, "stock": 1, "reorder_threshold": 1, "is_low_stock": 1, "is_active": 1}
+
+
+def reorder_threshold(product: dict) -> int:
+    threshold = product.get("reorder_threshold")
+    return DEFAULT_REORDER_THRESHOLD if threshold is None else threshold
+
+
+async def ensure_indexes(db):
+    # Only low stock products are indexed, so the index stays tiny
+    await db.products.create_index(
+        [("is_low_stock", ASCENDING)],
+        name="low_stock_partial",
+        partialFilterExpression={"is_low_stock": True}
+    )
+    await db[ALERTS_COLLECTION].create_index([("created_at", DESCENDING)])
+
+
+async def _acquire_refresh_lease(db, holder: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        await db[LOCKS_COLLECTION].find_one_and_update(
+            {"_id": REFRESH_LOCK_ID, "locked_until": {"$lt": now}},
+            {"$set": {"holder": holder, "locked_until": now + timedelta(minutes=REFRESH_LEASE_MINUTES)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Another worker refreshed within the lease
+        return False
+
+
+async def refresh_low_stock_flags(db) -> Optional[int]:
+    """Recompute is_low_stock where it is wrong, e.g. after stock was edited outside the API.
+
+    Only products whose flag differs are written. Runs at most once per
+    REFRESH_LEASE_MINUTES across all workers; returns None when skipped,
+    otherwise the number of products fixed.
+    """
+    if not await _acquire_refresh_lease(db, f"{os.uname().nodename}:{os.getpid()}"):
+        return None
+
+    is_low = {"$lt": ["$stock", {"$ifNull": ["$reorder_threshold", DEFAULT_REORDER_THRESHOLD]}]}
+    result = await db.products.update_many(
+        {"$expr": {"$ne": [{"$ifNull": ["$is_low_stock", None]}, is_low]}},
+        [{"$set": {"is_low_stock": is_low}}]
+    )
+    return result.modified_count
+
+
+async def check_stock_level(db, product: dict) -> Optional[str]:
+    """Flag or clear a product's low stock state and alert when it crosses its threshold.
+
+    The flag flip is a conditional update, so when concurrent writes cross
+    the threshold only one of them records and pushes the alert.
+    """
+    stock = product.get("stock", 0)
+    threshold = reorder_threshold(product)
+    is_low = stock < threshold
+
+    if is_low == product.get("is_low_stock", False):
+        return None
+
+    result = await db.products.update_one(
+        {"_id": product["_id"], "is_low_stock": {"$ne": is_low}},
+        {"$set": {"is_low_stock": is_low}}
+    )
+    if result.modified_count == 0:
+        return None
+
+    event = "low_stock" if is_low else "stock_restored"
+    alert = {
+        "event": event,
+        "product_id": str(product["_id"]),
+        "name": product.get("name"),
+        "stock": stock,
+        "reorder_threshold": threshold,
+        "created_at": datetime.utcnow()
+    }
+    await db[ALERTS_COLLECTION].insert_one(dict(alert))
+    event_bus.publish(ADMIN_CHANNEL, event, alert)
+    return event
+
+
+async def adjust_stock(db, product_id: str, delta: int, reserved_delta: int = 0) -> Optional[dict]:
+    """Change a product's stock by delta and check it against its reorder threshold"""
+    if not ObjectId.is_valid(product_id):
+        return None
+
+    inc = {"stock": delta}
+    if reserved_delta:
+        inc["reserved"] = reserved_delta
+
+    product = await db.products.find_one_and_update(
+        {"_id": ObjectId(product_id)},
+        {"$inc": inc},
+        projection=_STOCK_FIELDS,
+        return_document=ReturnDocument.AFTER
+    )
+    if product:
+        await check_stock_level(db, product)
+    return product
+
+
+async def get_low_stock_products(db) -> list:
+    """Active products currently below their reorder threshold"""
+    products = []
+    cursor = db.products.find({"is_low_stock": True, "is_active": True}, _STOCK_FIELDS | {"category": 1})
+
+    async for product in cursor:
+        products.append({
+            "id": str(product["_id"]),
+            "name": product["name"],
+            "stock": product["stock"],
+            "reorder_threshold": reorder_threshold(product),
+            "category": product.get("category")
+        })
+    return products
+
+
+async def get_recent_alerts(db, limit: int = 50) -> list:
+    alerts = []
+    async for alert in db[ALERTS_COLLECTION].find().sort("created_at", -1).limit(limit):
+        alert["id"] = str(alert.pop("_id"))
+        alerts.append(alert)
+    return alerts
@@ -0,0 +1,253 @@
+# backend/app/db/stock_holds.py
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
+from app.db import stock_alerts
+
+logger = logging.getLogger(__name__)
+
+# One document per order: {_id: order_id, items: [{product_id, quantity}], status, expires_at}
+# Products carry a "reserved" counter of units in active holds, so
+# available stock is stock - reserved without looking at the holds.
+HOLDS_COLLECTION = "stock_holds"
+
+HOLD_TTL_MINUTES = int(os.getenv("STOCK_HOLD_TTL_MINUTES", 15))
+# Finished holds are deleted by a TTL index after this long
+FINISHED_HOLD_RETENTION_DAYS = 7
+
+# Orders paid through a gateway hold stock until the payment settles
+ONLINE_PAYMENT_METHODS = ("bkash", "nagad", "upay", "online")
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id: str):
+        super().__init__(f"Insufficient stock for product {product_id}")
+        self.product_id = product_id
+
+
+def available_stock(product: dict) -> int:
+    return product.get("stock", 0) - product.get("reserved", 0)
+
+
+def _hold_lines(items: List[dict]) -> Dict[str, int]:
+    lines = {}
+    for item in items:
+        product_id = item.get("product_id")
+        quantity = int(item.get("quantity", 0))
+        if product_id and ObjectId.is_valid(product_id) and quantity > 0:
+            lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines
+
+
+async def ensure_indexes(db):
+    await db[HOLDS_COLLECTION].create_index([("status", ASCENDING), ("expires_at", ASCENDING)])
+    # A TTL index cannot give units back, so it only removes holds the sweeper already finished
+    await db[HOLDS_COLLECTION].create_index("purge_at", expireAfterSeconds=0)
+
+
+async def _change_reserved(db, lines: Dict[str, int], sign: int):
+    if not lines:
+        return
+    await db.products.bulk_write([
+        UpdateOne({"_id": ObjectId(product_id)}, {"$inc": {"reserved": sign * quantity}})
+        for product_id, quantity in lines.items()
+    ], ordered=False)
+
+
+async def place_hold(db, order_id: str, items: List[dict], ttl_minutes: int = HOLD_TTL_MINUTES) -> dict:
+    """Reserve an order's items until its payment settles or the hold expires.
+
+    Each product is reserved with a conditional increment, so two checkouts
+    can never hold the same last unit. Raises InsufficientStock (after
+    undoing any partial reservation) if a product cannot cover its quantity.
+    """
+    lines = _hold_lines(items)
+    reserved = {}
+
+    for product_id, quantity in lines.items():
+        result = await db.products.update_one(
+            {
+                "_id": ObjectId(product_id),
+                "$expr": {"$gte": [
+                    {"$subtract": ["$stock", {"$ifNull": ["$reserved", 0]}]},
+                    quantity
+                ]}
+            },
+            {"$inc": {"reserved": quantity}}
+        )
+        if result.modified_count == 0:
+            await _change_reserved(db, reserved, -1)
+            raise InsufficientStock(product_id)
+        reserved[product_id] = quantity
+
+    now = datetime.utcnow()
+    hold = {
+        "_id": order_id,
+        "items": [{"product_id": pid, "quantity": qty} for pid, qty in lines.items()],
+        "status": "active",
+        "created_at": now,
+        "expires_at": now + timedelta(minutes=ttl_minutes)
+    }
+    await db[HOLDS_COLLECTION].insert_one(hold)
+    return hold
+
+
+def _finished(reason: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "status": reason,
+        "finished_at": now,
+        "purge_at": now + timedelta(days=FINISHED_HOLD_RETENTION_DAYS)
+    }
+
+
+async def convert_hold(db, order_id: str) -> bool:
+    """Turn a hold into a real stock decrement once the order is paid.
+
+    A hold that already expired still takes its stock, since the customer
+    has paid; only units of an active hold are also taken off reserved.
+    One released because the order was cancelled is left alone: the order
+    holds no stock until it is un-cancelled (take_order_stock).
+    Returns False if the order has no hold to convert.
+    """
+    hold = await db[HOLDS_COLLECTION].find_one_and_update(
+        {"_id": order_id, "$or": [
+            {"status": "active"},
+            {"status": "released", "release_reason": {"$ne": "cancelled"}}
+        ]},
+        {"$set": _finished("converted")},
+        return_document=ReturnDocument.BEFORE
+    )
+    if hold is None:
+        return False
+
+    was_active = hold["status"] == "active"
+    for item in hold["items"]:
+        quantity = item["quantity"]
+        await stock_alerts.adjust_stock(db, item["product_id"], -quantity, -quantity if was_active else 0)
+    return True
+
+
+async def release_hold(db, order_id: str, reason: str = "released") -> bool:
+    """Give an active hold's units back; returns False if it was not active"""
+    hold = await db[HOLDS_COLLECTION].find_one_and_update(
+        {"_id": order_id, "status": "active"},
+        {"$set": {**_finished("released"), "release_reason": reason}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if hold is None:
+        return False
+
+    await _change_reserved(db, _hold_lines(hold["items"]), -1)
+    return True
+
+
+async def return_order_stock(db, order_id: str, items: List[dict]):
+    """Undo an order's effect on stock when it is cancelled"""
+    hold = await db[HOLDS_COLLECTION].find_one({"_id": order_id}, {"status": 1})
+
+    if hold is None or hold["status"] == "converted":
+        for item in items:
+            await stock_alerts.adjust_stock(db, item.get("product_id"), item.get("quantity", 0))
+    elif hold["status"] == "active":
+        await release_hold(db, order_id, "cancelled")
+    # A released hold already gave its units back
+
+
+async def take_order_stock(db, order_id: str, items: List[dict]):
+    """Take stock for an order again when it is un-cancelled"""
+    if await convert_hold(db, order_id):
+        return
+    for item in items:
+        await stock_alerts.adjust_stock(db, item.get("product_id"), -item.get("quantity", 0))
+
+
+async def release_expired_holds(db) -> int:
+    """Release every active hold past its expiry"""
+    released = 0
+    cursor = db[HOLDS_COLLECTION].find(
+        {"status": "active", "expires_at": {"$lte": datetime.utcnow()}},
+        {"_id": 1}
+    )
+    async for hold in cursor:
+        if await release_hold(db, hold["_id"], "expired"):
+            released += 1
+    return released
+
+
+# Seconds between the two drift readings of rebuild_reserved_counts
+RESERVED_SETTLE_SECONDS = 5
+
+
+async def _reserved_drift(db) -> Dict[str, int]:
+    """products.reserved minus the units of active holds, per product that differs"""
+    totals = {}
+    pipeline = [
+        {"$match": {"status": "active"}},
+        {"$unwind": "$items"},
+        {"$group": {"_id": "$items.product_id", "reserved": {"$sum": "$items.quantity"}}}
+    ]
+    async for row in db[HOLDS_COLLECTION].aggregate(pipeline):
+        totals[row["_id"]] = row["reserved"]
+
+    drift = {}
+    cursor = db.products.find(
+        {"$or": [
+            {"reserved": {"$nin": [0, None]}},
+            {"_id": {"$in": [ObjectId(pid) for pid in totals if ObjectId.is_valid(pid)]}}
+        ]},
+        {"reserved": 1}
+    )
+    async for product in cursor:
+        product_id = str(product["_id"])
+        difference = (product.get("reserved") or 0) - totals.get(product_id, 0)
+        if difference:
+            drift[product_id] = difference
+    return drift
+
+
+async def rebuild_reserved_counts(db, settle_seconds: float = RESERVED_SETTLE_SECONDS) -> int:
+    """Correct products.reserved where it drifted from the active holds.
+
+    Repairs counters left behind if the process stopped between reserving
+    units and recording the hold. A checkout in flight looks like drift
+    for a moment, so the drift is measured twice, settle_seconds apart,
+    and only what both readings agree on is taken off with $inc, which
+    leaves concurrent reservations intact. Still a maintenance job: run
+    it from the admin endpoint, not at every startup.
+    """
+    first = await _reserved_drift(db)
+    if not first:
+        return 0
+    await asyncio.sleep(settle_seconds)
+    second = await _reserved_drift(db)
+
+    fixes = {}
+    for product_id, difference in first.items():
+        again = second.get(product_id, 0)
+        if difference * again > 0:
+            fixes[product_id] = min(difference, again, key=abs)
+    if fixes:
+        await db.products.bulk_write([
+            UpdateOne({"_id": ObjectId(pid)}, {"$inc": {"reserved": -difference}})
+            for pid, difference in fixes.items()
+        ], ordered=False)
+    return len(fixes)
+
+
+async def release_expired_periodically(db, interval_seconds: int):
+    """Background job: release expired holds every interval_seconds"""
+    while True:
+        try:
+            released = await release_expired_holds(db)
+            if released:
+                logger.info("Released expired stock holds", extra={"released": released})
+        except Exception:
+            logger.exception("Error releasing stock holds")
+        await asyncio.sleep(interval_seconds)
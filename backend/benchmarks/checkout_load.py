@@ -0,0 +1,198 @@
+# backend/benchmarks/checkout_load.py
+"""Drive initiate -> callback -> status checkouts at a target rate.
+
+Each journey initiates a payment, lets the gateway (normally
+benchmarks.mock_gateway) post its callback, and long-polls
+/api/payment/status until the payment is final. Journeys start on an
+open-loop schedule, so a slow backend shows up as latency and not as a
+lower request rate. Run from the backend directory against a running API:
+
+    python -m benchmarks.checkout_load --api-url http://127.0.0.1:8000 --rps 20 --duration 60
+
+Pass --output to save the report as JSON for later comparison. With an
+admin account (--admin-email / --admin-password) the report also carries
+the backend's gateway latency from /api/admin/payment/metrics.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+STAGES = ("initiate", "status", "total")
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def summarize(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0
+    }
+
+
+class CheckoutLoad:
+    def __init__(self, api_url: str, methods: List[str], wait: int, timeout: float, seed: int,
+                 admin_email: Optional[str] = None, admin_password: Optional[str] = None):
+        self.api_url = api_url.rstrip("/")
+        self.admin_email = admin_email
+        self.admin_password = admin_password
+        self.methods = methods
+        self.wait = wait
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.outcomes: Dict[str, int] = {}
+        self.status_requests = 0
+
+    def _count(self, outcome: str):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    async def journey(self, client: httpx.AsyncClient):
+        method = self.rng.choice(self.methods)
+        order_id = f"LOAD-{uuid.uuid4().hex[:12].upper()}"
+        started = time.perf_counter()
+
+        try:
+            response = await client.post(f"{self.api_url}/api/payment/initiate", json={
+                "order_id": order_id,
+                "amount": round(self.rng.uniform(500, 50000), 2),
+                "payment_method": method,
+                "customer_name": "Load Test",
+                "customer_phone": "01700000000",
+                "customer_email": "loadtest@example.com"
+            })
+            self.samples["initiate"].append(time.perf_counter() - started)
+            if response.status_code != 200:
+                self._count(f"initiate_{response.status_code}")
+                return
+            payment_id = response.json()["payment_id"]
+
+            status_started = time.perf_counter()
+            deadline = started + self.timeout
+            while True:
+                self.status_requests += 1
+                response = await client.get(
+                    f"{self.api_url}/api/payment/status/{payment_id}",
+                    params={"wait": self.wait}
+                )
+                if response.status_code != 200:
+                    self._count(f"status_{response.status_code}")
+                    return
+                status = response.json()["payment"]["status"]
+                if status in ("completed", "failed"):
+                    break
+                if time.perf_counter() >= deadline:
+                    self._count("timed_out")
+                    return
+
+            finished = time.perf_counter()
+            self.samples["status"].append(finished - status_started)
+            self.samples["total"].append(finished - started)
+            self._count(status)
+
+        except httpx.HTTPError as e:
+            self._count(type(e).__name__)
+
+    async def backend_metrics(self, client: httpx.AsyncClient) -> Optional[dict]:
+        """Gateway latency as the backend measured it, if an admin login is given"""
+        if not self.admin_email:
+            return None
+        try:
+            login = await client.post(f"{self.api_url}/api/auth/login", json={
+                "email_or_phone": self.admin_email, "password": self.admin_password
+            })
+            login.raise_for_status()
+            response = await client.get(
+                f"{self.api_url}/api/admin/payment/metrics",
+                headers={"Authorization": f"Bearer {login.json()['access_token']}"}
+            )
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError, KeyError):
+            return None
+
+    async def run(self, rps: float, duration: float) -> dict:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+        async with httpx.AsyncClient(timeout=self.wait + 30, limits=limits) as client:
+            tasks = []
+            interval = 1 / rps
+            started = time.perf_counter()
+            next_start = started
+
+            while next_start - started < duration:
+                tasks.append(asyncio.create_task(self.journey(client)))
+                next_start += interval
+                await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+
+            offered_seconds = time.perf_counter() - started
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+            gateways = await self.backend_metrics(client)
+
+        return {
+            "target_rps": rps,
+            "offered_rps": round(len(tasks) / offered_seconds, 2),
+            "journeys": len(tasks),
+            "elapsed_seconds": round(elapsed, 2),
+            "status_requests_per_journey": round(self.status_requests / max(len(tasks), 1), 2),
+            "outcomes": self.outcomes,
+            "latency": {stage: summarize(self.samples[stage]) for stage in STAGES},
+            "backend_metrics": gateways
+        }
+
+
+def print_report(report: dict):
+    print(f"{report['journeys']} journeys at {report['offered_rps']}/s (target {report['target_rps']}/s), "
+          f"{report['elapsed_seconds']}s")
+    print(f"outcomes: {report['outcomes']}")
+    print(f"status requests per journey: {report['status_requests_per_journey']}")
+    print(f"{'stage':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, row in report["latency"].items():
+        print(f"{stage:<10}{row['count']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--methods", default="bkash,nagad,upay")
+    parser.add_argument("--wait", type=int, default=25, help="long-poll seconds per status request")
+    parser.add_argument("--timeout", type=float, default=120.0, help="give up on a journey after this long")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--admin-email", default=os.getenv("LOADTEST_ADMIN_EMAIL"))
+    parser.add_argument("--admin-password", default=os.getenv("LOADTEST_ADMIN_PASSWORD"))
+    args = parser.parse_args()
+
+    load = CheckoutLoad(args.api_url, args.methods.split(","), args.wait, args.timeout, args.seed,
+                        args.admin_email, args.admin_password)
+    report = asyncio.run(load.run(args.rps, args.duration))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = sum(n for outcome, n in report["outcomes"].items() if outcome not in ("completed", "failed"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
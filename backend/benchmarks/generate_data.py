@@ -0,0 +1,419 @@
+# backend/benchmarks/generate_data.py
+"""Fill a local MongoDB with production-sized synthetic data.
+
+Writes products, users, orders (with items and shipping addresses),
+payments for gateway orders, carts and coupons straight to the database
+with batched insert_many, several batches in flight at once. Each batch
+draws from its own Random seeded by (--seed, collection, batch number)
+and _ids are built from the creation time and row number, so the same
+arguments always produce the same data, whatever the batch timing.
+
+Afterwards the derived data the app maintains incrementally (product
+sales totals and daily rollups, order counters, customer sketches) is
+rebuilt from the orders, unless --skip-derived is given. Indexes are
+left to the app's startup, which is faster after a bulk load.
+
+From the backend directory, against a local mongod:
+
+    python -m benchmarks.generate_data --drop
+    python -m benchmarks.generate_data --products 1000 --users 10000 --orders 100000 --drop
+
+The defaults (100k products, 1M users, 10M orders) need a few GB of disk.
+Every shopper's password is "password123"; admin@timora.com / admin123
+is created for the admin journeys in benchmarks.journeys.
+"""
+import argparse
+import asyncio
+import os
+import random
+import struct
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from passlib.context import CryptContext
+
+from app.db import customer_sketches, order_counters, product_sales
+
+COLLECTIONS = ("products", "users", "orders", "payments", "carts", "coupons",
+               product_sales.DAILY_COLLECTION, order_counters.COUNTERS_COLLECTION,
+               customer_sketches.SKETCH_COLLECTION)
+
+# Everything is created between these two dates
+HISTORY_START = datetime(2023, 1, 1)
+HISTORY_END = datetime(2025, 1, 1)
+
+SHOPPER_PASSWORD = "password123"
+
+BRANDS = ("Seiko", "Casio", "Titan", "Citizen", "Orient", "Fossil", "Tissot", "Timex", "Bulova", "Hamilton",
+          "Swatch", "Sonata", "Fastrack", "Curren", "Naviforce", "Michael Kors", "Daniel Wellington", "Rolex")
+CATEGORIES = ("men", "women", "couple", "smart")
+LINES = ("Presage", "Prospex", "G-Shock", "Edifice", "Raga", "Eco-Drive", "Bambino", "Grandson", "Marine Star",
+         "Khaki", "Classic", "Heritage", "Chronograph", "Diver", "Pilot", "Field", "Dress", "Sport")
+MOVEMENTS = ("Automatic", "Quartz", "Solar", "Mechanical", "Kinetic")
+CASE_SIZES = ("36mm", "38mm", "40mm", "41mm", "42mm", "44mm", "46mm")
+WATER_RESISTANCE = ("30m", "50m", "100m", "200m")
+WARRANTIES = ("1 year", "2 years", "3 years")
+STRAPS = ("Leather", "Stainless Steel", "Rubber", "Nylon", "Ceramic")
+GLASS = ("Mineral", "Sapphire", "Hardlex", "Acrylic")
+FIRST_NAMES = ("Rahim", "Karim", "Nusrat", "Farhana", "Tanvir", "Sadia", "Arif", "Mitu", "Imran", "Sumaiya",
+               "Hasan", "Jannat", "Rafi", "Tania", "Sakib", "Anika", "Fahim", "Riya", "Nabil", "Sharmin")
+LAST_NAMES = ("Ahmed", "Hossain", "Islam", "Rahman", "Khan", "Chowdhury", "Uddin", "Akter", "Sarkar", "Das")
+CITIES = ("Dhaka", "Chattogram", "Sylhet", "Khulna", "Rajshahi", "Barishal", "Rangpur", "Mymensingh", "Cumilla")
+AREAS = ("Dhanmondi", "Gulshan", "Mirpur", "Uttara", "Banani", "Mohammadpur", "Bashundhara", "Motijheel")
+
+ORDER_STATUSES = ("delivered", "shipped", "processing", "pending", "cancelled")
+ORDER_STATUS_WEIGHTS = (70, 8, 7, 8, 7)
+PAYMENT_METHODS = ("cod", "bkash", "nagad", "upay")
+PAYMENT_METHOD_WEIGHTS = (55, 30, 10, 5)
+
+# First byte after the timestamp in generated _ids, so collections never collide
+ID_KINDS = {"products": 1, "users": 2, "orders": 3, "payments": 4, "carts": 5, "coupons": 6}
+
+
+def make_id(kind: str, index: int, created_at: datetime) -> ObjectId:
+    """Deterministic ObjectId that still sorts by creation time"""
+    seconds = int((created_at - datetime(1970, 1, 1)).total_seconds())
+    return ObjectId(struct.pack(">IB", seconds, ID_KINDS[kind]) + index.to_bytes(7, "big"))
+
+
+def spread(index: int, count: int) -> datetime:
+    """Creation time of row index when count rows are spread over the history"""
+    return HISTORY_START + (HISTORY_END - HISTORY_START) * (index / max(count, 1))
+
+
+def batch_rng(seed: int, kind: str, batch: int) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{batch}")
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.password_hash = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(SHOPPER_PASSWORD)
+        # (id, name, price, image) per product, for order and cart lines
+        self.products: List[tuple] = []
+        self.coupons: List[dict] = []
+
+    # -------------------- Documents --------------------
+
+    def product_batch(self, rng: random.Random, start: int, end: int) -> List[dict]:
+        count = self.args.products
+        n = end - start
+        brands = rng.choices(BRANDS, k=n)
+        lines = rng.choices(LINES, k=n)
+        categories = rng.choices(CATEGORIES, weights=(50, 30, 10, 10), k=n)
+        docs = []
+        for offset, index in enumerate(range(start, end)):
+            created_at = spread(index, count)
+            price = round(rng.lognormvariate(9.4, 0.6) / 10) * 10
+            discounted = rng.random() < 0.3
+            name = f"{brands[offset]} {lines[offset]} {rng.choice(CASE_SIZES)} {index:06d}"
+            doc = {
+                "_id": make_id("products", index, created_at),
+                "name": name,
+                "description": f"{brands[offset]} {lines[offset].lower()} watch with {rng.choice(GLASS).lower()} "
+                               f"crystal, {rng.choice(STRAPS).lower()} strap and {rng.choice(MOVEMENTS).lower()} movement",
+                "price": float(price),
+                "original_price": float(round(price * rng.uniform(1.1, 1.4), -1)) if discounted else None,
+                "category": categories[offset],
+                "brand": brands[offset],
+                "stock": rng.randint(0, 200),
+                "images": [f"/images/products/{index % 500}.jpg", f"/images/products/{(index + 1) % 500}.jpg"],
+                "is_featured": rng.random() < 0.02,
+                "is_active": rng.random() < 0.97,
+                "model": f"{brands[offset][:3].upper()}-{rng.randint(1000, 9999)}",
+                "movement": rng.choice(MOVEMENTS),
+                "case_size": rng.choice(CASE_SIZES),
+                "water_resistance": rng.choice(WATER_RESISTANCE),
+                "warranty": rng.choice(WARRANTIES),
+                "specifications": {
+                    "strap": rng.choice(STRAPS),
+                    "glass": rng.choice(GLASS),
+                    "dial_color": rng.choice(("Black", "White", "Blue", "Green", "Silver", "Gold")),
+                    "weight_g": rng.randint(40, 220)
+                },
+                "reorder_threshold": rng.choice((None, 5, 10)),
+                "created_at": created_at,
+                "updated_at": created_at
+            }
+            docs.append(doc)
+            self.products.append((str(doc["_id"]), name, doc["price"], doc["images"][0]))
+        return docs
+
+    def user_batch(self, rng: random.Random, start: int, end: int) -> List[dict]:
+        count = self.args.users
+        docs = []
+        for index in range(start, end):
+            created_at = spread(index, count)
+            docs.append({
+                "_id": make_id("users", index, created_at),
+                "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "email": f"user{index}@example.com",
+                "phone": f"01{3 + index % 7}{index:08d}",
+                "password_hash": self.password_hash,
+                "is_active": rng.random() < 0.99,
+                "is_admin": False,
+                "created_at": created_at,
+                "updated_at": created_at
+            })
+        return docs
+
+    def user_ref(self, index: int) -> tuple:
+        created_at = spread(index, self.args.users)
+        return str(make_id("users", index, created_at)), f"user{index}@example.com", created_at
+
+    def address(self, rng: random.Random, name: str, email: str) -> dict:
+        return {
+            "full_name": name,
+            "phone": f"01{rng.randint(3, 9)}{rng.randint(0, 99999999):08d}",
+            "email": email,
+            "address_line1": f"House {rng.randint(1, 120)}, Road {rng.randint(1, 40)}, {rng.choice(AREAS)}",
+            "address_line2": "",
+            "city": rng.choice(CITIES),
+            "postal_code": str(rng.randint(1000, 9999))
+        }
+
+    def order_lines(self, rng: random.Random) -> List[dict]:
+        picked = rng.sample(self.products, k=min(rng.choices((1, 2, 3, 4), weights=(70, 20, 7, 3))[0],
+                                                  len(self.products)))
+        return [
+            {"product_id": pid, "product_name": name, "price": price,
+             "quantity": rng.choices((1, 2, 3), weights=(85, 12, 3))[0], "image": image}
+            for pid, name, price, image in picked
+        ]
+
+    def order_batch(self, rng: random.Random, start: int, end: int):
+        count = self.args.orders
+        n = end - start
+        statuses = rng.choices(ORDER_STATUSES, weights=ORDER_STATUS_WEIGHTS, k=n)
+        methods = rng.choices(PAYMENT_METHODS, weights=PAYMENT_METHOD_WEIGHTS, k=n)
+        # A few heavy buyers place many orders, like real customers
+        buyers = [min(int(rng.paretovariate(1.2)) - 1, self.args.users - 1) if rng.random() < 0.2
+                  else rng.randrange(self.args.users) for _ in range(n)]
+
+        orders, payments = [], []
+        for offset, index in enumerate(range(start, end)):
+            user_id, email, joined = self.user_ref(buyers[offset])
+            created_at = max(spread(index, count), joined) + timedelta(seconds=rng.randint(0, 3600))
+            items = self.order_lines(rng)
+            subtotal = sum(item["price"] * item["quantity"] for item in items)
+            coupon = rng.choice(self.coupons) if self.coupons and rng.random() < 0.1 else None
+            discount = 0.0
+            if coupon and subtotal >= (coupon["min_order_amount"] or 0):
+                discount = coupon["discount_value"] if coupon["discount_type"] == "fixed" \
+                    else min(subtotal * coupon["discount_value"] / 100, coupon["max_discount"] or subtotal)
+            shipping_cost = 60.0 if rng.random() < 0.6 else 120.0
+            status, method = statuses[offset], methods[offset]
+            order_id = f"ORD{index:010d}"
+
+            if method == "cod":
+                payment_status = "paid" if status == "delivered" else "pending"
+            else:
+                payment_status = "failed" if status == "cancelled" else "paid"
+
+            orders.append({
+                "_id": make_id("orders", index, created_at),
+                "order_id": order_id,
+                "user_id": user_id,
+                "user_email": email,
+                "items": items,
+                "shipping_address": self.address(rng, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", email),
+                "payment_method": method,
+                "payment_status": payment_status,
+                "subtotal": subtotal,
+                "shipping_cost": shipping_cost,
+                "coupon_code": coupon["code"] if discount else None,
+                "discount_amount": round(discount, 2),
+                "total_amount": round(subtotal + shipping_cost - discount, 2),
+                "order_status": status,
+                "notes": None,
+                "stock_hold_expires_at": None,
+                "created_at": created_at,
+                "updated_at": created_at + timedelta(days=rng.randint(0, 6))
+            })
+
+            if method != "cod":
+                completed = payment_status == "paid"
+                payments.append({
+                    "_id": make_id("payments", index, created_at),
+                    "payment_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    "order_id": order_id,
+                    "amount": round(subtotal + shipping_cost - discount, 2),
+                    "payment_method": method,
+                    "customer_name": orders[-1]["shipping_address"]["full_name"],
+                    "customer_phone": orders[-1]["shipping_address"]["phone"],
+                    "customer_email": email,
+                    "status": "completed" if completed else "failed",
+                    "transaction_id": f"TRX{rng.getrandbits(40):010X}" if completed else None,
+                    "created_at": created_at,
+                    "completed_at": created_at + timedelta(minutes=rng.randint(1, 10)) if completed else None
+                })
+        return orders, payments
+
+    def cart_batch(self, rng: random.Random, start: int, end: int) -> List[dict]:
+        step = max(self.args.users // max(self.args.carts, 1), 1)
+        docs = []
+        for index in range(start, end):
+            user_id, _, joined = self.user_ref(min(index * step, self.args.users - 1))
+            items = self.order_lines(rng)
+            updated_at = joined + (HISTORY_END - joined) * rng.random()
+            docs.append({
+                "_id": make_id("carts", index, joined),
+                "user_id": user_id,
+                "items": items,
+                "total": sum(item["price"] * item["quantity"] for item in items),
+                "created_at": joined,
+                "updated_at": updated_at
+            })
+        return docs
+
+    def coupon_docs(self) -> List[dict]:
+        rng = batch_rng(self.args.seed, "coupons", 0)
+        docs = []
+        for index in range(self.args.coupons):
+            valid_from = spread(index, self.args.coupons)
+            percentage = rng.random() < 0.6
+            docs.append({
+                "_id": make_id("coupons", index, valid_from),
+                "code": f"SAVE{index:04d}",
+                "description": "Generated coupon",
+                "discount_type": "percentage" if percentage else "fixed",
+                "discount_value": float(rng.choice((5, 10, 15, 20))) if percentage else float(rng.choice((100, 250, 500))),
+                "min_order_amount": float(rng.choice((0, 2000, 5000))),
+                "max_discount": float(rng.choice((500, 1000, 2000))) if percentage else None,
+                "usage_limit": rng.choice((None, 100, 1000)),
+                "used_count": 0,
+                "valid_from": valid_from,
+                "valid_until": valid_from + timedelta(days=rng.choice((7, 30, 90, 365))),
+                "is_active": rng.random() < 0.8,
+                "created_at": valid_from,
+                "updated_at": valid_from
+            })
+        return docs
+
+    # -------------------- Writing --------------------
+
+    async def insert_all(self, db, kind: str, total: int, build: Callable):
+        """Build and insert total rows of one kind in batches, a few in flight"""
+        if total <= 0:
+            return
+        batch_size = self.args.batch_size
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        inserted = 0
+        started = time.perf_counter()
+
+        async def write(collection: str, docs: List[dict]):
+            try:
+                await db[collection].insert_many(docs, ordered=False, bypass_document_validation=True)
+            finally:
+                semaphore.release()
+
+        tasks = []
+        for batch, start in enumerate(range(0, total, batch_size)):
+            built = build(batch_rng(self.args.seed, kind, batch), start, min(start + batch_size, total))
+            for collection, docs in (built.items() if isinstance(built, dict) else [(kind, built)]):
+                if docs:
+                    await semaphore.acquire()
+                    tasks.append(asyncio.create_task(write(collection, docs)))
+            inserted = min(start + batch_size, total)
+            # Keep the pending task list from holding every batch in memory, and
+            # stop at the first failed insert rather than leave the data short
+            for task in tasks:
+                if task.done():
+                    task.result()
+            tasks = [task for task in tasks if not task.done()]
+            rate = inserted / max(time.perf_counter() - started, 1e-9)
+            print(f"\r{kind}: {inserted:,}/{total:,} ({rate:,.0f}/s)", end="", file=sys.stderr)
+
+        await asyncio.gather(*tasks)
+        print(f"\r{kind}: {total:,} in {time.perf_counter() - started:.1f}s" + " " * 20, file=sys.stderr)
+
+    async def rebuild_derived(self, db):
+        """Recompute what the app keeps up to date order by order"""
+        started = time.perf_counter()
+        rollups = await product_sales.rebuild(db)
+        print(f"product sales: {rollups:,} daily rollups in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        counters = await order_counters.reconcile_order_counters(db)
+        print(f"order counters: {counters['total']:,} orders", file=sys.stderr)
+
+        started = time.perf_counter()
+        buckets = await customer_sketches.rebuild_customer_sketches(db)
+        print(f"customer sketches: {buckets} buckets in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    async def run(self):
+        args = self.args
+        client = AsyncIOMotorClient(args.mongodb_url)
+        db = client[args.database]
+        try:
+            if args.drop:
+                for name in COLLECTIONS:
+                    await db[name].drop()
+
+            self.coupons = self.coupon_docs()
+            if self.coupons:
+                await db.coupons.insert_many(self.coupons, ordered=False)
+                print(f"coupons: {len(self.coupons):,}", file=sys.stderr)
+
+            await self.insert_all(db, "products", args.products, self.product_batch)
+            if not self.products:
+                raise SystemExit("Orders and carts need products; use --products > 0")
+            await self.insert_all(db, "users", args.users, self.user_batch)
+            await db.users.update_one(
+                {"email": "admin@timora.com"},
+                {"$setOnInsert": {
+                    "full_name": "Admin User",
+                    "phone": "0000000000",
+                    "password_hash": CryptContext(schemes=["bcrypt"], deprecated="auto").hash(args.admin_password),
+                    "is_active": True,
+                    "is_admin": True,
+                    "created_at": HISTORY_START,
+                    "updated_at": HISTORY_START
+                }},
+                upsert=True
+            )
+            await self.insert_all(db, "carts", args.carts, self.cart_batch)
+            await self.insert_all(db, "orders", args.orders, lambda rng, start, end: dict(
+                zip(("orders", "payments"), self.order_batch(rng, start, end))
+            ))
+
+            if not args.skip_derived:
+                await self.rebuild_derived(db)
+        finally:
+            client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL_OVERRIDE", "mongodb://127.0.0.1:27017"))
+    parser.add_argument("--database", default=os.getenv("DATABASE_NAME", "timora_scale"))
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--carts", type=int, default=100_000)
+    parser.add_argument("--coupons", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many calls in flight")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--drop", action="store_true", help="drop the generated collections first")
+    parser.add_argument("--skip-derived", action="store_true", help="do not rebuild sales, counters and sketches")
+    parser.add_argument("--allow-remote", action="store_true", help="allow a mongodb+srv:// (Atlas) URL")
+    args = parser.parse_args()
+
+    if args.mongodb_url.startswith("mongodb+srv://") and not args.allow_remote:
+        parser.error("refusing to bulk load a remote cluster; pass --allow-remote if you really mean it")
+    if args.users <= 0 and (args.orders or args.carts):
+        parser.error("orders and carts need --users > 0")
+
+    started = time.perf_counter()
+    asyncio.run(Generator(args).run())
+    print(f"done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# backend/benchmarks/hll_accuracy.py
+"""Validate HyperLogLog distinct-customer estimates against exact counts.
+
+Simulates order streams with repeat buyers, then compares the sketch
+estimate with an exact set count for single buckets and for merged
+per-day buckets. Run from the backend directory:
+
+    python -m benchmarks.hll_accuracy
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.core.hll import HyperLogLog, DEFAULT_PRECISION
+
+CARDINALITIES = [100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def simulate_orders(customers: int, orders_per_customer: float, rng: random.Random):
+    """Yield user ids for an order stream where buyers order repeatedly"""
+    for _ in range(int(customers * orders_per_customer)):
+        yield f"user-{rng.randrange(customers)}"
+
+
+def run_single_bucket(cardinality: int, precision: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    sketch = HyperLogLog(precision)
+    exact = set()
+
+    started = time.perf_counter()
+    for user_id in simulate_orders(cardinality, 3, rng):
+        sketch.add(user_id)
+    sketch_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for user_id in simulate_orders(cardinality, 3, rng):
+        exact.add(user_id)
+    exact_seconds = time.perf_counter() - started
+
+    estimate = sketch.count()
+    return {
+        "exact": len(exact),
+        "estimate": estimate,
+        "error": abs(estimate - len(exact)) / max(len(exact), 1),
+        "bytes": len(sketch.to_bytes()),
+        "sketch_seconds": sketch_seconds,
+        "exact_seconds": exact_seconds
+    }
+
+
+def run_merged_days(customers: int, days: int, precision: int, seed: int) -> dict:
+    """Daily sketches merged into a range must match the distinct count over the range"""
+    rng = random.Random(seed)
+    daily = []
+    exact = set()
+
+    for _ in range(days):
+        sketch = HyperLogLog(precision)
+        # Draw from the whole customer base so buyers recur across days
+        for user_id in simulate_orders(customers, 2 / days, rng):
+            sketch.add(user_id)
+            exact.add(user_id)
+        daily.append(sketch)
+
+    merged = HyperLogLog(precision)
+    for sketch in daily:
+        merged.merge(sketch)
+
+    estimate = merged.count()
+    return {
+        "exact": len(exact),
+        "estimate": estimate,
+        "error": abs(estimate - len(exact)) / max(len(exact), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-cardinality", type=int, default=CARDINALITIES[-1])
+    args = parser.parse_args()
+
+    standard_error = HyperLogLog(args.precision).error_rate
+    # Allow three standard errors before calling an estimate out of bounds
+    bound = 3 * standard_error
+    failures = 0
+
+    print(f"precision={args.precision} standard error={standard_error:.4%} bound={bound:.4%}")
+    print(f"{'exact':>10} {'estimate':>10} {'error':>8} {'bytes':>7} {'sketch s':>9} {'set s':>7}")
+
+    for cardinality in CARDINALITIES:
+        if cardinality > args.max_cardinality:
+            break
+        result = run_single_bucket(cardinality, args.precision, args.seed)
+        failures += result["error"] > bound
+        print(
+            f"{result['exact']:>10} {result['estimate']:>10} {result['error']:>8.3%} "
+            f"{result['bytes']:>7} {result['sketch_seconds']:>9.2f} {result['exact_seconds']:>7.2f}"
+        )
+
+    merged = run_merged_days(min(100_000, args.max_cardinality), 30, args.precision, args.seed)
+    failures += merged["error"] > bound
+    print(
+        f"30 merged daily sketches: exact={merged['exact']} "
+        f"estimate={merged['estimate']} error={merged['error']:.3%}"
+    )
+
+    if failures:
+        print(f"{failures} estimate(s) outside {bound:.4%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# backend/benchmarks/journeys.py
+"""Load test the storefront and admin journeys and compare against a baseline.
+
+Virtual users repeatedly pick a journey (weighted like real traffic) and
+walk through its steps with a short think time between them:
+
+    browse    home sliders and brands, featured products, a filtered
+              listing, a product detail page
+    search    search-as-you-type on part of a product name
+    cart      add to cart, change the quantity, view the cart
+    checkout  add to cart, validate a coupon, place a COD order
+    admin     dashboard, today's stats, recent orders
+
+Every request is timed under its step name and the report gives
+throughput, errors and p50/p95/p99 per step.
+
+Run the API against a local database, not Atlas, e.g.
+
+    MONGODB_URL_OVERRIDE=mongodb://127.0.0.1:27017 DATABASE_NAME=timora_load REDIS_HOST=127.0.0.1 \\
+        uvicorn main:app --port 8000
+
+with an admin account (create_admin.py) and products loaded, then from
+the backend directory:
+
+    python -m benchmarks.journeys --users 50 --duration 60 --save-baseline local
+    python -m benchmarks.journeys --users 50 --duration 60 --baseline local
+
+--baseline exits 1 if any step's p95 or p99 is more than --tolerance
+slower than the saved run, or its error rate went up. Baselines live in
+benchmarks/baselines/<name>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.checkout_load import summarize
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+COUPON_CODE = "LOADTEST10"
+SHOPPER_PASSWORD = "loadtest-password"
+
+# Relative share of virtual user iterations per journey
+JOURNEY_WEIGHTS = {
+    "browse": 40,
+    "search": 25,
+    "cart": 15,
+    "checkout": 10,
+    "admin": 10
+}
+
+
+class Catalog:
+    """Product data the journeys pick from, read once before the run"""
+
+    def __init__(self, products: List[dict]):
+        self.products = [p for p in products if p.get("is_active", True)]
+        self.brands = sorted({p["brand"] for p in self.products if p.get("brand")})
+        self.categories = sorted({p["category"] for p in self.products if p.get("category")})
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, step: str, seconds: float, error: Optional[str] = None):
+        self.samples.setdefault(step, []).append(seconds)
+        if error:
+            by_kind = self.errors.setdefault(step, {})
+            by_kind[error] = by_kind.get(error, 0) + 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, catalog: Catalog, token: str,
+                 admin_token: str, rng: random.Random, think_time: float):
+        self.client = client
+        self.recorder = recorder
+        self.catalog = catalog
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        self.rng = rng
+        self.think_time = think_time
+
+    async def step(self, name: str, method: str, url: str, admin: bool = False, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, headers=self.admin_headers if admin else self.headers, **kwargs
+            )
+        except httpx.HTTPError as e:
+            self.recorder.record(name, time.perf_counter() - started, type(e).__name__)
+            return None
+        error = None if response.status_code < 400 else str(response.status_code)
+        self.recorder.record(name, time.perf_counter() - started, error)
+        return response if error is None else None
+
+    async def think(self, scale: float = 1.0):
+        if self.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / (self.think_time * scale)))
+
+    def product(self) -> dict:
+        return self.rng.choice(self.catalog.products)
+
+    # -------------------- Journeys --------------------
+
+    async def browse(self):
+        await asyncio.gather(
+            self.step("home.sliders", "GET", "/api/sliders"),
+            self.step("home.brands", "GET", "/api/brands/active"),
+            self.step("home.featured", "GET", "/api/products", params={"is_featured": "true", "limit": 8})
+        )
+        await self.think()
+
+        params = {"limit": 20}
+        if self.catalog.brands and self.rng.random() < 0.5:
+            params["brand"] = self.rng.choice(self.catalog.brands)
+        elif self.catalog.categories:
+            params["category"] = self.rng.choice(self.catalog.categories)
+        if self.rng.random() < 0.3:
+            params["sort"] = "best_selling"
+        await self.step("listing", "GET", "/api/products", params=params)
+        await self.think()
+
+        await self.step("product", "GET", f"/api/products/{self.product()['id']}")
+
+    async def search(self):
+        words = self.product()["name"].split()
+        term = " ".join(words[:2]) if len(words) > 1 else words[0]
+        # One request per keystroke once two characters are typed, like the search box
+        for length in range(2, min(len(term), 8) + 1):
+            await self.step("search", "GET", "/api/products/search", params={"q": term[:length]})
+            await self.think(0.1)
+
+    async def cart(self):
+        product = self.product()
+        await self.step("cart.add", "POST", "/api/cart/add", json={"product_id": product["id"], "quantity": 1})
+        await self.think()
+        await self.step("cart.update", "PUT", "/api/cart/update", json={"product_id": product["id"], "quantity": 2})
+        await self.step("cart.view", "GET", "/api/cart")
+
+    async def checkout(self):
+        product = self.product()
+        await self.step("cart.add", "POST", "/api/cart/add", json={"product_id": product["id"], "quantity": 1})
+        await self.think()
+
+        subtotal = float(product["price"])
+        discount = 0.0
+        response = await self.step("coupon.validate", "POST", "/api/coupons/validate",
+                                   json={"code": COUPON_CODE, "order_amount": subtotal})
+        if response is not None:
+            discount = response.json()["discount_amount"]
+        await self.think()
+
+        await self.step("order.create", "POST", "/api/orders", json={
+            "items": [{
+                "product_id": product["id"],
+                "product_name": product["name"],
+                "price": subtotal,
+                "quantity": 1
+            }],
+            "shipping_address": {
+                "full_name": "Load Test",
+                "phone": "01700000000",
+                "address": "House 1, Road 1",
+                "city": "Dhaka"
+            },
+            "payment_method": "cod",
+            "subtotal": subtotal,
+            "shipping_cost": 100,
+            "coupon_code": COUPON_CODE if discount else None,
+            "discount_amount": discount,
+            "total_amount": subtotal + 100 - discount
+        })
+
+    async def admin(self):
+        await asyncio.gather(
+            self.step("admin.dashboard", "GET", "/api/admin/dashboard", admin=True),
+            self.step("admin.stats_today", "GET", "/api/admin/stats/today", admin=True)
+        )
+        await self.think()
+        await self.step("admin.orders", "GET", "/api/admin/orders", admin=True, params={"limit": 20})
+
+    async def run_until(self, deadline: float, iterations: Dict[str, int]):
+        names = list(JOURNEY_WEIGHTS)
+        weights = [JOURNEY_WEIGHTS[name] for name in names]
+        while time.perf_counter() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            iterations[name] = iterations.get(name, 0) + 1
+            await getattr(self, name)()
+            await self.think()
+
+
+# -------------------- Setup --------------------
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/api/auth/login", json={"email_or_phone": email, "password": password})
+    if response.status_code != 200:
+        raise RuntimeError(f"Login failed for {email}: {response.status_code} {response.text}")
+    return response.json()["access_token"]
+
+
+async def shopper_token(client: httpx.AsyncClient, index: int) -> str:
+    email = f"loadtest-{index}@example.com"
+    response = await client.post("/api/auth/register", json={
+        "full_name": f"Load Test {index}",
+        "email": email,
+        "phone": f"017{index:08d}",
+        "password": SHOPPER_PASSWORD,
+        "confirm_password": SHOPPER_PASSWORD
+    })
+    # 400 means the account exists from an earlier run
+    if response.status_code not in (201, 400):
+        raise RuntimeError(f"Could not register {email}: {response.status_code} {response.text}")
+    return await login(client, email, SHOPPER_PASSWORD)
+
+
+async def ensure_coupon(client: httpx.AsyncClient, admin_token: str):
+    now = datetime.utcnow()
+    response = await client.post("/api/coupons", headers={"Authorization": f"Bearer {admin_token}"}, json={
+        "code": COUPON_CODE,
+        "description": "Load test coupon",
+        "discount_type": "percentage",
+        "discount_value": 10,
+        "max_discount": 1000,
+        "valid_from": (now - timedelta(days=1)).isoformat(),
+        "valid_until": (now + timedelta(days=365)).isoformat()
+    })
+    if response.status_code not in (200, 400):
+        raise RuntimeError(f"Could not create coupon: {response.status_code} {response.text}")
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=max(args.users, 20))
+    async with httpx.AsyncClient(base_url=args.api_url.rstrip("/"), timeout=30, limits=limits) as client:
+        admin_token = await login(client, args.admin_email, args.admin_password)
+        await ensure_coupon(client, admin_token)
+
+        response = await client.get("/api/products", params={"limit": 500})
+        response.raise_for_status()
+        catalog = Catalog(response.json())
+        if not catalog.products:
+            raise RuntimeError("No active products; load the catalog before running")
+
+        # One account per user, so one user's order never empties another's cart
+        tokens = [await shopper_token(client, i) for i in range(args.users)]
+
+        recorder = Recorder()
+        iterations: Dict[str, int] = {}
+        rng = random.Random(args.seed)
+        users = [
+            VirtualUser(client, recorder, catalog, tokens[i], admin_token,
+                        random.Random(rng.random()), args.think_time)
+            for i in range(args.users)
+        ]
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        # Ramp users in over the first few seconds instead of all at once
+        await asyncio.gather(*(
+            _start_after(i * args.ramp_up / args.users, user.run_until(deadline, iterations))
+            for i, user in enumerate(users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    steps = {}
+    for step in sorted(recorder.samples):
+        samples = recorder.samples[step]
+        errors = sum(recorder.errors.get(step, {}).values())
+        steps[step] = {
+            **summarize(samples),
+            "rps": round(len(samples) / elapsed, 2),
+            "error_rate": round(errors / len(samples), 4),
+            "errors": recorder.errors.get(step, {})
+        }
+
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "api_url": args.api_url,
+        "users": args.users,
+        "duration_seconds": round(elapsed, 2),
+        "think_time": args.think_time,
+        "seed": args.seed,
+        "products": len(catalog.products),
+        "iterations": iterations,
+        "requests": sum(len(s) for s in recorder.samples.values()),
+        "rps": round(sum(len(s) for s in recorder.samples.values()) / elapsed, 2),
+        "steps": steps
+    }
+
+
+async def _start_after(delay: float, coroutine):
+    await asyncio.sleep(delay)
+    await coroutine
+
+
+# -------------------- Baselines --------------------
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Regressions of report against baseline, one message per step and metric"""
+    regressions = []
+    for step, old in baseline["steps"].items():
+        new = report["steps"].get(step)
+        if new is None:
+            regressions.append(f"{step}: not exercised in this run")
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if new[metric] > old[metric] * (1 + tolerance) and new[metric] - old[metric] >= min_delta_ms:
+                regressions.append(f"{step}: {metric} {old[metric]} -> {new[metric]}")
+        if new["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{step}: error rate {old['error_rate']:.2%} -> {new['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    print(f"{report['users']} users, {report['duration_seconds']}s, {report['requests']} requests "
+          f"({report['rps']}/s), journeys: {report['iterations']}")
+    print(f"{'step':<20}{'count':>8}{'rps':>8}{'err %':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'max ms':>10}{'base p95':>10}")
+    for step, row in report["steps"].items():
+        old = (baseline or {}).get("steps", {}).get(step)
+        print(f"{step:<20}{row['count']:>8}{row['rps']:>8}{row['error_rate'] * 100:>8.1f}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}{old['p95_ms'] if old else '-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--ramp-up", type=float, default=5.0)
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean seconds between steps")
+    parser.add_argument("--admin-email", default=os.getenv("LOADTEST_ADMIN_EMAIL", "admin@timora.com"))
+    parser.add_argument("--admin-password", default=os.getenv("LOADTEST_ADMIN_PASSWORD", "admin123"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="store the report as baselines/NAME.json")
+    parser.add_argument("--baseline", metavar="NAME", help="compare against baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95/p99 slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(baseline_path(args.baseline)) as f:
+            baseline = json.load(f)
+
+    report = asyncio.run(run(args))
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save_baseline), "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline {baseline_path(args.save_baseline)}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
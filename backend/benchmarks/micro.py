@@ -0,0 +1,284 @@
+# backend/benchmarks/micro.py
+"""Microbenchmarks for the CPU-bound helpers on the request path.
+
+Each benchmark times one call of a helper (or one pass over a batch)
+in several rounds, with the loop count per round calibrated so a round
+runs for at least --min-time seconds, and reports the min, median, mean
+and spread per call like pytest-benchmark does.
+
+From the backend directory:
+
+    python -m benchmarks.micro --save before
+    # ... change serialization, add caching ...
+    python -m benchmarks.micro --compare before
+
+--compare prints the change per benchmark against baselines/micro-<name>.json
+and exits 1 if any median got slower than --threshold. Use --filter to
+run only benchmarks whose name contains a string.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# name -> setup function returning the callable to time
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def sample_products(count: int) -> List[dict]:
+    """Product documents shaped like the products collection"""
+    from bson import ObjectId
+
+    brands = ("Seiko", "Casio", "Titan", "Citizen", "Orient", "Fossil")
+    categories = ("men", "women", "couple", "smart")
+    created = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"{brands[i % len(brands)]} Model {i} Automatic",
+            "description": "Stainless steel case with sapphire crystal and a 42mm dial",
+            "price": 5000 + (i * 37) % 45000,
+            "original_price": None,
+            "category": categories[i % len(categories)],
+            "brand": brands[i % len(brands)],
+            "stock": i % 40,
+            "reserved": i % 3,
+            "images": [f"/images/products/watch{i}.jpg"],
+            "is_featured": i % 10 == 0,
+            "is_active": True,
+            "created_at": created + timedelta(minutes=i),
+            "movement": "Automatic",
+            "case_size": "42mm",
+            "water_resistance": "100m",
+            "warranty": "2 years",
+            "specifications": {"strap": "Leather", "glass": "Sapphire"}
+        }
+        for i in range(count)
+    ]
+
+
+# -------------------- Benchmarks --------------------
+
+@benchmark("jwt.create_access_token")
+def bench_create_token():
+    import main
+
+    return lambda: main.create_access_token({"sub": "customer@example.com"})
+
+
+@benchmark("jwt.verify_token")
+def bench_verify_token():
+    import main
+
+    token = "Bearer " + main.create_access_token({"sub": "customer@example.com"})
+    return lambda: main.verify_token(token)
+
+
+@benchmark("products.response_1k")
+def bench_product_response():
+    import main
+    from app.db import stock_holds
+
+    products = sample_products(1000)
+
+    def build():
+        result = []
+        for product in products:
+            doc = dict(product)
+            doc["id"] = str(doc["_id"])
+            doc["available_stock"] = stock_holds.available_stock(doc)
+            result.append(main.ProductResponse(**doc))
+        return result
+
+    return build
+
+
+@benchmark("products.response_1k_json")
+def bench_product_response_json():
+    import main
+    from fastapi.encoders import jsonable_encoder
+
+    products = []
+    for product in sample_products(1000):
+        product["id"] = str(product["_id"])
+        products.append(main.ProductResponse(**product))
+    return lambda: json.dumps(jsonable_encoder(products))
+
+
+@benchmark("search.match_100")
+def bench_search():
+    import main
+
+    # The search endpoint scans up to 100 active products per keystroke
+    products = sample_products(100)
+    return lambda: [p for p in products if main.product_matches(p, "seiko mod")]
+
+
+@benchmark("search.catalog_10k")
+def bench_catalog_search():
+    from app.db.catalog import Catalog
+
+    catalog = Catalog.from_products(sample_products(10000))
+    return lambda: catalog.search("seiko model 12", limit=10)
+
+
+@benchmark("coupon.discount")
+def bench_coupon_discount():
+    import main
+
+    percentage = {"discount_type": "percentage", "discount_value": 15, "max_discount": 2000}
+    fixed = {"discount_type": "fixed", "discount_value": 500}
+    return lambda: (main.calculate_coupon_discount(percentage, 18750.5),
+                    main.calculate_coupon_discount(fixed, 18750.5))
+
+
+@benchmark("cart.total_20")
+def bench_cart_total():
+    import main
+
+    items = [{"product_id": str(i), "price": 1000.0 + i * 12.5, "quantity": 1 + i % 3} for i in range(20)]
+    return lambda: main.cart_total(items)
+
+
+@benchmark("tracking.hash_data")
+def bench_hash_data():
+    from api.tracking import hash_data
+
+    return lambda: hash_data("  Customer.Name@Example.com ")
+
+
+# -------------------- Runner --------------------
+
+def _calibrate(func: Callable, min_time: float) -> int:
+    """Loops per round so that a round takes at least min_time"""
+    loops = 1
+    while loops < 1_000_000:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= min_time:
+            break
+        loops *= 2
+    return loops
+
+
+def run_benchmark(func: Callable, rounds: int, min_time: float) -> dict:
+    func()  # warm up imports and caches
+    loops = _calibrate(func, min_time)
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - started) / loops)
+
+    return {
+        "rounds": rounds,
+        "loops": loops,
+        "min_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "mean_us": round(statistics.mean(per_call) * 1e6, 3),
+        "stddev_us": round(statistics.stdev(per_call) * 1e6, 3) if rounds > 1 else 0.0,
+        "ops_per_second": round(1 / statistics.median(per_call), 1)
+    }
+
+
+def run_all(names: List[str], rounds: int, min_time: float) -> dict:
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(BENCHMARKS[name](), rounds, min_time)
+        print(f"  {name:<28}{results[name]['median_us']:>14.3f} us", file=sys.stderr)
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, new in report["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if old and new["median_us"] > old["median_us"] * (1 + threshold):
+            regressions.append(f"{name}: median {old['median_us']}us -> {new['median_us']}us")
+    return regressions
+
+
+def print_report(report: dict, baseline: dict = None):
+    header = f"{'benchmark':<28}{'min us':>12}{'median us':>12}{'mean us':>12}{'stddev':>10}{'ops/s':>14}"
+    if baseline:
+        header += f"{'base median':>13}{'change':>9}"
+    print(header)
+    for name, row in report["benchmarks"].items():
+        line = (f"{name:<28}{row['min_us']:>12.3f}{row['median_us']:>12.3f}{row['mean_us']:>12.3f}"
+                f"{row['stddev_us']:>10.3f}{row['ops_per_second']:>14,.1f}")
+        old = (baseline or {}).get("benchmarks", {}).get(name)
+        if old:
+            change = (row["median_us"] - old["median_us"]) / old["median_us"] * 100
+            line += f"{old['median_us']:>13.3f}{change:>+8.1f}%"
+        elif baseline:
+            line += f"{'-':>13}{'new':>9}"
+        print(line)
+
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"micro-{name}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per round")
+    parser.add_argument("--save", metavar="NAME", help="store results as baselines/micro-NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with baselines/micro-NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.10, help="median slowdown counted as a regression")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        parser.error(f"no benchmark matches {args.filter!r}")
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+    report = run_all(names, args.rounds, args.min_time)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save), "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline {baseline_path(args.save)}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# backend/benchmarks/mock_gateway.py
+"""Local stand-in for the bKash, Nagad and Upay APIs used by api/payment.py.
+
+Implements the bKash token grant/refresh, create, execute and status
+endpoints, Nagad create/verify and Upay init/verify, with configurable
+latency, error rate and callback timing. After a payment is created the
+mock "customer" approves it and the gateway posts the callback to the
+URL the backend supplied, like the real redirect would.
+
+Start it from the backend directory:
+
+    python -m benchmarks.mock_gateway --port 9100 --latency-ms 80 --error-rate 0.02
+
+and point the backend at it:
+
+    BKASH_BASE_URL=http://127.0.0.1:9100/bkash
+    NAGAD_BASE_URL=http://127.0.0.1:9100/nagad
+    UPAY_BASE_URL=http://127.0.0.1:9100/upay
+    BKASH_CALLBACK_URL / NAGAD_CALLBACK_URL / UPAY_CALLBACK_URL=http://127.0.0.1:8000/api/payment/callback
+    NAGAD_PRIVATE_KEY=<any base64 string>
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockSettings:
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    # Share of requests answered with a 503
+    error_rate: float = 0.0
+    # Share of payments the customer cancels instead of approving
+    decline_rate: float = 0.0
+    # Seconds between create and the callback; negative disables callbacks
+    callback_delay: float = 1.0
+    token_ttl: int = 3600
+    seed: Optional[int] = None
+
+
+class MockGateway:
+    """In-memory payment state shared by the three mocked gateways"""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.payments: Dict[str, dict] = {}
+        self.requests: Dict[str, int] = {}
+        self.callbacks_sent = 0
+        self.callback_errors = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def simulate(self, endpoint: str) -> Optional[JSONResponse]:
+        """Apply latency and injected errors; returns an error response to send, if any"""
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        delay = self.settings.latency_ms + self.rng.uniform(-1, 1) * self.settings.jitter_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.rng.random() < self.settings.error_rate:
+            return JSONResponse({"errorMessage": "Service unavailable"}, status_code=503)
+        return None
+
+    def create(self, gateway: str, order_id: str, callback_url: str) -> dict:
+        payment = {
+            "id": uuid.uuid4().hex[:20],
+            "gateway": gateway,
+            "order_id": order_id,
+            "state": "initiated",
+            "approved": self.rng.random() >= self.settings.decline_rate,
+            "trx_id": uuid.uuid4().hex[:10].upper()
+        }
+        self.payments[payment["id"]] = payment
+        if self.settings.callback_delay >= 0 and callback_url:
+            asyncio.create_task(self._send_callback(payment, callback_url))
+        return payment
+
+    def settle(self, payment: dict) -> dict:
+        """Customer has finished on the gateway page"""
+        if payment["state"] == "initiated":
+            payment["state"] = "completed" if payment["approved"] else "cancelled"
+        return payment
+
+    def callback_payload(self, payment: dict) -> dict:
+        approved = payment["approved"]
+        if payment["gateway"] == "bkash":
+            return {"status": "success" if approved else "cancel", "paymentID": payment["id"]}
+        if payment["gateway"] == "nagad":
+            return {"status": "Success" if approved else "Aborted", "payment_ref": payment["id"]}
+        return {"status": "SUCCESS" if approved else "CANCELLED", "transaction_id": payment["id"]}
+
+    async def _send_callback(self, payment: dict, callback_url: str):
+        await asyncio.sleep(self.settings.callback_delay)
+        # An approved bKash payment waits for execute; everything else settles now
+        if payment["gateway"] != "bkash" or not payment["approved"]:
+            self.settle(payment)
+        try:
+            response = await self.client.post(callback_url, json=self.callback_payload(payment))
+            self.callbacks_sent += 1
+            if response.status_code >= 400:
+                self.callback_errors += 1
+        except httpx.HTTPError:
+            self.callback_errors += 1
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        states = {}
+        for payment in self.payments.values():
+            states[payment["state"]] = states.get(payment["state"], 0) + 1
+        return {
+            "requests": self.requests,
+            "payments": len(self.payments),
+            "states": states,
+            "callbacks_sent": self.callbacks_sent,
+            "callback_errors": self.callback_errors
+        }
+
+
+def create_app(settings: MockSettings) -> FastAPI:
+    app = FastAPI(title="Mock payment gateways")
+    gateway = MockGateway(settings)
+    app.state.gateway = gateway
+
+    app.add_event_handler("shutdown", gateway.close)
+
+    # bKash tokenized checkout
+    @app.post("/bkash/tokenized/checkout/token/{kind}")
+    async def bkash_token(kind: str):
+        error = await gateway.simulate(f"bkash.token_{kind}")
+        if error:
+            return error
+        return {
+            "statusCode": "0000",
+            "id_token": uuid.uuid4().hex,
+            "refresh_token": uuid.uuid4().hex,
+            "token_type": "Bearer",
+            "expires_in": settings.token_ttl
+        }
+
+    @app.post("/bkash/tokenized/checkout/create")
+    async def bkash_create(request: Request):
+        error = await gateway.simulate("bkash.create")
+        if error:
+            return error
+        body = await request.json()
+        payment = gateway.create("bkash", body.get("merchantInvoiceNumber"), body.get("callbackURL"))
+        return {
+            "statusCode": "0000",
+            "paymentID": payment["id"],
+            "bkashURL": f"https://mock.bkash/checkout/{payment['id']}",
+            "transactionStatus": "Initiated"
+        }
+
+    @app.post("/bkash/tokenized/checkout/execute")
+    async def bkash_execute(request: Request):
+        error = await gateway.simulate("bkash.execute")
+        if error:
+            return error
+        body = await request.json()
+        payment = gateway.payments.get(body.get("paymentID"))
+        if payment is None:
+            return {"statusCode": "2056", "statusMessage": "Invalid Payment ID"}
+        if payment["state"] != "initiated":
+            return {"statusCode": "2062", "statusMessage": "The payment has already been completed"}
+        gateway.settle(payment)
+        if payment["state"] != "completed":
+            return {"statusCode": "2001", "statusMessage": "Payment cancelled"}
+        return {"statusCode": "0000", "paymentID": payment["id"], "trxID": payment["trx_id"], "transactionStatus": "Completed"}
+
+    @app.get("/bkash/tokenized/checkout/payment/status")
+    async def bkash_status(paymentID: str):
+        error = await gateway.simulate("bkash.query")
+        if error:
+            return error
+        payment = gateway.payments.get(paymentID)
+        if payment is None:
+            return {"statusCode": "2056", "statusMessage": "Invalid Payment ID"}
+        return {
+            "statusCode": "0000",
+            "paymentID": payment["id"],
+            "trxID": payment["trx_id"] if payment["state"] == "completed" else None,
+            "transactionStatus": payment["state"].capitalize()
+        }
+
+    # Nagad
+    @app.post("/nagad/payment/create")
+    async def nagad_create(request: Request):
+        error = await gateway.simulate("nagad.create")
+        if error:
+            return error
+        body = await request.json()
+        payment = gateway.create("nagad", body.get("orderId"), body.get("redirectUrl"))
+        return {"paymentRef": payment["id"], "redirectUrl": f"https://mock.nagad/checkout/{payment['id']}"}
+
+    @app.get("/nagad/payment/verify/{payment_ref}")
+    async def nagad_verify(payment_ref: str):
+        error = await gateway.simulate("nagad.verify")
+        if error:
+            return error
+        payment = gateway.payments.get(payment_ref)
+        if payment is None:
+            return {"status": "Failed", "message": "Invalid payment reference"}
+        status = {"completed": "Success", "cancelled": "Aborted"}.get(payment["state"], "Initiated")
+        return {"status": status, "paymentRefId": payment["id"], "issuerPaymentRefNo": payment["trx_id"]}
+
+    # Upay
+    @app.post("/upay/payment/init")
+    async def upay_init(request: Request):
+        error = await gateway.simulate("upay.create")
+        if error:
+            return error
+        body = await request.json()
+        payment = gateway.create("upay", body.get("order_id"), body.get("redirect_url"))
+        return {"transaction_id": payment["id"], "payment_url": f"https://mock.upay/checkout/{payment['id']}"}
+
+    @app.post("/upay/payment/verify")
+    async def upay_verify(request: Request):
+        error = await gateway.simulate("upay.verify")
+        if error:
+            return error
+        body = await request.json()
+        payment = gateway.payments.get(body.get("transaction_id"))
+        if payment is None:
+            return {"status": "FAILED", "message": "Invalid transaction"}
+        status = {"completed": "SUCCESS", "cancelled": "CANCELLED"}.get(payment["state"], "PENDING")
+        return {"status": status, "transaction_id": payment["id"]}
+
+    @app.get("/_stats")
+    async def stats():
+        return gateway.stats()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--decline-rate", type=float, default=0.0)
+    parser.add_argument("--callback-delay", type=float, default=1.0,
+                        help="seconds from create to callback, negative to disable")
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    settings = MockSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        decline_rate=args.decline_rate,
+        callback_delay=args.callback_delay,
+        token_ttl=args.token_ttl,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from urllib.parse import quote_plus
-from motor.motor_asyncio import AsyncIOMotorClient
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr, Field
@@ -11,16 +11,38 @@ from datetime import datetime, timedelta
 from typing import Optional, List
 import os
 import csv
+import logging
 import io
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import time
 from dotenv import load_dotenv
 from enum import Enum
 import bcrypt
 from bson import ObjectId
+from pymongo import ReturnDocument
 
+# Load environment variables before the app modules read their settings at import
+load_dotenv()
 
+from app.core.cache import CACHE_DISABLED, cache, cached, invalidate
+from app.core.events import event_bus, ADMIN_CHANNEL
+from app.core.log import RequestIdMiddleware, configure_logging
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.db.catalog import product_matches
+from app.db.customer_sketches import (
+    get_customer_count, get_customer_count_union, rebuild_customer_sketches, sketches_ready,
+    day_buckets_between, month_buckets_between
+)
+from app.db import catalog, change_feed, customer_sketches, database, event_relay, product_sales, order_counters, slow_queries, stock_alerts, stock_holds
+from api import payment, reconciliation
 
-# Load environment variables
-load_dotenv()
+# JSON logs written from a background thread; see app/core/log.py
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -38,22 +60,110 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, status and MongoDB usage, exported at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Outermost, so every log line of a request carries its X-Request-ID
+app.add_middleware(RequestIdMiddleware)
+
 # Database configuration
 username = quote_plus("timoraAdmin")
 password = quote_plus("n@zi@redow@n")
 cluster = "timora-cluster.ruaqmjs.mongodb.net"
-MONGODB_URL = f"mongodb+srv://{username}:{password}@{cluster}/?retryWrites=true&w=majority"
-DATABASE_NAME = "timora_db"
+# MONGODB_URL_OVERRIDE / DATABASE_NAME point the app at another server, e.g. a local
+# mongod for load tests. Not MONGODB_URL: the one in .env has an unescaped password.
+MONGODB_URL = os.getenv("MONGODB_URL_OVERRIDE") or f"mongodb+srv://{username}:{password}@{cluster}/?retryWrites=true&w=majority"
+DATABASE_NAME = os.getenv("DATABASE_NAME", "timora_db")
 
 # Security configuration
 SECRET_KEY = "your-secret-key-change-in-production-2024"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 43200  # 30 days
-
-# MongoDB client
-client = None
+# Tokens for the admin event stream travel in its URL, which ends up in access
+# logs, so they are made for that stream alone and expire quickly
+ADMIN_EVENTS_TOKEN_SCOPE = "admin_events"
+ADMIN_EVENTS_TOKEN_SECONDS = int(os.getenv("ADMIN_EVENTS_TOKEN_SECONDS", 60))
+
+# Background jobs
+ORDER_COUNTER_RECONCILE_SECONDS = int(os.getenv("ORDER_COUNTER_RECONCILE_SECONDS", 600))
+STOCK_HOLD_SWEEP_SECONDS = int(os.getenv("STOCK_HOLD_SWEEP_SECONDS", 60))
+# New buyers reach the active customer sketches within this many seconds
+CUSTOMER_SKETCH_SYNC_SECONDS = int(os.getenv("CUSTOMER_SKETCH_SYNC_SECONDS", 60))
+
+# Public read caches (app/core/cache.py): fresh for the TTL, then served stale
+# while one request refreshes. Product listings carry available stock, so they
+# stay short; admin writes invalidate the namespace straight away.
+PRODUCTS_CACHE_TTL = int(os.getenv("PRODUCTS_CACHE_TTL", 15))
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", 300))
+# /api/home carries featured products too, so it is cached for PRODUCTS_CACHE_TTL
+HOME_FEATURED_LIMIT = int(os.getenv("HOME_FEATURED_LIMIT", 12))
+
+# Before a worker serves its first request it opens its MongoDB connections and
+# loads the public reads the storefront opens with (see serve.py)
+WARMUP_ENABLED = os.getenv("WARMUP", "true").lower() == "true"
+WARMUP_CATEGORIES = ("men", "women", "couple")
+
+# Cache namespaces built from each collection. Every worker follows writes to
+# these collections (app/db/change_feed.py) and drops the namespaces, so a
+# write through one worker also clears the caches of all the others.
+CACHE_DEPENDENCIES = {
+    "products": ("products", "home"),
+    "brands": ("brands", "home"),
+    "sliders": ("sliders", "home"),
+    "settings": ("settings", "home"),
+    # Nothing cached from these yet; followed for future subscribers
+    "coupons": (),
+    "users": ()
+}
+
+# Product fields every checkout writes: stock and reserved from holds and
+# orders, the low stock flag and the sales totals. Listings that show them
+# are cached for PRODUCTS_CACHE_TTL only and search reads stock live, so
+# updates touching nothing else don't flush the caches or the catalog.
+PRODUCT_COUNTER_FIELDS = ("stock", "reserved", "is_low_stock", "sales")
+
+# Dashboard updates and payment status changes published in one worker reach
+# the subscribers in all the others through app/db/event_relay.py
+EVENT_RELAY_ENABLED = os.getenv("EVENT_RELAY", "true").lower() == "true"
+
+# MongoDB database, opened through the shared client in app.db.database
 db = None
 
+# Long running tasks started with the app
+background_jobs = []
+
+collection_feed = change_feed.ChangeFeed(CACHE_DEPENDENCIES, ignore_fields={"products": PRODUCT_COUNTER_FIELDS})
+events_relay = event_relay.EventRelay(event_bus)
+
+
+async def refresh_catalog(collection: str, document_ids):
+    """Keep the worker's product catalog in step with product writes"""
+    if collection == "products":
+        await catalog.apply_changes(db, document_ids)
+
+
+async def invalidate_changed_collection(collection: str, document_ids):
+    """Drop the cache namespaces built from a collection that was written"""
+    namespaces = CACHE_DEPENDENCIES.get(collection)
+    if namespaces:
+        await invalidate(*namespaces)
+
+
+# Subscribers run in order: the catalog is updated before the caches are
+# dropped, so a cache reloaded straight away can't be rebuilt from the old one
+collection_feed.subscribe(refresh_catalog)
+collection_feed.subscribe(invalidate_changed_collection)
+
+
+async def product_written(product_id: str):
+    """Update this worker's catalog with a product write, then drop the caches built from products"""
+    try:
+        await refresh_catalog("products", {product_id})
+    except Exception:
+        # The change feed applies the write to the catalog again
+        logger.exception("Failed to refresh the product catalog", extra={"product_id": product_id})
+    await invalidate(*CACHE_DEPENDENCIES["products"])
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -106,6 +216,7 @@ class ProductCreate(BaseModel):
     is_featured: bool = False
     is_active: bool = True
     specifications: Optional[dict] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0)
 
     # Item specifications
     model: Optional[str] = None
@@ -176,6 +287,8 @@ class ProductResponse(BaseModel):
     water_resistance: Optional[str] = None
     warranty: Optional[str] = None
     specifications: Optional[dict] = None
+    reorder_threshold: Optional[int] = None
+    available_stock: Optional[int] = None
 
 
 
@@ -361,7 +474,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str):
+def verify_token(token: str, scope: Optional[str] = None):
+    """Email of a valid token; scoped tokens are only accepted where that scope is asked for"""
     try:
         # Remove Bearer prefix if present
         if token.startswith("Bearer "):
@@ -369,7 +483,7 @@ def verify_token(token: str):
 
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("scope") != scope:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
@@ -384,6 +498,28 @@ def verify_token(token: str):
         )
 
 
+def cart_total(items: list) -> float:
+    """Cart total from its line items"""
+    return sum(item["price"] * item["quantity"] for item in items)
+
+
+def calculate_coupon_discount(coupon: dict, order_amount: float) -> float:
+    """Discount a valid coupon gives on order_amount, rounded to 2 decimal places"""
+    discount_type = coupon.get("discount_type", "fixed")
+    discount_value = float(coupon.get("discount_value", 0))
+
+    if discount_type == "percentage":
+        discount_amount = (order_amount * discount_value) / 100
+        # Apply max discount cap if set
+        max_discount = coupon.get("max_discount")
+        if max_discount and discount_amount > max_discount:
+            discount_amount = float(max_discount)
+    else:  # fixed
+        discount_amount = min(discount_value, order_amount)
+
+    return round(discount_amount, 2)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     email = verify_token(token)
 
@@ -400,27 +536,97 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 
 # -------------------- Database Connection --------------------
 
+async def warm_up():
+    """Prime the connection pool and the public read caches"""
+    started = time.perf_counter()
+    await database.warm_pool()
+    if CACHE_DISABLED:
+        return
+
+    # The same arguments the storefront pages request, so these are the entries they read
+    loads = [
+        get_products(),
+        get_products(limit=4),
+        get_products(is_featured=True),
+        *(get_products(category=category) for category in WARMUP_CATEGORIES),
+        get_brands(is_active=True),
+        get_active_brands(),
+        *(get_sliders(device_type=device_type, is_active=True) for device_type in HOME_DEVICE_TYPES),
+        get_ramadan_discount(),
+        *(load_home(device_type) for device_type in HOME_DEVICE_TYPES)
+    ]
+    results = await asyncio.gather(*loads, return_exceptions=True)
+    failed = [result for result in results if isinstance(result, Exception)]
+    for error in failed:
+        logger.warning("Cache warmup load failed: %s", error)
+    logger.info("Worker warmed up", extra={
+        "loads": len(loads), "failed": len(failed),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
+
+
 @app.on_event("startup")
 async def startup_db_client():
-    global client, db
+    global db
     try:
-        client = AsyncIOMotorClient(MONGODB_URL)
-        db = client[DATABASE_NAME]
+        db = await database.connect(MONGODB_URL, DATABASE_NAME)
 
         # Test connection
-        await client.server_info()
-        print(f"✅ Connected to MongoDB: {DATABASE_NAME}")
-    except Exception as e:
-        print(f"❌ Failed to connect to MongoDB: {e}")
+        await database.get_client().server_info()
+        logger.info("Connected to MongoDB", extra={"database": DATABASE_NAME})
+
+        await product_sales.ensure_indexes(db)
+        await customer_sketches.ensure_indexes(db)
+        await stock_alerts.ensure_indexes(db)
+        await stock_alerts.refresh_low_stock_flags(db)
+        await stock_holds.ensure_indexes(db)
+        await slow_queries.ensure_indexes(db)
+
+        background_jobs.append(asyncio.create_task(
+            order_counters.reconcile_periodically(db, ORDER_COUNTER_RECONCILE_SECONDS)
+        ))
+        background_jobs.append(asyncio.create_task(
+            stock_holds.release_expired_periodically(db, STOCK_HOLD_SWEEP_SECONDS)
+        ))
+        background_jobs.append(asyncio.create_task(
+            customer_sketches.sync_periodically(db, CUSTOMER_SKETCH_SYNC_SECONDS)
+        ))
+        background_jobs.append(asyncio.create_task(
+            slow_queries.flush_periodically(database.get_client())
+        ))
+        if EVENT_RELAY_ENABLED:
+            background_jobs.append(asyncio.create_task(events_relay.run(db)))
+        try:
+            # Keyed on the database, so instances on one host using different ones don't share a snapshot
+            await catalog.load(db, source=f"{MONGODB_URL}/{DATABASE_NAME}")
+        except Exception:
+            # Search and brands fall back to querying MongoDB
+            logger.exception("Failed to load the product catalog")
+        background_jobs.append(asyncio.create_task(collection_feed.run(db)))
+        background_jobs.append(asyncio.create_task(catalog.sync_periodically()))
+
+        if WARMUP_ENABLED:
+            await warm_up()
+    except Exception:
+        logger.exception("Failed to connect to MongoDB")
         raise
 
 
+# Included between the startup and shutdown handlers so the routers' own
+# handlers start after the database connects and stop before it closes
+app.include_router(payment.router)
+app.include_router(reconciliation.router)
+
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    global client
-    if client:
-        client.close()
-        print("📴 Disconnected from MongoDB")
+    for job in background_jobs:
+        job.cancel()
+    background_jobs.clear()
+
+    await cache.close()
+    await database.close()
+    logger.info("Disconnected from MongoDB")
 
 
 # -------------------- API Routes --------------------
@@ -434,11 +640,17 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     try:
         # Check MongoDB connection
-        await client.server_info()
+        await database.get_client().server_info()
         return {"status": "healthy", "database": "connected"}
     except:
         return {"status": "unhealthy", "database": "disconnected"}
@@ -490,6 +702,7 @@ async def register(user_data: UserRegister):
 
     # Return user response
     user_dict["id"] = str(result.inserted_id)
+    event_bus.publish(ADMIN_CHANNEL, "user_registered", {"user_id": user_dict["id"]})
     return UserResponse(**user_dict)
 
 
@@ -603,19 +816,33 @@ async def create_product(
 
     result = await db.products.insert_one(product_dict)
     product_dict["id"] = str(result.inserted_id)
+    await stock_alerts.check_stock_level(db, product_dict)
+
+    event_bus.publish(ADMIN_CHANNEL, "product_created", {
+        "product_id": product_dict["id"],
+        "name": product_dict["name"],
+        "stock": product_dict["stock"]
+    })
+
+    await product_written(product_dict["id"])
 
     return ProductResponse(**product_dict)
 
 
 @app.get("/api/products", response_model=list[ProductResponse])
+@cached("products", ttl=PRODUCTS_CACHE_TTL, stale_ttl=PRODUCTS_CACHE_TTL)
 async def get_products(
     category: Optional[str] = None,
     brand: Optional[str] = None,
     is_featured: Optional[bool] = None,
+    sort: Optional[str] = None,
     skip: int = 0,
     limit: int = 20
 ):
     """Get all products with optional filters"""
+    if sort not in (None, "best_selling"):
+        raise HTTPException(status_code=400, detail="Invalid sort option")
+
     query = {"is_active": True}
 
     if category:
@@ -625,16 +852,21 @@ async def get_products(
     if is_featured is not None:
         query["is_featured"] = is_featured
 
-    print(f"Query: {query}")  # Debug line
+    logger.debug("Product query", extra={"query": query})
 
     products = []
-    cursor = db.products.find(query).skip(skip).limit(limit)
+    cursor = db.products.find(query)
+    if sort == "best_selling":
+        # Sales totals are maintained on each product as orders come in
+        cursor = cursor.sort([("sales.units", -1), ("_id", 1)])
+    cursor = cursor.skip(skip).limit(limit)
 
     async for product in cursor:
         product["id"] = str(product["_id"])
+        product["available_stock"] = stock_holds.available_stock(product)
         products.append(ProductResponse(**product))
 
-    print(f"Found {len(products)} products")  # Debug line
+    logger.debug("Products found", extra={"count": len(products)})
     return products
 
 #search optiom
@@ -649,21 +881,35 @@ async def search_products(q: str = ""):
         # Simple text search
         search_term = q.lower()
 
+        product_catalog = catalog.get_catalog()
+        if product_catalog is not None:
+            matches = product_catalog.search(search_term, limit=10)
+            # The catalog's stock lags behind orders; read it live for the few results
+            live = {}
+            async for product in db.products.find(
+                {"_id": {"$in": [product["_id"] for product in matches]}}, {"stock": 1, "reserved": 1}
+            ):
+                live[product["_id"]] = product
+            return [
+                {
+                    "id": str(product["_id"]),
+                    "name": product.get("name", ""),
+                    "price": float(product.get("price", 0)),
+                    "brand": product.get("brand", ""),
+                    "category": product.get("category", ""),
+                    "images": product.get("images", []),
+                    "stock": live[product["_id"]].get("stock", 0),
+                    "available_stock": stock_holds.available_stock(live[product["_id"]])
+                }
+                for product in matches if product["_id"] in live
+            ]
+
         # Get all active products
         all_products = await db.products.find({"is_active": True}).to_list(100)
 
         results = []
         for product in all_products:
-            # Check if search term matches
-            name = product.get("name", "").lower()
-            brand = product.get("brand", "").lower()
-            description = product.get("description", "").lower()
-            category = product.get("category", "").lower()
-
-            if (search_term in name or
-                    search_term in brand or
-                    search_term in description or
-                    search_term in category):
+            if product_matches(product, search_term):
                 results.append({
                     "id": str(product["_id"]),
                     "name": product.get("name", ""),
@@ -671,15 +917,14 @@ async def search_products(q: str = ""):
                     "brand": product.get("brand", ""),
                     "category": product.get("category", ""),
                     "images": product.get("images", []),
-                    "stock": product.get("stock", 0)
+                    "stock": product.get("stock", 0),
+                    "available_stock": stock_holds.available_stock(product)
                 })
 
         return results[:10]  # Return max 10 results
 
-    except Exception as e:
-        print(f"Search error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Search error")
         return []
 
 
@@ -699,6 +944,7 @@ async def get_single_product(product_id: str):
 
     product["id"] = str(product["_id"])
     del product["_id"]
+    product["available_stock"] = stock_holds.available_stock(product)
 
     return product
 
@@ -744,6 +990,10 @@ async def update_product(
     updated_product = await db.products.find_one({"_id": ObjectId(product_id)})
     updated_product["id"] = str(updated_product["_id"])
 
+    await stock_alerts.check_stock_level(db, updated_product)
+
+    await product_written(product_id)
+
     return ProductResponse(**updated_product)
 
 
@@ -780,13 +1030,22 @@ async def delete_product(
             detail="Product not found"
         )
 
+    event_bus.publish(ADMIN_CHANNEL, "product_deleted", {"product_id": product_id})
+
+    await product_written(product_id)
+
     return {"message": "Product deleted successfully"}
 
 
 # Brands endpoint for filter
 @app.get("/api/brands/active")
+@cached("products", ttl=CATALOG_CACHE_TTL, stale_ttl=CATALOG_CACHE_TTL)
 async def get_active_brands():
     """Get all active brands from products"""
+    product_catalog = catalog.get_catalog()
+    if product_catalog is not None:
+        return [{"name": brand} for brand in product_catalog.brands]
+
     try:
         pipeline = [
             {"$match": {"is_active": True}},
@@ -802,8 +1061,8 @@ async def get_active_brands():
                 result.append({"name": brand["_id"]})
 
         return result
-    except Exception as e:
-        print(f"Error fetching brands: {str(e)}")
+    except Exception:
+        logger.exception("Error fetching brands")
         return [
             {"name": "Seiko"},
             {"name": "Casio"},
@@ -832,8 +1091,8 @@ async def add_to_cart(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Check stock
-    if product.get("stock", 0) < item.quantity:
+    # Check stock, leaving out units held for checkouts awaiting payment
+    if stock_holds.available_stock(product) < item.quantity:
         raise HTTPException(status_code=400, detail="Insufficient stock")
 
     user_id = str(current_user["_id"])
@@ -860,7 +1119,7 @@ async def add_to_cart(
             })
 
         # Calculate total
-        total = sum(item["price"] * item["quantity"] for item in cart_items)
+        total = cart_total(cart_items)
 
         await db.carts.update_one(
             {"user_id": user_id},
@@ -934,7 +1193,7 @@ async def update_cart_item(
         raise HTTPException(status_code=404, detail="Item not found in cart")
 
     # Recalculate total
-    total = sum(i["price"] * i["quantity"] for i in items)
+    total = cart_total(items)
 
     await db.carts.update_one(
         {"user_id": user_id},
@@ -967,7 +1226,7 @@ async def remove_from_cart(
     # Recalculate total
     cart = await db.carts.find_one({"user_id": user_id})
     if cart:
-        total = sum(item["price"] * item["quantity"] for item in cart.get("items", []))
+        total = cart_total(cart.get("items", []))
         await db.carts.update_one(
             {"user_id": user_id},
             {"$set": {"total": total, "updated_at": datetime.utcnow()}}
@@ -993,6 +1252,17 @@ async def create_order(
         # Generate order ID
         order_id = 'ORD' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
 
+        payment_method = order_data.get("payment_method", "cod")
+        items = order_data.get("items", [])
+
+        # Gateway payments hold stock until the payment settles instead of taking it now
+        hold = None
+        if payment_method in stock_holds.ONLINE_PAYMENT_METHODS:
+            try:
+                hold = await stock_holds.place_hold(db, order_id, items)
+            except stock_holds.InsufficientStock as e:
+                raise HTTPException(status_code=409, detail=f"Insufficient stock for product {e.product_id}")
+
         # Get discount amount from request (already calculated in frontend)
         discount_amount = float(order_data.get("discount_amount", 0))
         coupon_code = order_data.get("coupon_code")
@@ -1009,9 +1279,9 @@ async def create_order(
             "order_id": order_id,
             "user_id": str(current_user["_id"]),
             "user_email": current_user.get("email"),
-            "items": order_data.get("items", []),
+            "items": items,
             "shipping_address": order_data.get("shipping_address"),
-            "payment_method": order_data.get("payment_method", "cod"),
+            "payment_method": payment_method,
             "subtotal": float(order_data.get("subtotal", 0)),
             "shipping_cost": float(order_data.get("shipping_cost", 100)),
             "coupon_code": coupon_code,
@@ -1019,32 +1289,52 @@ async def create_order(
             "total_amount": float(order_data.get("total_amount", 0)),
             "order_status": "pending",
             "notes": order_data.get("notes"),
+            "stock_hold_expires_at": hold["expires_at"] if hold else None,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
 
         result = await db.orders.insert_one(order)
+        await order_counters.count_order_created(db, order["order_status"])
+
+        try:
+            await product_sales.record_order_sales(db, order)
+        except Exception:
+            logger.exception("Error updating product sales")
 
         # Clear user's cart if it's not a buy-now order
         if order_data.get("notes") != "Buy Now Order":
             await db.carts.delete_one({"user_id": str(current_user["_id"])})
 
         # Update product stock
-        for item in order_data.get("items", []):
-            await db.products.update_one(
-                {"_id": ObjectId(item.get("product_id"))},
-                {"$inc": {"stock": -item.get("quantity", 0)}}
-            )
+        if hold is None:
+            for item in items:
+                await stock_alerts.adjust_stock(db, item.get("product_id"), -item.get("quantity", 0))
+
+        event_bus.publish(ADMIN_CHANNEL, "order_created", {
+            "order": {
+                "order_id": order_id,
+                "user_email": order["user_email"],
+                "shipping_address": order["shipping_address"],
+                "total_amount": order["total_amount"],
+                "order_status": order["order_status"],
+                "created_at": order["created_at"]
+            },
+            "revenue_delta": order["total_amount"]
+        })
 
         return {
             "order_id": order_id,
             "message": "Order placed successfully",
             "total_amount": order["total_amount"],
-            "discount_applied": discount_amount
+            "discount_applied": discount_amount,
+            "stock_hold_expires_at": order["stock_hold_expires_at"]
         }
 
-    except Exception as e:
-        print(f"Error creating order: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error creating order")
         raise HTTPException(status_code=500, detail="Failed to create order")
 
 
@@ -1080,7 +1370,9 @@ async def get_admin_dashboard(
     # Get statistics
     total_users = await db.users.count_documents({})
     total_products = await db.products.count_documents({"is_active": True})
-    total_orders = await db.orders.count_documents({})
+    total_orders = await order_counters.get_order_count(db)
+    if total_orders is None:
+        total_orders = await db.orders.count_documents({})
 
     # Recent orders
     recent_orders = []
@@ -1171,6 +1463,45 @@ async def get_today_stats(
     }
 
 
+@app.post("/api/admin/events/token")
+async def create_admin_events_token(current_user: dict = Depends(get_current_user)):
+    """Short-lived token for opening /api/admin/events (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    token = create_access_token(
+        data={"sub": current_user["email"], "scope": ADMIN_EVENTS_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=ADMIN_EVENTS_TOKEN_SECONDS)
+    )
+    return {"token": token, "expires_in": ADMIN_EVENTS_TOKEN_SECONDS}
+
+
+@app.get("/api/admin/events")
+async def admin_event_stream(request: Request, token: str):
+    """Live dashboard updates over Server-Sent Events (Admin only)
+
+    EventSource cannot send an Authorization header, so the token is passed
+    as a query parameter: a stream token from /api/admin/events/token, not
+    the login token. Updates are pushed from the order and product write
+    paths of every worker (app/db/event_relay.py); clients load the initial
+    figures from /api/admin/dashboard.
+    """
+    email = verify_token(token, scope=ADMIN_EVENTS_TOKEN_SCOPE)
+    user = await db.users.find_one({"email": email}, {"is_admin": 1})
+
+    if not user or not user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return StreamingResponse(
+        event_bus.stream(ADMIN_CHANNEL, request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 
 @app.get("/api/admin/orders")
 async def get_all_orders(
@@ -1194,7 +1525,10 @@ async def get_all_orders(
         order["_id"] = str(order["_id"])
         orders.append(order)
 
-    total = await db.orders.count_documents(query)
+    # Totals come from maintained per-status counters instead of counting on every page
+    total = await order_counters.get_order_count(db, status or None)
+    if total is None:
+        total = await db.orders.count_documents(query)
 
     return {
         "orders": orders,
@@ -1214,20 +1548,96 @@ async def update_order_status(
     if not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    result = await db.orders.update_one(
+    previous = await db.orders.find_one_and_update(
         {"order_id": order_id},
         {"$set": {
-            "order_status": status,
+            "order_status": status.value,
             "updated_at": datetime.utcnow()
-        }}
+        }},
+        projection={"order_status": 1, "total_amount": 1, "items": 1, "created_at": 1},
+        return_document=ReturnDocument.BEFORE
     )
 
-    if result.modified_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Order not found")
 
+    previous_status = previous.get("order_status")
+    if previous_status != status.value:
+        # Revenue excludes cancelled orders, so moving in or out of it shifts the total
+        revenue_delta = 0
+        if status == OrderStatus.CANCELLED:
+            revenue_delta = -previous.get("total_amount", 0)
+            await product_sales.record_order_sales(db, previous, sign=-1)
+            # Return the cancelled items to stock, or drop their hold if still unpaid
+            await stock_holds.return_order_stock(db, order_id, previous.get("items", []))
+        elif previous_status == OrderStatus.CANCELLED.value:
+            revenue_delta = previous.get("total_amount", 0)
+            await product_sales.record_order_sales(db, previous)
+            await stock_holds.take_order_stock(db, order_id, previous.get("items", []))
+
+        await order_counters.count_status_change(db, previous_status, status.value)
+
+        event_bus.publish(ADMIN_CHANNEL, "order_status_changed", {
+            "order_id": order_id,
+            "previous_status": previous_status,
+            "order_status": status.value,
+            "revenue_delta": revenue_delta
+        })
+
     return {"message": f"Order status updated to {status}"}
 
 
+@app.get("/api/admin/reports/top-products")
+async def get_top_products_report(
+        days: Optional[int] = None,
+        metric: str = "units",
+        limit: int = 10,
+        current_user: dict = Depends(get_current_user)
+):
+    """Best selling products overall or over the last N days (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if days is not None and days < 1:
+        raise HTTPException(status_code=400, detail="days must be at least 1")
+
+    try:
+        products = await product_sales.get_top_products(db, days=days, metric=metric, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"days": days, "metric": metric, "products": products}
+
+
+@app.post("/api/admin/reports/sales/rebuild")
+async def rebuild_product_sales(current_user: dict = Depends(get_current_user)):
+    """Rebuild product sales totals and daily rollups from all orders (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    rollups = await product_sales.rebuild(db)
+    # Listings sorted by best_selling read the totals
+    await invalidate("products")
+    return {"message": "Product sales rebuilt", "daily_rollups": rollups}
+
+
+@app.get("/api/admin/reports/products/{product_id}/sales")
+async def get_product_sales_report(
+        product_id: str,
+        days: int = 30,
+        current_user: dict = Depends(get_current_user)
+):
+    """Daily sales for one product (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=400, detail="Invalid product ID")
+
+    daily = await product_sales.get_product_daily_sales(db, product_id, days)
+    return {"product_id": product_id, "days": days, "daily": daily}
+
+
 @app.get("/api/admin/inventory")
 async def get_inventory_status(
         current_user: dict = Depends(get_current_user)
@@ -1236,23 +1646,92 @@ async def get_inventory_status(
     if not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    # Products with stock < 10
-    low_stock = []
-    cursor = db.products.find({"stock": {"$lt": 10}, "is_active": True})
-
-    async for product in cursor:
-        product["id"] = str(product["_id"])
-        del product["_id"]
-        low_stock.append({
-            "id": product["id"],
-            "name": product["name"],
-            "stock": product["stock"],
-            "category": product["category"]
-        })
+    # Products below their reorder threshold, flagged as stock changes
+    low_stock = await stock_alerts.get_low_stock_products(db)
 
     return {"low_stock_products": low_stock}
 
 
+@app.post("/api/admin/inventory/reserved/rebuild")
+async def rebuild_reserved_stock(current_user: dict = Depends(get_current_user)):
+    """Correct reserved stock counters that drifted from the active holds (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    corrected = await stock_holds.rebuild_reserved_counts(db)
+    await invalidate("products", "home")
+    return {"message": "Reserved stock rebuilt", "products": corrected}
+
+
+@app.get("/api/admin/inventory/alerts")
+async def get_inventory_alerts(
+        limit: int = 50,
+        current_user: dict = Depends(get_current_user)
+):
+    """Recent low stock / restocked alerts (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {"alerts": await stock_alerts.get_recent_alerts(db, limit)}
+
+
+@app.get("/api/admin/db/pool")
+async def get_db_pool_stats(
+        current_user: dict = Depends(get_current_user)
+):
+    """MongoDB connection pool options and usage (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return database.get_pool_stats()
+
+
+@app.get("/api/admin/payment/metrics")
+async def get_payment_metrics(current_user: dict = Depends(get_current_user)):
+    """Payment gateway latency and token state (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return payment.payment_metrics()
+
+
+@app.get("/api/admin/payment/reconcile/last")
+async def get_last_reconciliation(current_user: dict = Depends(get_current_user)):
+    """Report from the most recent payment reconciliation pass (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return await reconciliation.last_reconciliation()
+
+
+@app.get("/api/admin/db/slow-queries")
+async def get_slow_queries(
+        limit: int = 20,
+        sort: str = "total_ms",
+        collscan_only: bool = False,
+        current_user: dict = Depends(get_current_user)
+):
+    """Slowest MongoDB query shapes with their sampled explain plans (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    try:
+        queries = await slow_queries.get_top_slow_queries(db, limit, sort, collscan_only)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"threshold_ms": slow_queries.slow_query_log.threshold_ms, "queries": queries}
+
+
+@app.get("/api/admin/cache")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Read cache hit ratios per namespace and the change feed state (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {**cache.stats(), "change_feed": collection_feed.status()}
+
+
 # -------------------- Customer Management Endpoints --------------------
 
 @app.get("/api/admin/customers")
@@ -1312,13 +1791,18 @@ async def get_customer_stats(current_user: dict = Depends(get_current_user)):
 
     total_customers = await db.users.count_documents({})
 
-    # Active customers
-    pipeline = [
-        {"$group": {"_id": "$user_id"}},
-        {"$count": "active_customers"}
-    ]
-    active_result = await db.orders.aggregate(pipeline).to_list(1)
-    active_customers = active_result[0]["active_customers"] if active_result else 0
+    # Active customers, estimated from the HyperLogLog sketch synced from new orders
+    sketch_count = await get_customer_count(db) if await sketches_ready(db) else None
+    if sketch_count:
+        active_customers = sketch_count["estimate"]
+    else:
+        # Sketches not rebuilt from the orders yet - count exactly
+        pipeline = [
+            {"$group": {"_id": "$user_id"}},
+            {"$count": "active_customers"}
+        ]
+        active_result = await db.orders.aggregate(pipeline).to_list(1)
+        active_customers = active_result[0]["active_customers"] if active_result else 0
 
     # Total revenue
     revenue_pipeline = [
@@ -1343,6 +1827,64 @@ async def get_customer_stats(current_user: dict = Depends(get_current_user)):
     }
 
 
+@app.get("/api/admin/customers/active")
+async def get_active_customers(
+        granularity: str = "all",
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        current_user: dict = Depends(get_current_user)
+):
+    """Approximate distinct buyers overall, or per day / month over a date range"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if granularity == "all":
+        count = await get_customer_count(db)
+        return {"granularity": "all", **(count or {"estimate": 0, "error_rate": None})}
+
+    if granularity not in ("day", "month"):
+        raise HTTPException(status_code=400, detail="granularity must be all, day or month")
+
+    try:
+        end = datetime.strptime(date_to, "%Y-%m-%d") if date_to else datetime.utcnow()
+        start = datetime.strptime(date_from, "%Y-%m-%d") if date_from else end
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+    if granularity == "day":
+        keys = day_buckets_between(start, end)
+    else:
+        keys = month_buckets_between(start, end)
+
+    buckets = []
+    for key in keys:
+        count = await get_customer_count(db, key)
+        buckets.append({"bucket": key.split(":", 1)[1], "estimate": count["estimate"] if count else 0})
+
+    # Distinct over the whole range - a buyer active on several days counts once
+    total = await get_customer_count_union(db, keys)
+
+    return {
+        "granularity": granularity,
+        "buckets": buckets,
+        "estimate": total["estimate"],
+        "error_rate": total["error_rate"]
+    }
+
+
+@app.post("/api/admin/customers/active/rebuild")
+async def rebuild_active_customers(current_user: dict = Depends(get_current_user)):
+    """Rebuild active customer sketches from all orders (Admin only)"""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    buckets = await rebuild_customer_sketches(db)
+    return {"message": "Customer sketches rebuilt", "buckets": buckets}
+
+
 @app.get("/api/admin/customers/{customer_id}/details")
 async def get_customer_details(
         customer_id: str,
@@ -1514,10 +2056,13 @@ async def create_brand(
     result = await db.brands.insert_one(brand_dict)
     brand_dict["id"] = str(result.inserted_id)
 
+    await invalidate("brands", "home")
+
     return BrandResponse(**brand_dict)
 
 
 @app.get("/api/brands", response_model=list[BrandResponse])
+@cached("brands", ttl=CATALOG_CACHE_TTL, stale_ttl=CATALOG_CACHE_TTL)
 async def get_brands(
         is_active: Optional[bool] = None,
         skip: int = 0,
@@ -1567,6 +2112,8 @@ async def update_brand(
     updated_brand = await db.brands.find_one({"_id": ObjectId(brand_id)})
     updated_brand["id"] = str(updated_brand["_id"])
 
+    await invalidate("brands", "home")
+
     return BrandResponse(**updated_brand)
 
 
@@ -1597,6 +2144,8 @@ async def delete_brand(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Brand not found")
 
+    await invalidate("brands", "home")
+
     return {"message": "Brand deleted successfully"}
 
 
@@ -1682,10 +2231,13 @@ async def create_slider(
     result = await db.sliders.insert_one(slider_dict)
     slider_dict["id"] = str(result.inserted_id)
 
+    await invalidate("sliders", "home")
+
     return SliderResponse(**slider_dict)
 
 
 @app.get("/api/sliders", response_model=list[SliderResponse])
+@cached("sliders", ttl=CATALOG_CACHE_TTL, stale_ttl=CATALOG_CACHE_TTL)
 async def get_sliders(
         device_type: Optional[str] = None,
         is_active: Optional[bool] = None
@@ -1736,6 +2288,8 @@ async def update_slider(
     updated_slider = await db.sliders.find_one({"_id": ObjectId(slider_id)})
     updated_slider["id"] = str(updated_slider["_id"])
 
+    await invalidate("sliders", "home")
+
     return SliderResponse(**updated_slider)
 
 
@@ -1765,6 +2319,8 @@ async def toggle_slider_status(
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Slider not found")
 
+    await invalidate("sliders", "home")
+
     return {"message": "Slider status updated"}
 
 
@@ -1787,6 +2343,8 @@ async def delete_slider(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Slider not found")
 
+    await invalidate("sliders", "home")
+
     return {"message": "Slider deleted successfully"}
 
 
@@ -1951,6 +2509,7 @@ async def create_coupon(
 
     # Convert back to strings for response
     response_dict = coupon_dict.copy()
+    response_dict.pop("_id", None)
     response_dict["id"] = str(result.inserted_id)
     response_dict["valid_from"] = coupon_dict["valid_from"].isoformat()
     response_dict["valid_until"] = coupon_dict["valid_until"].isoformat()
@@ -2116,19 +2675,7 @@ async def validate_coupon(
         # Calculate discount
         discount_type = coupon.get("discount_type", "fixed")
         discount_value = float(coupon.get("discount_value", 0))
-        discount_amount = 0
-
-        if discount_type == "percentage":
-            discount_amount = (order_amount * discount_value) / 100
-            # Apply max discount cap if set
-            max_discount = coupon.get("max_discount")
-            if max_discount and discount_amount > max_discount:
-                discount_amount = float(max_discount)
-        else:  # fixed
-            discount_amount = min(discount_value, order_amount)
-
-        # Round to 2 decimal places
-        discount_amount = round(discount_amount, 2)
+        discount_amount = calculate_coupon_discount(coupon, order_amount)
         final_amount = round(order_amount - discount_amount, 2)
 
         return {
@@ -2143,13 +2690,14 @@ async def validate_coupon(
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error validating coupon: {str(e)}")
+    except Exception:
+        logger.exception("Error validating coupon")
         raise HTTPException(status_code=500, detail="Error validating coupon")
 
 # RAMADAN FLAT DISCOUNT
 
 @app.get("/api/settings/ramadan-discount")
+@cached("settings", ttl=CATALOG_CACHE_TTL, stale_ttl=CATALOG_CACHE_TTL)
 async def get_ramadan_discount():
     """Get active Ramadan discount"""
     discount = await db.settings.find_one({"type": "ramadan_discount", "is_active": True})
@@ -2182,10 +2730,73 @@ async def set_ramadan_discount(
         }},
         upsert=True
     )
+    await invalidate("settings", "home")
+
     return {"message": "Ramadan discount updated"}
 
 
 
+# HOME PAGE
+
+HOME_DEVICE_TYPES = ("desktop", "mobile")
+
+
+async def build_home_payload(device_type: str) -> dict:
+    """Assemble the home page sections and gzip them once for every reader"""
+    sliders, brands, featured, ramadan_discount = await asyncio.gather(
+        get_sliders(device_type=device_type, is_active=True),
+        get_brands(is_active=True),
+        get_products(is_featured=True, limit=HOME_FEATURED_LIMIT),
+        get_ramadan_discount()
+    )
+    body = json.dumps(jsonable_encoder({
+        "device_type": device_type,
+        "sliders": sliders,
+        "brands": brands,
+        "featured_products": featured,
+        "ramadan_discount": ramadan_discount
+    }), separators=(",", ":")).encode()
+
+    # Stored as text so the entry also fits the JSON-based Redis cache backend
+    return {
+        "etag": f'"{hashlib.md5(body).hexdigest()}"',
+        "gzip": base64.b64encode(gzip.compress(body, compresslevel=6)).decode()
+    }
+
+
+async def load_home(device_type: str) -> dict:
+    if CACHE_DISABLED:
+        return await build_home_payload(device_type)
+    return await cache.get_or_load(
+        "home", device_type, lambda: build_home_payload(device_type),
+        ttl=PRODUCTS_CACHE_TTL, stale_ttl=PRODUCTS_CACHE_TTL
+    )
+
+
+@app.get("/api/home")
+async def get_home(request: Request, device_type: str = "desktop"):
+    """Sliders, brands, featured products and the Ramadan discount in one response"""
+    if device_type not in HOME_DEVICE_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid device type")
+
+    entry = await load_home(device_type)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={PRODUCTS_CACHE_TTL}",
+        "Vary": "Accept-Encoding"
+    }
+    if request.headers.get("if-none-match") == entry["etag"]:
+        return Response(status_code=304, headers=headers)
+
+    body = base64.b64decode(entry["gzip"])
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,73 @@
+# backend/serve.py
+"""Production server: gunicorn running the app in uvicorn workers.
+
+    python serve.py
+    WEB_CONCURRENCY=4 PORT=8000 python serve.py
+
+main.py imports the app once in the gunicorn master before the workers
+are forked (preload), so settings, models and routes are built a single
+time and shared copy-on-write. Nothing connects at import: each worker
+opens its own MongoDB pool in the startup handler, primes it and warms
+the public read caches (main.warm_up) before it accepts connections, so
+a deploy or a restarted worker never serves its first requests cold.
+
+Settings from the environment:
+
+    HOST, PORT              bind address (0.0.0.0:8000)
+    WEB_CONCURRENCY         worker processes (one per CPU core)
+    WORKER_TIMEOUT          seconds a worker may go silent, startup and
+                            warmup included, before it is restarted (60)
+    GRACEFUL_TIMEOUT        seconds to finish in-flight requests on restart (30)
+    MAX_REQUESTS            recycle a worker after this many requests (0 = never)
+    FORWARDED_ALLOW_IPS     proxies trusted for X-Forwarded-* headers
+
+Workers share no memory: cache invalidation follows MongoDB's writes
+(app/db/change_feed.py), and the events behind the admin dashboard stream
+and payment status waits are relayed between workers through a capped
+collection (app/db/event_relay.py).
+
+Each worker keeps its own pool of up to MONGO_MAX_POOL_SIZE connections,
+so the cluster sees workers x MONGO_MAX_POOL_SIZE at most.
+
+For development use `python main.py` (single process with reload).
+"""
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+
+def server_options() -> dict:
+    return {
+        "bind": f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 8000)}",
+        "workers": int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count())),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": int(os.getenv("WORKER_TIMEOUT", 60)),
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", 30)),
+        "keepalive": 5,
+        "max_requests": int(os.getenv("MAX_REQUESTS", 0)),
+        "max_requests_jitter": int(os.getenv("MAX_REQUESTS", 0)) // 10,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        # Requests are logged by the app's own JSON logging and metrics
+        "accesslog": None
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Runs in the master before forking because of preload_app
+        from main import app
+        return app
+
+
+if __name__ == "__main__":
+    Server(server_options()).run()
@@ -12,33 +12,15 @@ interface Brand {
   image: string
 }
 
-export default function BrandSection() {
+interface BrandSectionProps {
+  brands?: Brand[]
+}
+
+export default function BrandSection({ brands: loaded }: BrandSectionProps) {
+  const brands = loaded || []
   const scrollRef = useRef<HTMLDivElement>(null)
   const [canScrollLeft, setCanScrollLeft] = useState(false)
   const [canScrollRight, setCanScrollRight] = useState(true)
-  const [brands, setBrands] = useState<Brand[]>([])
-
-  useEffect(() => {
-    fetchBrands()
-  }, [])
-
-  const fetchBrands = async () => {
-    try {
-      const res = await fetch('http://localhost:8000/api/brands?is_active=true')
-      if (res.ok) {
-        const data = await res.json()
-        setBrands(data)
-      }
-    } catch (error) {
-      console.error('Error fetching brands:', error)
-      // Fallback to static brands if API fails
-      setBrands([
-        { id: '1', name: 'Seiko', slug: 'seiko', image: '/images/brands/seiko.jpg' },
-        { id: '2', name: 'Casio', slug: 'casio', image: '/images/brands/casio.jpg' },
-        { id: '3', name: 'Citizen', slug: 'citizen', image: '/images/brands/citizen.jpg' },
-      ])
-    }
-  }
 
   const checkScroll = () => {
     if (scrollRef.current) {
@@ -55,7 +37,7 @@ export default function BrandSection() {
       checkScroll()
     }
     return () => container?.removeEventListener('scroll', checkScroll)
-  }, [brands])
+  }, [loaded])
 
   const scroll = (direction: 'left' | 'right') => {
     if (scrollRef.current) {
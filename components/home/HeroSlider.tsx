@@ -19,48 +19,19 @@ interface Slider {
   is_active: boolean
 }
 
-export default function HeroSlider() {
-  const [sliders, setSliders] = useState<Slider[]>([])  // Type the state properly
+interface HeroSliderProps {
+  // Undefined until the home page has loaded
+  sliders?: Slider[]
+}
+
+export default function HeroSlider({ sliders: loaded }: HeroSliderProps) {
+  const sliders = loaded || []
   const [currentSlide, setCurrentSlide] = useState(0)
-  const [isMobile, setIsMobile] = useState(false)
 
   useEffect(() => {
-    // Check device type
-    const checkDevice = () => {
-      setIsMobile(window.innerWidth < 768)
-    }
-    checkDevice()
-    window.addEventListener('resize', checkDevice)
-
-    // Fetch sliders
-    fetchSliders()
-
-    return () => window.removeEventListener('resize', checkDevice)
-  }, [isMobile])
-
-  const fetchSliders = async () => {
-    const deviceType = isMobile ? 'mobile' : 'desktop'
-    try {
-      const res = await fetch(`http://localhost:8000/api/sliders?device_type=${deviceType}&is_active=true`)
-      if (res.ok) {
-        const data = await res.json()
-        setSliders(data)
-      }
-    } catch (error) {
-      console.error('Error fetching sliders:', error)
-      // Fallback sliders if API fails
-      setSliders([
-        {
-          id: '1',
-          image_url: '/images/hero-1.jpg',
-          title: 'Premium Watches',
-          device_type: 'desktop',
-          order_index: 1,
-          is_active: true
-        }
-      ])
-    }
-  }
+    // The device type changed and a different set was loaded
+    setCurrentSlide(0)
+  }, [loaded])
 
   const nextSlide = () => {
     setCurrentSlide((prev) => (prev + 1) % sliders.length)
@@ -1,6 +1,5 @@
 'use client'
 
-import { useEffect, useState } from 'react'
 import ProductCard from '@/components/products/ProductCard'
 import Link from 'next/link'
 import { ArrowUpRight } from 'lucide-react'
@@ -15,62 +14,13 @@ interface Product {
   category: string
 }
 
-export default function ProductSection() {
-  const [products, setProducts] = useState<Product[]>([])
-  const [loading, setLoading] = useState(true)
-
-  useEffect(() => {
-    fetchFeaturedProducts()
-  }, [])
-
-  const fetchFeaturedProducts = async () => {
-    try {
-      const mockProducts: Product[] = [
-        {
-          id: '1',
-          name: 'Titan Raga Viva Silver Dial',
-          price: 12500,
-          original_price: 14999,
-          images: ['/images/products/watch1.jpg', '/images/products/watch2.jpg'],
-          brand: 'Titan',
-          category: 'women'
-        },
-        {
-          id: '2',
-          name: 'Seiko Prospex Diver',
-          price: 165000,
-          original_price: 185000,
-          images: ['/images/products/watch2.jpg', '/images/products/watch3.jpg'],
-          brand: 'Seiko',
-          category: 'men'
-        },
-        {
-          id: '3',
-          name: 'Casio G-Shock',
-          price: 8599,
-          original_price: 9999,
-          images: ['/images/products/watch3.jpg', '/images/products/watch4.jpg'],
-          brand: 'Casio',
-          category: 'men'
-        },
-        {
-          id: '4',
-          name: 'Citizen Eco-Drive',
-          price: 25999,
-          images: ['/images/products/watch4.jpg', '/images/products/watch1.jpg'],
-          brand: 'Citizen',
-          category: 'couple'
-        }
-      ]
-      setProducts(mockProducts)
-    } catch (error) {
-      console.error('Error:', error)
-    } finally {
-      setLoading(false)
-    }
-  }
+interface ProductSectionProps {
+  // Undefined until the home page has loaded
+  products?: Product[]
+}
 
-  if (loading) {
+export default function ProductSection({ products }: ProductSectionProps) {
+  if (!products) {
     return (
       <section className="py-12 md:py-20 bg-black">
         <div className="container-custom">
@@ -60,6 +60,13 @@ export const api = {
     return res.json()
   },
 
+  // Home page: sliders, brands and featured products in one response
+  getHome: async (deviceType: 'desktop' | 'mobile') => {
+    const res = await fetch(`${API_URL}/api/home?device_type=${deviceType}`)
+    if (!res.ok) throw new Error('Failed to fetch home page')
+    return res.json()
+  },
+
   // Product endpoints
   getProducts: async (params?: ProductParams) => {
     const queryParams = new URLSearchParams()
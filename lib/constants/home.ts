@@ -0,0 +1,55 @@
+// Shown by the home page sections when /api/home can't be reached
+export const fallbackHome = {
+  sliders: [
+    {
+      id: '1',
+      image_url: '/images/hero-1.jpg',
+      title: 'Premium Watches',
+      device_type: 'desktop' as const,
+      order_index: 1,
+      is_active: true
+    }
+  ],
+  brands: [
+    { id: '1', name: 'Seiko', slug: 'seiko', image: '/images/brands/seiko.jpg' },
+    { id: '2', name: 'Casio', slug: 'casio', image: '/images/brands/casio.jpg' },
+    { id: '3', name: 'Citizen', slug: 'citizen', image: '/images/brands/citizen.jpg' },
+  ],
+  featured_products: [
+    {
+      id: '1',
+      name: 'Titan Raga Viva Silver Dial',
+      price: 12500,
+      original_price: 14999,
+      images: ['/images/products/watch1.jpg', '/images/products/watch2.jpg'],
+      brand: 'Titan',
+      category: 'women'
+    },
+    {
+      id: '2',
+      name: 'Seiko Prospex Diver',
+      price: 165000,
+      original_price: 185000,
+      images: ['/images/products/watch2.jpg', '/images/products/watch3.jpg'],
+      brand: 'Seiko',
+      category: 'men'
+    },
+    {
+      id: '3',
+      name: 'Casio G-Shock',
+      price: 8599,
+      original_price: 9999,
+      images: ['/images/products/watch3.jpg', '/images/products/watch4.jpg'],
+      brand: 'Casio',
+      category: 'men'
+    },
+    {
+      id: '4',
+      name: 'Citizen Eco-Drive',
+      price: 25999,
+      images: ['/images/products/watch4.jpg', '/images/products/watch1.jpg'],
+      brand: 'Citizen',
+      category: 'couple'
+    }
+  ]
+}